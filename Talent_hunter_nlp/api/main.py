@@ -1,11 +1,19 @@
 import sys
 import os
+import time
+_import_start = time.perf_counter()
+
 import pandas as pd
 import asyncio
-from fastapi import FastAPI
-from pydantic import BaseModel
-from typing import Optional
+import hmac
+import json
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Header, HTTPException, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
+from typing import List, Optional, Union
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
 
 # 1. Configuration du chemin
 base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -13,9 +21,125 @@ if base_dir not in sys.path:
     sys.path.append(base_dir)
 
 from src.matching import TalentSearcher
-from src.agent import extract_skills, generate_summary, score_with_context
+from src.sharding import ShardedSearcher
+from src.agent import LLM_MODES, enrich_candidate_async, get_async_client, get_llm_cache
+from src.artifacts import read_artifact_or_csv
+from src.config import (
+    ADMIN_TOKEN,
+    LLM_MODE,
+    N_SHARDS,
+    PROCESSED_DATA_PATH,
+    RERANK_CANDIDATES,
+    RERANK_ENABLED,
+    RERANK_MIN_SCORE,
+    SCORE_LOG_FLUSH_SECONDS,
+    SCORE_LOG_PATH,
+    SNAPSHOT_WATCH_SECONDS,
+)
+from src.reranker import get_reranker
+from src.llm_cache import text_hash
+from src.metrics import current_timings, render, request_timer, request_timings, timer, timings_report
+from src.score_log import ScoreLog
+
+IMPORT_SECONDS = time.perf_counter() - _import_start
+
+PROFILES_PATH = os.path.join(base_dir, "data", "processed", "profiles_enriched.csv")
+
+def load_profile_texts() -> dict:
+    # Chargement sécurisé des données (seules les colonnes utiles sont lues)
+    full_profiles_df = pd.DataFrame()
+    try:
+        full_profiles_df = read_artifact_or_csv(
+            PROCESSED_DATA_PATH, PROFILES_PATH, columns=["login", "profile_text"], kind="profiles"
+        )
+        print(f"[OK] {len(full_profiles_df)} profils chargés.")
+    except Exception as e:
+        print(f"[ERREUR] Chargement des profils: {e}")
+
+    if not {"login", "profile_text"}.issubset(full_profiles_df.columns):
+        return {}
+    unique_profiles = full_profiles_df.drop_duplicates("login")
+    return dict(zip(unique_profiles["login"].astype(str), unique_profiles["profile_text"].astype(str)))
+
+# Initialisation globale : rien de lourd à l'import (uvicorn écoute tout de suite),
+# les ressources sont chargées en parallèle en arrière-plan par le lifespan
+searcher = None
+# Index login -> texte du profil (lookup O(1) au lieu d'un filtre sur toute la table)
+profile_text_by_login = {}
+
+# État du démarrage, exposé par /readyz
+startup = {"ready": False, "error": None, "import_seconds": round(IMPORT_SECONDS, 3), "ready_seconds": None, "components": {}}
+
+def refresh_profile_texts(snapshot=None):
+    # Les textes suivent la nouvelle version de l'index (nouveaux profils)
+    global profile_text_by_login
+    profile_text_by_login = load_profile_texts()
+
+def load_searcher() -> TalentSearcher | ShardedSearcher:
+    # N_SHARDS > 1 : recherche répartie sur les shards (dense uniquement)
+    loaded = ShardedSearcher.from_config() if N_SHARDS > 1 else TalentSearcher()
+    loaded.reload_callbacks.append(refresh_profile_texts)
+    return loaded
+
+async def load_resources():
+    # Chaque ressource dans son thread : lectures disque, modèles et imports se recouvrent
+    global searcher, profile_text_by_login
+    loaders = {
+        "searcher": load_searcher,
+        "profile_texts": load_profile_texts,
+        "llm_cache": get_llm_cache,
+        "llm_client": get_async_client,
+    }
+    if RERANK_ENABLED:
+        loaders["reranker"] = get_reranker
+
+    async def load(name, loader):
+        start = time.perf_counter()
+        with timer(f"startup.{name}"):
+            result = await asyncio.to_thread(loader)
+        startup["components"][name] = round(time.perf_counter() - start, 3)
+        return result
 
-app = FastAPI()
+    try:
+        results = dict(zip(loaders, await asyncio.gather(*(load(n, f) for n, f in loaders.items()))))
+    except Exception as e:
+        startup["error"] = str(e)
+        print(f"[ERREUR] Démarrage de l'API : {e}")
+        return
+
+    profile_text_by_login = results["profile_texts"]
+    searcher = results["searcher"]
+    # Bascule automatique sur les nouvelles versions publiées par embedding.py
+    if SNAPSHOT_WATCH_SECONDS:
+        searcher.start_watch(SNAPSHOT_WATCH_SECONDS)
+
+    startup["ready_seconds"] = round(time.perf_counter() - _import_start, 3)
+    startup["ready"] = True
+    print(
+        f"[OK] API prête en {startup['ready_seconds']:.2f}s "
+        f"(imports {startup['import_seconds']:.2f}s, chargements {startup['components']})"
+    )
+
+# Journal des scores pour eval_metrics (append-only, écrit en arrière-plan)
+score_log = ScoreLog(SCORE_LOG_PATH, flush_interval=SCORE_LOG_FLUSH_SECONDS)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    score_log.start()
+    loading = asyncio.create_task(load_resources())
+    yield
+    if not loading.done():
+        # Les threads de chargement en cours terminent seuls (non interruptibles)
+        loading.cancel()
+    if searcher is not None:
+        searcher.stop_watch()
+        # Le prochain démarrage repart avec un cache de requêtes chaud
+        searcher.save_query_cache()
+        if isinstance(searcher, ShardedSearcher):
+            searcher.close()  # arrête les processus de shards locaux
+    score_log.close()
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -25,41 +149,154 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialisation globale
-PROFILES_PATH = os.path.join(base_dir, "data", "processed", "profiles_enriched.csv")
-full_profiles_df = pd.DataFrame() 
+def get_searcher() -> TalentSearcher | ShardedSearcher:
+    # Les routes de recherche répondent 503 tant que le chargement n'est pas terminé
+    if not startup["ready"]:
+        raise HTTPException(status_code=503, detail="Service en cours de démarrage.")
+    return searcher
 
-# Chargement sécurisé des données
-try:
-    full_profiles_df = pd.read_csv(PROFILES_PATH)
-    print(f"[OK] {len(full_profiles_df)} profils chargés.")
-except Exception as e:
-    print(f"[ERREUR] Chargement CSV: {e}")
+@app.get("/healthz")
+def healthz():
+    # Vivacité : le processus répond (même pendant le chargement)
+    return {"status": "ok"}
 
-searcher = TalentSearcher()
+@app.get("/readyz")
+def readyz():
+    # Disponibilité : index, modèle et caches chargés
+    if startup["ready"]:
+        return {"status": "ready", **startup}
+    status = "error" if startup["error"] else "starting"
+    return JSONResponse(status_code=503, content={"status": status, **startup})
+
+@app.get("/cache_stats")
+def cache_stats():
+    llm_cache = get_llm_cache()
+    return {
+        "query_cache": get_searcher().query_cache.stats(),
+        "llm_cache": llm_cache.stats() if llm_cache else None,
+    }
+
+@app.post("/admin/reload")
+async def admin_reload(force: bool = False, x_admin_token: Optional[str] = Header(None)):
+    # Bascule sur la version publiée dans CURRENT (sans attendre la surveillance)
+    # Sans jeton configuré, la route est fermée (l'API accepte toutes les origines CORS)
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Routes /admin désactivées (TALENT_HUNTER_ADMIN_TOKEN absent).")
+    if not hmac.compare_digest((x_admin_token or "").encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Jeton d'administration invalide.")
+    searcher = get_searcher()
+    previous = searcher.version
+    try:
+        reloaded = await run_in_threadpool(searcher.reload, force)
+    except Exception as e:
+        # L'ancienne version reste en service
+        raise HTTPException(status_code=409, detail=f"Rechargement refusé : {e}")
+    return {"reloaded": reloaded, "previous_version": previous, "version": searcher.version}
+
+@app.get("/metrics")
+def metrics():
+    # Format texte Prometheus (histogrammes des étapes, compteurs LLM / caches)
+    return PlainTextResponse(render(), media_type="text/plain; version=0.0.4; charset=utf-8")
 
 class SearchRequest(BaseModel):
     job_description: str
-    top_k: int = 5
+    top_k: int = Field(5, ge=1)
     min_stars: Optional[int] = 0
-    language_filter: Optional[str] = None
+    language_filter: Optional[Union[str, List[str]]] = None
+    language_mode: str = "any"  # "any" (OU) ou "all" (ET) entre les langages
+    llm_mode: Optional[str] = None  # "combined" ou "separate" (défaut : LLM_MODE de config.py)
+    search_mode: Optional[str] = None  # "dense", "lexical" ou "hybrid" (défaut : SEARCH_MODE de config.py)
+    rerank: Optional[bool] = None  # reranking cross-encoder avant le LLM (défaut : RERANK_ENABLED)
+    rerank_candidates: Optional[int] = Field(None, ge=1)  # candidats rescorés (défaut : RERANK_CANDIDATES)
+    timings: bool = False  # ajoute le détail des durées par étape à la réponse
 
-@app.post("/agent_search")
-async def agent_search(payload: SearchRequest):
-    global full_profiles_df # Déclaration au début de la fonction
+class BatchSearchRequest(BaseModel):
+    job_descriptions: List[str]
+    top_k: int = Field(5, ge=1)
+    min_stars: Optional[int] = 0
+    language_filter: Optional[Union[str, List[str]]] = None
+    language_mode: str = "any"
+    search_mode: Optional[str] = None
+    timings: bool = False
 
-    results_df = searcher.search(
-        job_description=payload.job_description,
-        top_k=payload.top_k,
-        min_stars=payload.min_stars,
-        language_filter=payload.language_filter,
-    )
+@app.post("/batch_search")
+def batch_search(payload: BatchSearchRequest):
+    # Route synchrone : FastAPI l'exécute dans son pool de threads (calcul CPU)
+    searcher = get_searcher()
+    with request_timer("/batch_search"), request_timings(payload.timings) as timings:
+        try:
+            results = searcher.search_many(
+                payload.job_descriptions,
+                top_k=payload.top_k,
+                filters={
+                    "min_stars": payload.min_stars,
+                    "language_filter": payload.language_filter,
+                    "language_mode": payload.language_mode,
+                },
+                search_mode=payload.search_mode,
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+
+    response = {
+        "results": [df.fillna(0.0).to_dict(orient="records") for df in results]
+    }
+    if payload.timings:
+        response["timings"] = timings
+    return response
+
+def fallback_score(r: dict) -> float:
+    """Score de repli quand le LLM échoue : score du reranker, sinon similarité."""
+    return float(r.get("rerank_score", r.get("similarity", 0.0)))
+
+async def enrich_record(r: dict, job_description: str, llm_mode: str) -> dict:
+    """Enrichit un candidat via le LLM (compétences, résumé, score)."""
+    with timer("api.profile_lookup"):
+        full_text = profile_text_by_login.get(str(r['login']))
+
+    if full_text is not None:
+        try:
+            with timer("api.enrich"):
+                r.update(await enrich_candidate_async(full_text, job_description, llm_mode))
+        except Exception as e:
+            print(f"[INFO] Erreur IA pour {r['login']}: {e}")
+            r["ai_skills"] = []
+            r["ai_summary"] = "Analyse indisponible"
+        if r.get("agent_score") is None:
+            r["agent_score"] = fallback_score(r)
+
+    return r
+
+async def retrieve_records(payload: SearchRequest) -> list[dict]:
+    """
+    Recherche vectorielle (CPU, hors de la boucle d'événements) -> candidats en dicts.
+    Avec le reranking, rerank_candidates profils sont rescorés par le cross-encoder
+    et seuls les top_k meilleurs sont gardés pour le LLM.
+    """
+    searcher = get_searcher()
+    rerank = RERANK_ENABLED if payload.rerank is None else payload.rerank
+    depth = payload.top_k
+    if rerank:
+        depth = max(payload.top_k, payload.rerank_candidates or RERANK_CANDIDATES)
+
+    try:
+        with timer("api.retrieve"):
+            results_df = await run_in_threadpool(
+                searcher.search,
+                job_description=payload.job_description,
+                top_k=depth,
+                min_stars=payload.min_stars,
+                language_filter=payload.language_filter,
+                language_mode=payload.language_mode,
+                search_mode=payload.search_mode,
+            )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
 
     if results_df.empty:
-        return {"results": []}
+        return []
 
     results_df = results_df.fillna(0.0)
-    enriched_results = []
     records = results_df.to_dict(orient="records")
 
     for r in records:
@@ -67,31 +304,105 @@ async def agent_search(payload: SearchRequest):
             if isinstance(value, float) and (pd.isna(value) or value == float('inf')):
                 r[key] = 0.0
 
-        profile_row = full_profiles_df[full_profiles_df['login'] == r['login']]
-        
-        if not profile_row.empty:
-            full_text = str(profile_row['profile_text'].values[0])
-            try:
-                r["ai_skills"] = extract_skills(full_text)
-                r["ai_summary"] = generate_summary(full_text)
-                score = score_with_context(
-                    {"skills": r["ai_skills"], "raw_text": full_text}, 
-                    payload.job_description
+    if rerank:
+        with timer("api.profile_lookup"):
+            texts = [profile_text_by_login.get(str(r["login"]), "") for r in records]
+        with timer("api.rerank"):
+            records = await run_in_threadpool(
+                lambda: get_reranker().rerank(
+                    payload.job_description, records, texts, payload.top_k, min_score=RERANK_MIN_SCORE
                 )
-                r["agent_score"] = float(score)
-            except Exception as e:
-                print(f"[INFO] Erreur IA pour {r['login']}: {e}")
-                r["ai_skills"] = []
-                r["ai_summary"] = "Analyse indisponible"
-                r["agent_score"] = float(r.get("similarity", 0.0))
-        
-        enriched_results.append(r)
-
-    enriched_results.sort(key=lambda x: x.get("agent_score", 0), reverse=True)
-
-    # SAUVEGARDE POUR EVAL_METRICS
-    for r in enriched_results:
-        full_profiles_df.loc[full_profiles_df['login'] == r['login'], 'agent_score'] = r['agent_score']
-    
-    full_profiles_df.to_csv(PROFILES_PATH, index=False)
-    return {"results": enriched_results}
\ No newline at end of file
+            )
+
+    return records
+
+def finalize_results(enriched_results: list[dict], job_description: str) -> list[dict]:
+    """Tri final par score de l'agent + journalisation des scores."""
+    with timer("api.finalize"):
+        enriched_results.sort(key=lambda x: x.get("agent_score", 0), reverse=True)
+
+        # SAUVEGARDE POUR EVAL_METRICS (écriture différée dans le journal des scores)
+        score_log.record(enriched_results, job_hash=text_hash(job_description))
+    return enriched_results
+
+def check_llm_mode(payload: SearchRequest) -> str:
+    llm_mode = payload.llm_mode or LLM_MODE
+    if llm_mode not in LLM_MODES:
+        raise HTTPException(status_code=422, detail=f"llm_mode doit être parmi {LLM_MODES}")
+    return llm_mode
+
+@app.post("/agent_search")
+async def agent_search(payload: SearchRequest):
+    llm_mode = check_llm_mode(payload)
+
+    with request_timer("/agent_search"), request_timings(payload.timings) as timings:
+        records = await retrieve_records(payload)
+        results = []
+        if records:
+            # Enrichissement LLM concurrent sur tous les candidats
+            # (le nombre d'appels simultanés à Ollama est borné par LLM_CONCURRENCY)
+            enriched_results = await asyncio.gather(
+                *(enrich_record(r, payload.job_description, llm_mode) for r in records)
+            )
+            results = finalize_results(list(enriched_results), payload.job_description)
+
+    response = {"results": results}
+    if payload.timings:
+        response["timings"] = timings
+    return response
+
+@app.post("/agent_search/stream")
+async def agent_search_stream(payload: SearchRequest, request: Request, format: Optional[str] = None):
+    """
+    Variante en flux de /agent_search :
+    1. {"event": "results", "results": [...]}   classement par similarité, dès la recherche vectorielle
+    2. {"event": "candidate", "login": ..., "ai_skills", "ai_summary", "agent_score"}   à chaque candidat enrichi
+    3. {"event": "final", "results": [...]}   classement final par agent_score
+       (+ "timings" : durées par étape si payload.timings)
+    Format NDJSON par défaut, Server-Sent Events si ?format=sse ou Accept: text/event-stream.
+    """
+    start = time.perf_counter()
+    llm_mode = check_llm_mode(payload)
+    sse = format == "sse" or "text/event-stream" in request.headers.get("accept", "")
+
+    # Recherche avant d'ouvrir le flux : 503 / 422 restent de vraies réponses d'erreur
+    timings = {}
+    with request_timings(payload.timings, timings):
+        records = await retrieve_records(payload)
+
+    def encode(event: dict) -> str:
+        data = json.dumps(event, ensure_ascii=False)
+        return f"event: {event['event']}\ndata: {data}\n\n" if sse else data + "\n"
+
+    async def events():
+        with request_timer("/agent_search/stream", start=start), request_timings(payload.timings, timings):
+            yield encode({"event": "results", "results": records})
+
+            tasks = [
+                asyncio.create_task(enrich_record(dict(r), payload.job_description, llm_mode))
+                for r in records
+            ]
+            try:
+                enriched_results = []
+                for next_done in asyncio.as_completed(tasks):
+                    r = await next_done
+                    enriched_results.append(r)
+                    yield encode({
+                        "event": "candidate",
+                        "login": r["login"],
+                        "ai_skills": r.get("ai_skills", []),
+                        "ai_summary": r.get("ai_summary", ""),
+                        "agent_score": r.get("agent_score"),
+                    })
+
+                final = {"event": "final", "results": finalize_results(enriched_results, payload.job_description)}
+                if payload.timings:
+                    final["timings"] = timings_report(current_timings())
+                yield encode(final)
+            finally:
+                # Client déconnecté : on n'appelle plus le LLM pour rien
+                for task in tasks:
+                    task.cancel()
+
+    media_type = "text/event-stream" if sse else "application/x-ndjson"
+    return StreamingResponse(events(), media_type=media_type)
@@ -5,14 +5,13 @@ import sys
 import streamlit as st
 import pandas as pd
 
-# --- Pour pouvoir importer matching.py ---
-BASE_DIR = os.path.dirname(os.path.dirname(__file__))
-SRC_DIR = os.path.join(BASE_DIR, "src")
+# --- Pour pouvoir importer src.matching (qui utilise des imports relatifs) ---
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
-if SRC_DIR not in sys.path:
-    sys.path.append(SRC_DIR)
+if BASE_DIR not in sys.path:
+    sys.path.append(BASE_DIR)
 
-from matching import TalentSearcher  # noqa: E402
+from src.matching import TalentSearcher  # noqa: E402
 
 
 @st.cache_resource
@@ -73,15 +72,21 @@ def main():
         step=1,
     )
 
-    # Filtre langage
+    # Filtre langage(s)
     language_filter = None
+    language_mode = "any"
     if languages:
-        lang_choice = st.selectbox(
-            "Filtrer par langage (optionnel)",
-            options=["(Aucun filtre)"] + languages,
-        )
-        if lang_choice != "(Aucun filtre)":
-            language_filter = lang_choice
+        language_filter = st.multiselect(
+            "Filtrer par langage(s) (optionnel)",
+            options=languages,
+        ) or None
+        if language_filter and len(language_filter) > 1:
+            mode_choice = st.radio(
+                "Combinaison des langages",
+                options=["Au moins un (OU)", "Tous (ET)"],
+                horizontal=True,
+            )
+            language_mode = "all" if mode_choice == "Tous (ET)" else "any"
 
     # Filtre nombre minimum de stars
     max_stars = int(searcher.index_df.get("total_stars", pd.Series([0])).max())
@@ -107,6 +112,7 @@ def main():
                     top_k=top_k,
                     min_stars=min_stars,
                     language_filter=language_filter,
+                    language_mode=language_mode,
                 )
 
             except Exception as e:
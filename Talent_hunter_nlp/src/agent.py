@@ -1,52 +1,476 @@
+import asyncio
+import json
 import os
-from openai import OpenAI
+import re
+from dataclasses import dataclass
+from typing import Any, Callable
 
-# On se connecte à Ollama (qui tourne localement sur le port 11434)
-client = OpenAI(
-    base_url="http://localhost:11434/v1",
-    api_key="ollama" # La clé n'est pas vérifiée par Ollama
+from .config import (
+    LLM_CACHE_MAX_ENTRIES,
+    LLM_CACHE_PATH,
+    LLM_CACHE_TTL_DAYS,
+    LLM_CONCURRENCY,
+    LLM_MODE,
 )
+from .llm_cache import LLMCache
+from .metrics import LLM_CACHE, LLM_CALLS, LLM_INVALID_SCORES, LLM_TOKENS, timer
 
-def extract_skills(text: str) -> list[str]:
-    prompt = f"Liste les 6 compétences techniques principales présentes dans ce texte (séparées par des virgules) :\n----\n{text}\n----"
+LLM_MODES = ("combined", "separate")
+LLM_MODEL = "llama3"
+
+# Version de chaque prompt : à incrémenter quand un prompt change (invalide le cache)
+PROMPT_VERSIONS = {"skills": 1, "summary": 1, "score": 1, "analysis": 1}
+
+# On se connecte à Ollama (qui tourne localement sur le port 11434)
+LLM_BASE_URL = "http://localhost:11434/v1"
+LLM_API_KEY = "ollama"  # La clé n'est pas vérifiée par Ollama
+
+# Clients créés à la première utilisation : importer openai coûte ~0.5s,
+# que l'API paie pendant son chargement en arrière-plan plutôt qu'à l'import
+_client = None
+_async_client = None
+
+
+def get_client():
+    global _client
+    if _client is None:
+        from openai import OpenAI
+
+        _client = OpenAI(base_url=LLM_BASE_URL, api_key=LLM_API_KEY)
+    return _client
+
+
+def get_async_client():
+    """Client asynchrone pour l'API (appels concurrents sans bloquer la boucle d'événements)."""
+    global _async_client
+    if _async_client is None:
+        from openai import AsyncOpenAI
+
+        _async_client = AsyncOpenAI(base_url=LLM_BASE_URL, api_key=LLM_API_KEY)
+    return _async_client
+
+# Limite globale d'appels simultanés à Ollama (partagée entre toutes les requêtes)
+_llm_semaphore = None
+
+
+def get_llm_semaphore() -> asyncio.Semaphore:
+    global _llm_semaphore
+    if _llm_semaphore is None:
+        _llm_semaphore = asyncio.Semaphore(LLM_CONCURRENCY)
+    return _llm_semaphore
+
+
+# Cache persistant des résultats (None si LLM_CACHE_PATH est None)
+_llm_cache = None
+
+
+def get_llm_cache() -> LLMCache | None:
+    global _llm_cache
+    if _llm_cache is None and LLM_CACHE_PATH:
+        ttl = LLM_CACHE_TTL_DAYS * 86400 if LLM_CACHE_TTL_DAYS else None
+        _llm_cache = LLMCache(LLM_CACHE_PATH, max_entries=LLM_CACHE_MAX_ENTRIES, ttl_seconds=ttl)
+    return _llm_cache
+
+
+def _cache_key(kind: str, *parts: str) -> str:
+    return LLMCache.make_key(kind, LLM_MODEL, PROMPT_VERSIONS[kind], *parts)
+
+
+def _cache_get(kind: str, key: str):
+    cache = get_llm_cache()
+    if not cache:
+        return None
+    value = cache.get(kind, key)
+    LLM_CACHE.inc(kind=kind, result="miss" if value is None else "hit")
+    return value
+
+
+def _cache_set(kind: str, key: str, value):
+    cache = get_llm_cache()
+    if cache:
+        cache.set(kind, key, value)
+
+
+def _profile_info_text(profile_info: dict) -> str:
+    """Entrée du score côté profil (compétences + texte brut), pour la clé du cache."""
+    return json.dumps(profile_info, sort_keys=True, ensure_ascii=False, default=str)
+
+
+def _record_usage(kind: str, response):
+    """Tokens consommés par un appel (si le serveur renvoie usage, comme Ollama)."""
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return
+    LLM_TOKENS.inc(getattr(usage, "prompt_tokens", 0) or 0, kind=kind, type="prompt")
+    LLM_TOKENS.inc(getattr(usage, "completion_tokens", 0) or 0, kind=kind, type="completion")
+
+
+def _chat(prompt: str, temperature: float, kind: str, json_mode: bool = False) -> str:
+    """Appel synchrone au LLM, chronométré (étape llm.<kind>) et compté."""
+    extra = {"response_format": {"type": "json_object"}} if json_mode else {}
     try:
-        response = client.chat.completions.create(
-            model="llama3",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.0,
-        )
-        raw = response.choices[0].message.content
-        return [s.strip() for s in raw.split(",") if s.strip()]
-    except Exception as e:
-        print(f"Erreur Ollama Skills: {e}")
-        return []
+        with timer(f"llm.{kind}"):
+            response = get_client().chat.completions.create(
+                model=LLM_MODEL,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=temperature,
+                **extra,
+            )
+    except Exception:
+        LLM_CALLS.inc(kind=kind, status="error")
+        raise
+    LLM_CALLS.inc(kind=kind, status="ok")
+    _record_usage(kind, response)
+    return response.choices[0].message.content
 
-def generate_summary(profile_text: str) -> str:
-    prompt = f"Résume ce profil en deux phrases orientées recrutement / HR :\n----\n{profile_text}\n----"
+
+async def _chat_async(prompt: str, temperature: float, kind: str, json_mode: bool = False) -> str:
+    extra = {"response_format": {"type": "json_object"}} if json_mode else {}
+    semaphore = get_llm_semaphore()
+    # Attente d'un créneau (LLM_CONCURRENCY) mesurée à part de la génération
+    with timer("llm.queue"):
+        await semaphore.acquire()
     try:
-        response = client.chat.completions.create(
-            model="llama3",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.3,
-        )
-        return response.choices[0].message.content.strip()
-    except Exception as e:
-        print(f"Erreur Ollama Summary: {e}")
-        return "Résumé non disponible."
+        with timer(f"llm.{kind}"):
+            response = await get_async_client().chat.completions.create(
+                model=LLM_MODEL,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=temperature,
+                **extra,
+            )
+    except Exception:
+        LLM_CALLS.inc(kind=kind, status="error")
+        raise
+    finally:
+        semaphore.release()
+    LLM_CALLS.inc(kind=kind, status="ok")
+    _record_usage(kind, response)
+    return response.choices[0].message.content
+
+
+def _skills_prompt(text: str) -> str:
+    return f"Liste les 6 compétences techniques principales présentes dans ce texte (séparées par des virgules) :\n----\n{text}\n----"
+
 
-def score_with_context(profile_info: dict, job_description: str) -> float:
+def _summary_prompt(profile_text: str) -> str:
+    return f"Résume ce profil en deux phrases orientées recrutement / HR :\n----\n{profile_text}\n----"
+
+
+def _score_prompt(profile_info: dict, job_description: str) -> str:
     combined = (
         f"Profil skills: {profile_info.get('skills')}\n"
         f"Texte brut: {profile_info.get('raw_text')}\n"
         f"Job description: {job_description}"
     )
-    prompt = f"Sur une échelle de 0.0 à 1.0, donne un score de pertinence (seulement le nombre) entre ce profil et ce job :\n----\n{combined}\n----"
+    return f"Sur une échelle de 0.0 à 1.0, donne un score de pertinence (seulement le nombre) entre ce profil et ce job :\n----\n{combined}\n----"
+
+
+def _analysis_prompt(profile_text: str, job_description: str) -> str:
+    return (
+        "Analyse ce profil pour ce job et réponds UNIQUEMENT avec un objet JSON de la forme :\n"
+        '{"skills": ["...", "..."], "summary": "...", "score": 0.0}\n'
+        "- skills : les 6 compétences techniques principales du profil\n"
+        "- summary : résumé du profil en deux phrases orientées recrutement / HR\n"
+        "- score : pertinence entre le profil et le job, de 0.0 à 1.0\n"
+        f"Profil :\n----\n{profile_text}\n----\n"
+        f"Job description :\n----\n{job_description}\n----"
+    )
+
+
+_SCORE_RE = re.compile(r"(\d+(?:[.,]\d+)?)\s*(%|/\s*(\d+(?:[.,]\d+)?))?")
+
+
+def parse_score(raw) -> float | None:
+    """
+    Score de pertinence entre 0.0 et 1.0 à partir de la réponse du LLM :
+    nombre seul, entouré de texte ("Score : 0.8."), en pourcentage ("80%")
+    ou en fraction ("8/10"). None si aucun score valide n'est trouvé.
+    """
+    if isinstance(raw, (int, float)) and not isinstance(raw, bool):
+        score = float(raw)
+        return score if 0.0 <= score <= 1.0 else None
+
+    match = _SCORE_RE.search(str(raw or ""))
+    if not match:
+        return None
+    score = float(match.group(1).replace(",", "."))
+    if match.group(2) == "%":
+        score /= 100
+    elif match.group(3):
+        denominator = float(match.group(3).replace(",", "."))
+        score = score / denominator if denominator else -1.0
+    return score if 0.0 <= score <= 1.0 else None
+
+
+def parse_analysis(raw: str) -> dict:
+    """
+    Extrait {"ai_skills", "ai_summary", "agent_score"} de la réponse JSON du LLM.
+    Tolère du texte autour du JSON ; seuls les champs valides sont retournés
+    (les champs manquants seront recalculés par les appels séparés).
+    """
+    match = re.search(r"\{.*\}", raw or "", re.DOTALL)
+    if not match:
+        return {}
     try:
-        response = client.chat.completions.create(
-            model="llama3",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.0,
-        )
-        return float(response.choices[0].message.content.strip())
-    except:
-        return 0.0
\ No newline at end of file
+        data = json.loads(match.group(0))
+    except ValueError:
+        return {}
+    if not isinstance(data, dict):
+        return {}
+
+    parsed = {}
+
+    skills = data.get("skills")
+    if isinstance(skills, str):
+        skills = skills.split(",")
+    if isinstance(skills, list):
+        skills = [str(s).strip() for s in skills if str(s).strip()]
+        if skills:
+            parsed["ai_skills"] = skills
+
+    summary = data.get("summary")
+    if isinstance(summary, str) and summary.strip():
+        parsed["ai_summary"] = summary.strip()
+
+    score = parse_score(data.get("score"))
+    if score is not None:
+        parsed["agent_score"] = score
+
+    return parsed
+
+
+# --- Appels LLM : prompt, clé du cache et lecture de la réponse décrits une seule fois ---
+# Les versions synchrone (_run) et asynchrone (_run_async) ne diffèrent que par le
+# transport (_chat / _chat_async).
+
+@dataclass(frozen=True)
+class _LLMCall:
+    kind: str  # étape (métriques, cache, PROMPT_VERSIONS)
+    key: str  # clé du cache
+    prompt: str
+    temperature: float
+    parse: Callable[[str], Any] | None = None  # réponse brute -> valeur (None : illisible)
+    default: Any = None  # valeur retournée si le LLM échoue
+    label: str = ""  # nom de l'étape dans les messages d'erreur
+    json_mode: bool = False
+
+
+def _parse_skills(raw: str) -> list[str]:
+    return [s.strip() for s in (raw or "").split(",") if s.strip()]
+
+
+def _parse_summary(raw: str) -> str:
+    return (raw or "").strip()
+
+
+def _parse_score_response(raw: str) -> float | None:
+    score = parse_score(raw)
+    if score is None:
+        print(f"[ATTENTION] Score LLM illisible : {raw!r}")
+        LLM_INVALID_SCORES.inc()
+    return score
+
+
+def _skills_call(text: str) -> _LLMCall:
+    return _LLMCall(
+        "skills", _cache_key("skills", text), _skills_prompt(text), 0.0,
+        parse=_parse_skills, default=[], label="Skills",
+    )
+
+
+def _summary_call(profile_text: str) -> _LLMCall:
+    return _LLMCall(
+        "summary", _cache_key("summary", profile_text), _summary_prompt(profile_text), 0.3,
+        parse=_parse_summary, default="Résumé non disponible.", label="Summary",
+    )
+
+
+def _score_call(profile_info: dict, job_description: str) -> _LLMCall:
+    return _LLMCall(
+        "score",
+        _cache_key("score", _profile_info_text(profile_info), job_description),
+        _score_prompt(profile_info, job_description),
+        0.0,
+        parse=_parse_score_response,
+        default=None,
+        label="Score",
+    )
+
+
+def _analysis_call(key: str, profile_text: str, job_description: str) -> _LLMCall:
+    return _LLMCall(
+        "analysis", key, _analysis_prompt(profile_text, job_description), 0.0,
+        parse=parse_analysis, default={}, label="Analyse", json_mode=True,
+    )
+
+
+def _call_failed(call: _LLMCall, error: Exception):
+    print(f"Erreur Ollama {call.label}: {error}")
+    return call.default
+
+
+def _call_done(call: _LLMCall, raw: str):
+    """Lit la réponse et la met en cache si elle est valide."""
+    value = call.parse(raw)
+    if value is None:
+        return call.default
+    _cache_set(call.kind, call.key, value)
+    return value
+
+
+def _run(call: _LLMCall):
+    cached = _cache_get(call.kind, call.key)
+    if cached is not None:
+        return cached
+    try:
+        raw = _chat(call.prompt, call.temperature, call.kind, call.json_mode)
+    except Exception as e:
+        return _call_failed(call, e)
+    return _call_done(call, raw)
+
+
+async def _run_async(call: _LLMCall):
+    cached = _cache_get(call.kind, call.key)
+    if cached is not None:
+        return cached
+    try:
+        raw = await _chat_async(call.prompt, call.temperature, call.kind, call.json_mode)
+    except Exception as e:
+        return _call_failed(call, e)
+    return _call_done(call, raw)
+
+
+def _cached_analysis(profile_text: str, job_description: str) -> tuple[str, dict]:
+    """
+    Clé et résultat déjà connu pour le mode "combined" : analyse complète en cache,
+    sinon compétences / résumé du profil en cache (réutilisables pour tout job).
+    """
+    key = _cache_key("analysis", profile_text, job_description)
+    cached = _cache_get("analysis", key)
+    if cached is not None:
+        return key, cached
+
+    result = {}
+    skills = _cache_get("skills", _cache_key("skills", profile_text))
+    summary = _cache_get("summary", _cache_key("summary", profile_text))
+    if skills is not None:
+        result["ai_skills"] = skills
+    if summary is not None:
+        result["ai_summary"] = summary
+    return key, result
+
+
+def _store_analysis(key: str, profile_text: str, parsed: dict):
+    """Mémorise l'analyse complète, et ses compétences / résumé au niveau du profil."""
+    if len(parsed) == 3:
+        _cache_set("analysis", key, parsed)
+    if "ai_skills" in parsed:
+        _cache_set("skills", _cache_key("skills", profile_text), parsed["ai_skills"])
+    if "ai_summary" in parsed:
+        _cache_set("summary", _cache_key("summary", profile_text), parsed["ai_summary"])
+
+
+def _analysis_done(call: _LLMCall, profile_text: str, result: dict, raw: str) -> dict:
+    """Fusionne la réponse de l'analyse avec ce qui était déjà en cache."""
+    parsed = call.parse(raw)
+    _store_analysis(call.key, profile_text, parsed)
+    return {**parsed, **result}
+
+
+def _score_info(result: dict, profile_text: str) -> dict:
+    return {"skills": result["ai_skills"], "raw_text": profile_text}
+
+
+def extract_skills(text: str) -> list[str]:
+    return _run(_skills_call(text))
+
+def generate_summary(profile_text: str) -> str:
+    return _run(_summary_call(profile_text))
+
+def score_with_context(profile_info: dict, job_description: str) -> float | None:
+    """Score LLM de 0.0 à 1.0, ou None si le LLM échoue ou répond un score illisible."""
+    return _run(_score_call(profile_info, job_description))
+
+
+def analyze_profile(profile_text: str, job_description: str) -> dict:
+    """
+    Mode "combined" : compétences, résumé et score en un seul appel (JSON).
+    Les champs absents ou invalides sont recalculés par les appels séparés.
+    Si compétences et résumé du profil sont déjà en cache, seul le score est demandé.
+    """
+    key, result = _cached_analysis(profile_text, job_description)
+    if len(result) == 3:
+        return result
+
+    if len(result) < 2:
+        call = _analysis_call(key, profile_text, job_description)
+        try:
+            raw = _chat(call.prompt, call.temperature, call.kind, call.json_mode)
+            result = _analysis_done(call, profile_text, result, raw)
+        except Exception as e:
+            _call_failed(call, e)
+
+    if "ai_skills" not in result:
+        result["ai_skills"] = extract_skills(profile_text)
+    if "ai_summary" not in result:
+        result["ai_summary"] = generate_summary(profile_text)
+    if "agent_score" not in result:
+        result["agent_score"] = score_with_context(_score_info(result, profile_text), job_description)
+    return result
+
+
+# --- Versions asynchrones (même comportement, appels concurrents) ---
+
+async def extract_skills_async(text: str) -> list[str]:
+    return await _run_async(_skills_call(text))
+
+async def generate_summary_async(profile_text: str) -> str:
+    return await _run_async(_summary_call(profile_text))
+
+async def score_with_context_async(profile_info: dict, job_description: str) -> float | None:
+    return await _run_async(_score_call(profile_info, job_description))
+
+async def enrich_profile_async(profile_text: str, job_description: str) -> dict:
+    """
+    Compétences et résumé en parallèle, puis score (qui dépend des compétences).
+    Retourne {"ai_skills", "ai_summary", "agent_score"} (agent_score None si le score a échoué).
+    """
+    skills, summary = await asyncio.gather(
+        extract_skills_async(profile_text),
+        generate_summary_async(profile_text),
+    )
+    score = await score_with_context_async(
+        {"skills": skills, "raw_text": profile_text}, job_description
+    )
+    return {"ai_skills": skills, "ai_summary": summary, "agent_score": score}
+
+async def analyze_profile_async(profile_text: str, job_description: str) -> dict:
+    """Version asynchrone de analyze_profile (un appel, repli sur les appels séparés)."""
+    key, result = _cached_analysis(profile_text, job_description)
+    if len(result) == 3:
+        return result
+
+    if len(result) < 2:
+        call = _analysis_call(key, profile_text, job_description)
+        try:
+            raw = await _chat_async(call.prompt, call.temperature, call.kind, call.json_mode)
+            result = _analysis_done(call, profile_text, result, raw)
+        except Exception as e:
+            _call_failed(call, e)
+
+    fallbacks = {"ai_skills": extract_skills_async, "ai_summary": generate_summary_async}
+    missing = [f for f in fallbacks if f not in result]
+    if missing:
+        values = await asyncio.gather(*(fallbacks[f](profile_text) for f in missing))
+        result.update(zip(missing, values))
+    if "agent_score" not in result:
+        result["agent_score"] = await score_with_context_async(_score_info(result, profile_text), job_description)
+    return result
+
+async def enrich_candidate_async(profile_text: str, job_description: str, mode: str = LLM_MODE) -> dict:
+    """Enrichissement d'un candidat selon le mode : "combined" (1 appel) ou "separate" (3 appels)."""
+    if mode not in LLM_MODES:
+        raise ValueError(f"Mode LLM inconnu : {mode} (attendu : {LLM_MODES})")
+    if mode == "combined":
+        return await analyze_profile_async(profile_text, job_description)
+    return await enrich_profile_async(profile_text, job_description)
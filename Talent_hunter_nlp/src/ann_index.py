@@ -0,0 +1,258 @@
+# index de plus proches voisins (exact ou FAISS)
+"""
+ann_index.py
+Couche d'index pour la recherche de profils par similarité cosinus.
+
+- ExactIndex : produit scalaire brute-force (référence, toujours disponible)
+- FaissIndex : index approximatif FAISS (IVF ou HNSW) ou exact (flat)
+
+Les embeddings sont normalisés, donc produit scalaire = similarité cosinus.
+"""
+
+import os
+import numpy as np
+
+from .embedding_store import EmbeddingStore
+
+try:
+    import faiss
+except ImportError:  # faiss-cpu est optionnel : on retombe sur la recherche exacte
+    faiss = None
+
+INDEX_TYPES = ("flat", "ivf", "hnsw")
+
+
+def faiss_available() -> bool:
+    return faiss is not None
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Indices des k meilleurs scores, triés par score décroissant.
+    Sélection partielle (argpartition) puis tri des k gagnants seulement.
+    """
+    n = scores.shape[0]
+    k = min(k, n)
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+
+    if k < n:
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(n)
+
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+def top_k_rows(scores: np.ndarray, k: int):
+    """
+    Version vectorisée de top_k_indices sur une matrice (Q, N) : top-k de chaque ligne.
+    Retourne (scores, ids) de forme (Q, k), triés par score décroissant.
+    """
+    n = scores.shape[1]
+    k = min(k, n)
+    if k < n:
+        candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        candidates = np.broadcast_to(np.arange(n), scores.shape)
+
+    candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+    order = np.argsort(-candidate_scores, axis=1, kind="stable")
+    return (
+        np.take_along_axis(candidate_scores, order, axis=1),
+        np.take_along_axis(candidates, order, axis=1),
+    )
+
+
+class ExactIndex:
+    """Recherche exacte : produit scalaire sur toute la matrice d'embeddings."""
+
+    kind = "exact"
+
+    # Nombre de requêtes scorées ensemble : borne la matrice (bloc, N) en mémoire
+    query_block_size = 256
+
+    def __init__(self, embeddings: "np.ndarray | EmbeddingStore"):
+        if not isinstance(embeddings, EmbeddingStore):
+            embeddings = EmbeddingStore(np.asarray(embeddings, dtype=np.float32))
+        self.store = embeddings
+
+    def __len__(self):
+        return len(self.store)
+
+    def search(self, query_embs: np.ndarray, k: int, mask: np.ndarray | None = None):
+        """
+        Même convention que FAISS : retourne (scores, ids) de forme (Q, k),
+        complétés par -inf / -1 s'il y a moins de k profils.
+        mask : masque booléen (N,) des profils autorisés, optionnel.
+        """
+        query_embs = np.atleast_2d(np.asarray(query_embs, dtype=np.float32))
+        k = max(int(k), 0)  # top_k <= 0 : résultats vides
+        n_valid = len(self.store) if mask is None else int(mask.sum())
+        k_valid = min(k, n_valid)
+
+        scores = np.full((len(query_embs), k), -np.inf, dtype=np.float32)
+        ids = np.full((len(query_embs), k), -1, dtype=np.int64)
+        if k_valid <= 0:
+            return scores, ids
+
+        rows = None
+        if mask is not None and n_valid < len(mask) // 2:
+            # Filtre sélectif : on ne calcule le produit scalaire que sur le sous-ensemble
+            rows = np.flatnonzero(mask)
+
+        for start in range(0, len(query_embs), self.query_block_size):
+            stop = start + self.query_block_size
+            block = self.store.dot(query_embs[start:stop], rows)  # (bloc, N) : produit matrice-matrice
+            if mask is not None and rows is None:
+                block[:, ~mask] = -np.inf
+
+            block_scores, block_ids = top_k_rows(block, k_valid)
+            scores[start:stop, :k_valid] = block_scores
+            ids[start:stop, :k_valid] = block_ids if rows is None else rows[block_ids]
+
+        return scores, ids
+
+
+class FaissIndex:
+    """Enveloppe autour d'un index FAISS (produit scalaire)."""
+
+    def __init__(self, index, nprobe: int | None = None, ef_search: int | None = None):
+        self.index = index
+        self.kind = _index_kind(index)
+        self.set_search_params(nprobe=nprobe, ef_search=ef_search)
+
+    def __len__(self):
+        return self.index.ntotal
+
+    def set_search_params(self, nprobe: int | None = None, ef_search: int | None = None):
+        """Compromis vitesse / rappel : nprobe (IVF) et efSearch (HNSW)."""
+        ivf = faiss.try_extract_index_ivf(self.index)
+        if ivf is not None and nprobe:
+            ivf.nprobe = min(int(nprobe), ivf.nlist)
+        if hasattr(self.index, "hnsw") and ef_search:
+            self.index.hnsw.efSearch = int(ef_search)
+
+    def _filtered_params(self, bitmap: np.ndarray):
+        """Paramètres de recherche restreints aux ids du bitset (ordre de bits "little")."""
+        sel = faiss.IDSelectorBitmap(bitmap)
+        if self.kind == "ivf":
+            ivf = faiss.try_extract_index_ivf(self.index)
+            return faiss.SearchParametersIVF(sel=sel, nprobe=ivf.nprobe)
+        if self.kind == "hnsw":
+            return faiss.SearchParametersHNSW(sel=sel, efSearch=self.index.hnsw.efSearch)
+        return faiss.SearchParameters(sel=sel)
+
+    def search(self, query_embs: np.ndarray, k: int, bitmap: np.ndarray | None = None):
+        """bitmap : bitset empaqueté (FilterIndex.bitmap) des profils autorisés, optionnel."""
+        query_embs = np.ascontiguousarray(np.atleast_2d(query_embs), dtype=np.float32)
+        if k <= 0:
+            # FAISS exige k > 0 : même convention vide que ExactIndex
+            return np.empty((len(query_embs), 0), dtype=np.float32), np.empty((len(query_embs), 0), dtype=np.int64)
+        if bitmap is None:
+            return self.index.search(query_embs, k)
+        return self.index.search(query_embs, k, params=self._filtered_params(bitmap))
+
+
+def _index_kind(index) -> str:
+    if faiss.try_extract_index_ivf(index) is not None:
+        return "ivf"
+    if hasattr(index, "hnsw"):
+        return "hnsw"
+    return "flat"
+
+
+def _require_faiss():
+    if faiss is None:
+        raise ImportError("faiss n'est pas installé (pip install faiss-cpu).")
+
+
+def default_nlist(n: int) -> int:
+    """Nombre de listes IVF : ~4 * sqrt(N), borné pour garder >= 39 points par liste."""
+    return int(max(1, min(4 * np.sqrt(n), n // 39)))
+
+
+def build_index(
+    embeddings: np.ndarray,
+    index_type: str = "hnsw",
+    nlist: int | None = None,
+    hnsw_m: int = 32,
+    ef_construction: int = 200,
+) -> FaissIndex:
+    """Construit un index FAISS en produit scalaire sur des embeddings normalisés."""
+    _require_faiss()
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Type d'index inconnu : {index_type} (attendu : {INDEX_TYPES})")
+
+    x = np.ascontiguousarray(embeddings, dtype=np.float32)
+    n, d = x.shape
+
+    if index_type == "flat":
+        index = faiss.IndexFlatIP(d)
+
+    elif index_type == "ivf":
+        nlist = nlist or default_nlist(n)
+        quantizer = faiss.IndexFlatIP(d)
+        index = faiss.IndexIVFFlat(quantizer, d, nlist, faiss.METRIC_INNER_PRODUCT)
+
+        # Entraînement du k-means sur un échantillon (suffisant et beaucoup plus rapide)
+        max_train = 256 * nlist
+        if n > max_train:
+            rng = np.random.default_rng(0)
+            train = x[np.sort(rng.choice(n, size=max_train, replace=False))]
+        else:
+            train = x
+        index.train(train)
+
+    else:  # hnsw
+        index = faiss.IndexHNSWFlat(d, hnsw_m, faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = ef_construction
+
+    index.add(x)
+    return FaissIndex(index)
+
+
+def save_index(index: FaissIndex, path: str):
+    """Écriture atomique : fichier temporaire puis renommage."""
+    _require_faiss()
+    tmp_path = path + ".tmp"
+    faiss.write_index(index.index, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def load_index(
+    path: str,
+    nprobe: int | None = None,
+    ef_search: int | None = None,
+    mmap: bool = False,
+):
+    """
+    Charge l'index FAISS, ou retourne None si faiss ou le fichier est absent.
+    mmap : vecteurs de l'index mappés en mémoire (partagés entre workers) si FAISS le permet.
+    """
+    if faiss is None or not os.path.exists(path):
+        return None
+
+    index = None
+    if mmap:
+        flags = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP) | faiss.IO_FLAG_READ_ONLY
+        try:
+            index = faiss.read_index(path, flags)
+        except RuntimeError as e:
+            print(f"[INFO] Index ANN non mappable en mémoire ({e}), lecture complète.")
+    if index is None:
+        index = faiss.read_index(path)
+    return FaissIndex(index, nprobe=nprobe, ef_search=ef_search)
+
+
+def recall_at_k(index, reference: ExactIndex, queries: np.ndarray, k: int = 10) -> float:
+    """Rappel@k moyen de l'index par rapport à la recherche exacte de référence."""
+    _, approx_ids = index.search(queries, k)
+    _, exact_ids = reference.search(queries, k)
+
+    recalls = []
+    for approx, exact in zip(approx_ids, exact_ids):
+        exact = set(exact[exact >= 0].tolist())
+        if exact:
+            recalls.append(len(exact & set(approx.tolist())) / len(exact))
+    return float(np.mean(recalls)) if recalls else 1.0
@@ -0,0 +1,159 @@
+# artefacts colonnes (Parquet / Arrow) échangés entre les étapes
+"""
+artifacts.py
+Format des fichiers intermédiaires (profils enrichis, index des profils) :
+
+- Parquet avec un schéma typé : entiers pour les compteurs, chaînes pour les textes,
+  chaînes encodées en dictionnaire pour les colonnes très répétitives
+  (company, location, languages_list)
+- métadonnées de version : un artefact produit par une version plus récente
+  du schéma, ou d'un autre type, est refusé au lieu d'être mal interprété
+- projection de colonnes à la lecture (seules les colonnes demandées sont décodées)
+
+Les colonnes absentes du schéma sont conservées avec le type déduit par Arrow.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+ARTIFACT_VERSION = 1
+
+_VERSION_KEY = b"talent_hunter.artifact_version"
+_KIND_KEY = b"talent_hunter.artifact_kind"
+
+_DICT = pa.dictionary(pa.int32(), pa.string())
+
+COLUMN_TYPES = {
+    "login": pa.string(),
+    "name": pa.string(),
+    "company": _DICT,
+    "location": _DICT,
+    "bio": pa.string(),
+    "followers": pa.int64(),
+    "public_repos": pa.int64(),
+    "public_gists": pa.int64(),
+    "repos_descriptions": pa.string(),
+    "languages_list": _DICT,
+    "total_stars": pa.int64(),
+    "nb_repos_fetched": pa.int64(),
+    "profile_text": pa.string(),
+}
+
+# Colonnes de l'index des profils (écrit par embedding.py, lu par TalentSearcher)
+PROFILE_INDEX_COLUMNS = [
+    "login", "name", "company", "location", "total_stars", "nb_repos_fetched", "languages_list",
+]
+
+# Colonnes texte à lire en str quand on repart d'un CSV (pas d'inférence de type)
+TEXT_COLUMNS = [c for c, t in COLUMN_TYPES.items() if t in (pa.string(), _DICT)]
+
+
+def _to_arrow(series: pd.Series, arrow_type):
+    if arrow_type == pa.int64():
+        values = pd.to_numeric(series, errors="coerce")
+        return pa.array(values, from_pandas=True).cast(pa.int64(), safe=False)
+
+    # Texte : valeurs manquantes -> null, le reste converti en str
+    missing = series.isna().to_numpy()
+    values = np.where(missing, None, series.astype(str).to_numpy(dtype=object))
+    array = pa.array(values, type=pa.string())
+    return array.dictionary_encode() if arrow_type == _DICT else array
+
+
+def to_table(df: pd.DataFrame, kind: str) -> pa.Table:
+    """DataFrame -> table Arrow typée, avec les métadonnées (version, type d'artefact)."""
+    arrays, names = [], []
+    for col in df.columns:
+        arrow_type = COLUMN_TYPES.get(col)
+        if arrow_type is None:
+            arrays.append(pa.array(df[col], from_pandas=True))
+        else:
+            arrays.append(_to_arrow(df[col], arrow_type))
+        names.append(str(col))
+
+    table = pa.Table.from_arrays(arrays, names=names)
+    return table.replace_schema_metadata({
+        _VERSION_KEY: str(ARTIFACT_VERSION).encode(),
+        _KIND_KEY: kind.encode(),
+    })
+
+
+def write_artifact(df: pd.DataFrame, path: str, kind: str):
+    """Écrit df en Parquet (écriture atomique)."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    pq.write_table(to_table(df, kind), tmp_path)
+    os.replace(tmp_path, path)
+
+
+def write_artifact_from_csv(csv_path: str, path: str, kind: str, chunk_size: int = 200_000):
+    """Convertit un CSV en artefact Parquet morceau par morceau (mémoire bornée)."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    writer = None
+    try:
+        # Chaînes lues telles quelles ("" reste "") ; les entiers vides deviennent null
+        for chunk in pd.read_csv(
+            csv_path,
+            chunksize=chunk_size,
+            dtype={c: str for c in TEXT_COLUMNS},
+            keep_default_na=False,
+        ):
+            table = to_table(chunk, kind)
+            if writer is None:
+                writer = pq.ParquetWriter(tmp_path, table.schema)
+            writer.write_table(table.cast(writer.schema))
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is None:
+        raise ValueError(f"CSV vide : {csv_path}")
+    os.replace(tmp_path, path)
+
+
+def check_metadata(path: str, schema: pa.Schema, kind: str | None = None):
+    metadata = schema.metadata or {}
+    if _VERSION_KEY not in metadata:
+        raise ValueError(f"{path} n'est pas un artefact Talent Hunter (métadonnées absentes).")
+
+    version = int(metadata[_VERSION_KEY])
+    if version > ARTIFACT_VERSION:
+        raise ValueError(
+            f"{path} : artefact en version {version}, ce code ne lit que jusqu'à la version {ARTIFACT_VERSION}."
+        )
+    found_kind = metadata.get(_KIND_KEY, b"").decode()
+    if kind is not None and found_kind != kind:
+        raise ValueError(f"{path} : artefact de type '{found_kind}', attendu '{kind}'.")
+
+
+def read_artifact(path: str, columns: list[str] | None = None, kind: str | None = None) -> pd.DataFrame:
+    """
+    Lit un artefact Parquet. columns : projection (les colonnes absentes du fichier
+    sont ignorées). Les colonnes encodées en dictionnaire deviennent des catégories pandas.
+    """
+    schema = pq.read_schema(path)
+    check_metadata(path, schema, kind)
+
+    if columns is not None:
+        columns = [c for c in columns if c in schema.names]
+    return pq.read_table(path, columns=columns).to_pandas()
+
+
+def read_artifact_or_csv(
+    path: str,
+    csv_path: str,
+    columns: list[str] | None = None,
+    kind: str | None = None,
+) -> pd.DataFrame:
+    """Artefact Parquet s'il existe, sinon repli sur la copie CSV (runs plus anciens)."""
+    if os.path.exists(path):
+        return read_artifact(path, columns=columns, kind=kind)
+
+    print(f"[INFO] {path} absent, lecture du CSV : {csv_path}")
+    if columns is None:
+        return pd.read_csv(csv_path)
+    return pd.read_csv(csv_path, usecols=lambda c: c in set(columns))
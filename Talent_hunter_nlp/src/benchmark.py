@@ -0,0 +1,496 @@
+# benchmarks du pipeline sur des corpus synthétiques
+"""
+benchmark.py
+Mesure les étapes du pipeline sur des corpus synthétiques de 10k, 100k ou 1M utilisateurs :
+
+- génération de github_users.csv / github_repos.csv (réutilisés d'un run à l'autre)
+- build_profiles.main
+- embedding.main (encodeur "hash" par défaut : pas de modèle à télécharger,
+  mêmes dimensions que MiniLM, donc mêmes coûts de stockage et d'index)
+- TalentSearcher.__init__, puis latences de TalentSearcher.search (p50 / p90 / p99)
+  pour chaque mode de recherche et plusieurs combinaisons de filtres
+
+Chaque étape tourne dans un processus neuf : le pic de mémoire (RSS) mesuré est
+celui de l'étape seule. Les résultats sont écrits en JSON (commit git compris),
+et compare() signale les régressions entre deux fichiers.
+
+    python -m src.benchmark
+    python -c "from src.benchmark import main; main(scales=['1m'])"
+    python -c "from src.benchmark import compare; compare('avant.json', 'apres.json')"
+"""
+
+import json
+import multiprocessing as mp
+import os
+import platform
+import queue
+import subprocess
+import sys
+import time
+import traceback
+
+import numpy as np
+import pandas as pd
+
+# Lancé comme script (python src/benchmark.py) : imports relatifs résolus via le paquet src
+if __package__ in (None, ""):
+    import sys
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    __package__ = "src"
+
+from .config import ANN_INDEX_TYPE, BASE_DIR, BENCHMARK_DIR
+
+try:
+    import resource
+except ImportError:  # pas de getrusage sous Windows : pics de mémoire non mesurés
+    resource = None
+
+SCALES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+STAGES = ("build_profiles", "embedding", "search")
+
+# Version du générateur : un corpus généré par une autre version est régénéré
+CORPUS_VERSION = 1
+
+TECH_TERMS = [
+    "python", "pytorch", "tensorflow", "kubernetes", "docker", "rust", "golang", "react",
+    "node.js", "c++", "django", "flask", "fastapi", "spark", "kafka", "postgres", "redis",
+    "aws", "terraform", "graphql", "nlp", "llm", "cuda", "vue.js", "typescript", "android",
+    "ios", "swift", "scala", "haskell", "elixir", "airflow", "pandas", "numpy", "opencv",
+    "transformers", "langchain", "grpc", "webassembly", "linux",
+]
+GENERIC_TERMS = [
+    "api", "engine", "library", "tool", "service", "app", "bot", "cli", "framework",
+    "dashboard", "parser", "scraper", "pipeline", "model", "server", "client", "plugin",
+    "demo", "game", "website", "toolkit", "sdk", "benchmark", "tutorial", "dataset",
+]
+LANGUAGES = [
+    "Python", "JavaScript", "TypeScript", "Java", "Go", "Rust", "C++", "C", "C#", "Ruby",
+    "PHP", "Kotlin", "Swift", "Jupyter Notebook", "Shell", "Scala", "",
+]
+LOCATIONS = [
+    "Paris", "Tunis", "Berlin", "London", "San Francisco", "Bangalore", "Toronto",
+    "Remote", "Lyon", "Sfax", "New York", "Tokyo", "",
+]
+
+# Combinaisons de filtres mesurées pour search (None = pas de filtre)
+FILTER_CASES = {
+    "none": {},
+    "min_stars": {"min_stars": 200},
+    "language": {"language_filter": "rust"},
+    "languages_all": {"language_filter": ["python", "go"], "language_mode": "all"},
+    "stars_language": {"min_stars": 50, "language_filter": "python"},
+}
+
+
+# --- Corpus synthétique ---
+
+def _zipf_choice(rng, values: list[str], size) -> np.ndarray:
+    """Tirage avec une fréquence en 1 / rang (quelques termes très fréquents, longue traîne)."""
+    p = 1.0 / np.arange(1, len(values) + 1)
+    return np.asarray(values, dtype=object)[rng.choice(len(values), size=size, p=p / p.sum())]
+
+
+def _words(rng, n: int, n_words: int) -> pd.Series:
+    """n textes de n_words mots (termes techniques et génériques mélangés)."""
+    vocab = TECH_TERMS + GENERIC_TERMS
+    text = pd.Series(_zipf_choice(rng, vocab, n))
+    for _ in range(n_words - 1):
+        text = text + " " + _zipf_choice(rng, vocab, n)
+    return text
+
+
+def _users_block(rng, start: int, stop: int) -> pd.DataFrame:
+    n = stop - start
+    ids = pd.Series(np.arange(start, stop)).astype(str)
+    return pd.DataFrame({
+        "login": "user" + ids,
+        "name": np.where(rng.random(n) < 0.6, "Name " + ids, ""),
+        "company": np.where(rng.random(n) < 0.3, "Co" + pd.Series(rng.integers(0, 5000, n)).astype(str), ""),
+        "location": _zipf_choice(rng, LOCATIONS, n),
+        "bio": np.where(rng.random(n) < 0.5, "I build things with " + _words(rng, n, 3), ""),
+        "followers": rng.lognormal(3, 1.5, n).astype(np.int64),
+        "public_repos": rng.integers(0, 200, n),
+        "public_gists": rng.integers(0, 20, n),
+    })
+
+
+def _repos_block(rng, logins: pd.Series) -> pd.DataFrame:
+    # ~10 % d'utilisateurs sans repo (absents des profils), sinon ~5 repos
+    counts = np.where(rng.random(len(logins)) < 0.1, 0, np.clip(rng.poisson(5, len(logins)), 1, 30))
+    owners = pd.Series(np.repeat(logins.to_numpy(dtype=object), counts))
+    n = len(owners)
+    first = np.repeat(np.cumsum(counts) - counts, counts)
+    repo_names = "repo" + pd.Series(np.arange(n) - first).astype(str)
+    return pd.DataFrame({
+        "owner_login": owners,
+        "repo_name": repo_names,
+        "description": np.where(rng.random(n) < 0.15, "", _words(rng, n, 4)),
+        "language": _zipf_choice(rng, LANGUAGES, n),
+        "stargazers_count": np.floor(rng.lognormal(1.0, 1.8, n)).astype(np.int64),
+        "html_url": "https://github.com/" + owners + "/" + repo_names,
+    })
+
+
+def generate_corpus(base_dir: str, n_users: int, seed: int = 0, block_size: int = 100_000) -> dict:
+    """
+    Écrit base_dir/data/raw/github_users.csv et github_repos.csv (par blocs : mémoire bornée).
+    Un corpus déjà généré avec les mêmes paramètres est réutilisé.
+    """
+    raw_dir = os.path.join(base_dir, "data", "raw")
+    os.makedirs(raw_dir, exist_ok=True)
+    users_path = os.path.join(raw_dir, "github_users.csv")
+    repos_path = os.path.join(raw_dir, "github_repos.csv")
+    marker_path = os.path.join(raw_dir, "corpus.json")
+    params = {"version": CORPUS_VERSION, "n_users": n_users, "seed": seed}
+
+    if os.path.exists(marker_path):
+        with open(marker_path, encoding="utf-8") as f:
+            marker = json.load(f)
+        if marker.get("params") == params:
+            print(f"[INFO] Corpus synthétique réutilisé : {raw_dir}")
+            return {**marker["stats"], "reused": True}
+
+    print(f"[INFO] Génération d'un corpus synthétique de {n_users} utilisateurs : {raw_dir}")
+    start_time = time.perf_counter()
+    rng = np.random.default_rng(seed)
+    n_repos = 0
+    for start in range(0, n_users, block_size):
+        users = _users_block(rng, start, min(start + block_size, n_users))
+        repos = _repos_block(rng, users["login"])
+        mode = "w" if start == 0 else "a"
+        users.to_csv(users_path, mode=mode, header=start == 0, index=False, encoding="utf-8")
+        repos.to_csv(repos_path, mode=mode, header=start == 0, index=False, encoding="utf-8")
+        n_repos += len(repos)
+
+    stats = {
+        "n_users": n_users,
+        "n_repos": n_repos,
+        "seconds": time.perf_counter() - start_time,
+        "users_mb": os.path.getsize(users_path) / 2**20,
+        "repos_mb": os.path.getsize(repos_path) / 2**20,
+    }
+    with open(marker_path, "w", encoding="utf-8") as f:
+        json.dump({"params": params, "stats": stats}, f)
+    return {**stats, "reused": False}
+
+
+def generate_queries(n: int, seed: int = 0) -> list[str]:
+    """Descriptions de poste synthétiques (toutes différentes : le cache des requêtes ne sert pas)."""
+    rng = np.random.default_rng(seed + 1)
+    terms = _zipf_choice(rng, TECH_TERMS, (n, 3))
+    return [
+        f"We are looking for a {a} engineer with {b} and {c} experience (#{i})"
+        for i, (a, b, c) in enumerate(terms)
+    ]
+
+
+# --- Étapes (exécutées chacune dans un processus neuf) ---
+
+def _peak_rss_mb(who=None) -> float | None:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF if who is None else who).ru_maxrss
+    # Linux : kilo-octets ; macOS : octets
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+def _latency_stats(latencies: list[float]) -> dict:
+    ms = np.asarray(latencies) * 1000
+    p50, p90, p99 = np.percentile(ms, [50, 90, 99])
+    return {
+        "n": len(ms),
+        "mean_ms": float(ms.mean()),
+        "p50_ms": float(p50),
+        "p90_ms": float(p90),
+        "p99_ms": float(p99),
+        "max_ms": float(ms.max()),
+    }
+
+
+def _stage_build_profiles(base_dir: str, build_mode: str) -> dict:
+    from . import build_profiles
+
+    start = time.perf_counter()
+    build_profiles.main(mode=build_mode, base_dir=base_dir)
+    return {"seconds": time.perf_counter() - start, "mode": build_mode}
+
+
+def _stage_embedding(base_dir: str, encoder_backend: str, index_type: str | None, n_workers: int) -> dict:
+    from . import embedding
+
+    start = time.perf_counter()
+    embedding.main(
+        index_type=index_type,
+        incremental=False,
+        encoder_backend=encoder_backend,
+        n_workers=n_workers,
+        base_dir=base_dir,
+    )
+    return {
+        "seconds": time.perf_counter() - start,
+        "encoder_backend": encoder_backend,
+        "index_type": index_type,
+        "n_workers": n_workers,
+    }
+
+
+def _stage_search(
+    base_dir: str,
+    encoder_backend: str,
+    n_queries: int,
+    top_k: int,
+    search_modes: list[str],
+    seed: int,
+) -> dict:
+    from .matching import TalentSearcher
+
+    start = time.perf_counter()
+    searcher = TalentSearcher(
+        encoder_backend=encoder_backend,
+        query_cache_size=0,  # chaque requête passe par l'encodeur
+        query_cache_path=None,
+        base_dir=base_dir,
+    )
+    result = {
+        "init_seconds": time.perf_counter() - start,
+        "init_peak_rss_mb": _peak_rss_mb(),
+        "n_profiles": len(searcher.index_df),
+        "ann_index": searcher.ann_index.kind if searcher.ann_index is not None else None,
+        "modes": {},
+    }
+
+    queries = generate_queries(n_queries, seed)
+    for mode in search_modes:
+        if mode != "dense" and searcher.lexical_index is None:
+            print(f"[ATTENTION] Pas d'index BM25 : mode {mode} non mesuré.")
+            continue
+
+        cases = {}
+        for case, filters in FILTER_CASES.items():
+            for q in queries[:3]:  # échauffement
+                searcher.search(q, top_k=top_k, search_mode=mode, **filters)
+            latencies, n_results = [], 0
+            for q in queries:
+                t = time.perf_counter()
+                df = searcher.search(q, top_k=top_k, search_mode=mode, **filters)
+                latencies.append(time.perf_counter() - t)
+                n_results += len(df)
+            cases[case] = {**_latency_stats(latencies), "mean_results": n_results / len(queries)}
+
+        # Toutes les requêtes en un seul appel (encodage et produit matriciel batchés)
+        t = time.perf_counter()
+        searcher.search_many(queries, top_k=top_k, search_mode=mode)
+        cases["batch_none"] = {"ms_per_query": (time.perf_counter() - t) * 1000 / len(queries)}
+        result["modes"][mode] = cases
+        print(f"[INFO] search ({mode}) : p50 sans filtre {cases['none']['p50_ms']:.2f} ms")
+
+    return result
+
+
+_STAGE_FUNCTIONS = {
+    "build_profiles": _stage_build_profiles,
+    "embedding": _stage_embedding,
+    "search": _stage_search,
+}
+
+
+def _stage_process(name: str, kwargs: dict, results: mp.Queue):
+    try:
+        rss_start = _peak_rss_mb()
+        result = _STAGE_FUNCTIONS[name](**kwargs)
+        result["rss_start_mb"] = rss_start
+        result["peak_rss_mb"] = _peak_rss_mb()
+        if resource is not None:
+            # Workers éventuels (encodage multi-processus)
+            result["peak_rss_children_mb"] = _peak_rss_mb(resource.RUSAGE_CHILDREN)
+        results.put(result)
+    except Exception:
+        results.put({"error": traceback.format_exc()})
+
+
+def run_stage(name: str, **kwargs) -> dict:
+    """Lance une étape dans un processus neuf (spawn) et retourne ses mesures."""
+    ctx = mp.get_context("spawn")
+    results = ctx.Queue()
+    # Process et non Pool : l'étape doit pouvoir lancer ses propres workers
+    proc = ctx.Process(target=_stage_process, args=(name, kwargs, results))
+    proc.start()
+    while True:
+        try:
+            result = results.get(timeout=1.0)
+            break
+        except queue.Empty:
+            if not proc.is_alive():
+                result = {"error": f"processus terminé sans résultat (code {proc.exitcode})"}
+                break
+    proc.join()
+    if "error" in result:
+        print(f"[ERREUR] Étape {name} :\n{result['error']}")
+    return result
+
+
+# --- Résultats ---
+
+def _git_commit() -> dict:
+    def git(*args):
+        return subprocess.run(
+            ["git", *args], cwd=BASE_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+
+    try:
+        return {"commit": git("rev-parse", "HEAD"), "dirty": bool(git("status", "--porcelain", "--", "."))}
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": None, "dirty": None}
+
+
+def _write_json(path: str, data: dict):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def main(
+    scales=("10k", "100k"),
+    stages=STAGES,
+    build_mode: str = "vectorized",
+    encoder_backend: str = "hash",
+    index_type: str | None = ANN_INDEX_TYPE,
+    n_workers: int = 1,
+    n_queries: int = 200,
+    top_k: int = 10,
+    search_modes=("dense", "lexical", "hybrid"),
+    seed: int = 0,
+    workdir: str = BENCHMARK_DIR,
+    output_path: str | None = None,
+) -> dict:
+    """
+    scales : clés de SCALES ("10k", "100k", "1m") ou nombres d'utilisateurs.
+    Les corpus et leurs artefacts sont dans workdir/<échelle> ; les résultats dans
+    output_path (défaut : workdir/results/benchmark-<commit>-<date>.json).
+    Les étapes non demandées réutilisent les artefacts déjà présents.
+    """
+    unknown = [s for s in stages if s not in STAGES]
+    if unknown:
+        raise ValueError(f"Étape(s) inconnue(s) : {unknown} (attendu : {STAGES})")
+
+    git = _git_commit()
+    if output_path is None:
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        output_path = os.path.join(workdir, "results", f"benchmark-{(git['commit'] or 'nogit')[:10]}-{stamp}.json")
+
+    report = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "git": git,
+        "machine": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+        },
+        "params": {
+            "build_mode": build_mode,
+            "encoder_backend": encoder_backend,
+            "index_type": index_type,
+            "n_workers": n_workers,
+            "n_queries": n_queries,
+            "top_k": top_k,
+            "search_modes": list(search_modes),
+            "seed": seed,
+        },
+        "scales": {},
+    }
+
+    for scale in scales:
+        n_users = SCALES[scale] if scale in SCALES else int(scale)
+        scale = str(scale)
+        base_dir = os.path.join(workdir, scale)
+        print(f"\n=== Benchmark {scale} ({n_users} utilisateurs) ===")
+
+        scale_report = {"corpus": generate_corpus(base_dir, n_users, seed=seed), "stages": {}}
+        report["scales"][scale] = scale_report
+
+        stage_kwargs = {
+            "build_profiles": {"base_dir": base_dir, "build_mode": build_mode},
+            "embedding": {
+                "base_dir": base_dir,
+                "encoder_backend": encoder_backend,
+                "index_type": index_type,
+                "n_workers": n_workers,
+            },
+            "search": {
+                "base_dir": base_dir,
+                "encoder_backend": encoder_backend,
+                "n_queries": n_queries,
+                "top_k": top_k,
+                "search_modes": list(search_modes),
+                "seed": seed,
+            },
+        }
+        for stage in STAGES:
+            if stage not in stages:
+                continue
+            result = run_stage(stage, **stage_kwargs[stage])
+            scale_report["stages"][stage] = result
+            if "error" not in result:
+                seconds = result.get("seconds", result.get("init_seconds"))
+                print(f"[OK] {scale} / {stage} : {seconds:.2f}s, pic RSS {result['peak_rss_mb']:.0f} Mo")
+
+        # Écrit après chaque échelle : un crash à 1M garde les mesures des petites échelles
+        _write_json(output_path, report)
+
+    print(f"[OK] Résultats sauvegardés dans : {output_path}")
+    return report
+
+
+def _flatten(data, prefix: str = "") -> dict:
+    flat = {}
+    if isinstance(data, dict):
+        for key, value in data.items():
+            flat.update(_flatten(value, f"{prefix}{key}."))
+    elif isinstance(data, (int, float)) and not isinstance(data, bool):
+        flat[prefix[:-1]] = float(data)
+    return flat
+
+
+# Métriques comparées : plus petit = meilleur
+_COMPARED_SUFFIXES = ("seconds", "_ms", "_mb", "ms_per_query")
+
+
+def compare(old_path: str, new_path: str, threshold: float = 0.10) -> list[str]:
+    """
+    Compare deux fichiers de résultats (temps, latences, mémoire) et affiche les écarts.
+    Retourne les métriques en régression de plus de threshold (10 % par défaut).
+    """
+    with open(old_path, encoding="utf-8") as f:
+        old = json.load(f)
+    with open(new_path, encoding="utf-8") as f:
+        new = json.load(f)
+
+    print(f"Avant : {old['git'].get('commit')}  ({old['created_at']})")
+    print(f"Après : {new['git'].get('commit')}  ({new['created_at']})\n")
+
+    old_flat, new_flat = _flatten(old["scales"]), _flatten(new["scales"])
+    regressions = []
+    for key in sorted(old_flat.keys() & new_flat.keys()):
+        if not key.endswith(_COMPARED_SUFFIXES) or key.startswith(tuple(f"{s}.corpus" for s in old["scales"])):
+            continue
+        before, after = old_flat[key], new_flat[key]
+        change = (after - before) / before if before else 0.0
+        flag = ""
+        if change > threshold:
+            flag = "  [ATTENTION] régression"
+            regressions.append(key)
+        elif change < -threshold:
+            flag = "  amélioration"
+        print(f"{key:<60} {before:>12.2f} -> {after:>12.2f}  ({change:+.1%}){flag}")
+
+    print(f"\n[INFO] {len(regressions)} régression(s) au-delà de {threshold:.0%}.")
+    return regressions
+
+
+if __name__ == "__main__":
+    main()
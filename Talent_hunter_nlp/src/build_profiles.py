@@ -1,49 +1,61 @@
+import csv
+import heapq
 import os
+import shutil
+import tempfile
+
+import numpy as np
 import pandas as pd
 
+# Lancé comme script (python src/build_profiles.py) : imports relatifs résolus via le paquet src
+if __package__ in (None, ""):
+    import sys
 
-def get_base_dir():
-    return os.path.dirname(os.path.dirname(__file__))
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    __package__ = "src"
 
+from .artifacts import write_artifact, write_artifact_from_csv
+from .config import PROCESSED_DATA_PATH, WRITE_CSV_COPIES
 
-def main():
-    base_dir = get_base_dir()
+# Modes de construction (résultat identique, octet pour octet) :
+# - "rowwise"    : implémentation d'origine (apply ligne par ligne), gardée comme référence
+# - "vectorized" : opérations sur les colonnes + agrégations groupby
+# - "chunked"    : repos lus par morceaux et partitionnés par owner_login,
+#                  pour construire des dumps de plusieurs Go en mémoire bornée
+BUILD_MODES = ("rowwise", "vectorized", "chunked")
 
-    users_path = os.path.join(base_dir, "data", "raw", "github_users.csv")
-    repos_path = os.path.join(base_dir, "data", "raw", "github_repos.csv")
-    processed_dir = os.path.join(base_dir, "data", "processed")
-    os.makedirs(processed_dir, exist_ok=True)
+# On ne garde que les colonnes utiles côté users
+USERS_COLS = [
+    "login",
+    "name",
+    "company",
+    "location",
+    "bio",
+    "followers",
+    "public_repos",
+    "public_gists",
+]
 
-    print(f"[INFO] Lecture utilisateurs : {users_path}")
-    users_df = pd.read_csv(users_path)
+# Colonnes texte des repos, lues en str en mode chunked (pas d'inférence de type par morceau)
+REPOS_TEXT_COLS = ["owner_login", "repo_name", "description", "language", "html_url"]
 
-    print(f"[INFO] Lecture repos : {repos_path}")
-    repos_df = pd.read_csv(repos_path)
 
-    # --- Nettoyage basique ---
+def get_base_dir():
+    return os.path.dirname(os.path.dirname(__file__))
+
 
+def prepare_users(users_df):
     # On s'assure que les colonnes clés existent
     if "login" not in users_df.columns:
         raise ValueError("La colonne 'login' est absente de github_users.csv")
-    if "owner_login" not in repos_df.columns:
-        raise ValueError("La colonne 'owner_login' est absente de github_repos.csv")
 
-    # On ne garde que les colonnes utiles côté users
-    users_cols = [
-        "login",
-        "name",
-        "company",
-        "location",
-        "bio",
-        "followers",
-        "public_repos",
-        "public_gists",
-    ]
-    users_df = users_df[[c for c in users_cols if c in users_df.columns]].copy()
+    users_df = users_df[[c for c in USERS_COLS if c in users_df.columns]].copy()
+    return users_df.fillna("")
 
-    users_df = users_df.fillna("")
 
-    # --- Agrégation des repos par utilisateur ---
+def prepare_repos(repos_df):
+    if "owner_login" not in repos_df.columns:
+        raise ValueError("La colonne 'owner_login' est absente de github_repos.csv")
 
     # On remplace NaN par vide et 0
     repos_df["description"] = repos_df["description"].fillna("")
@@ -51,7 +63,13 @@ def main():
     repos_df["stargazers_count"] = pd.to_numeric(
         repos_df.get("stargazers_count", 0), errors="coerce"
     ).fillna(0)
+    return repos_df
+
 
+# --- Agrégation des repos par utilisateur ---
+
+def aggregate_repos_rowwise(repos_df):
+    """Implémentation de référence (lambdas Python par groupe)."""
     # Texte concaténé des descriptions de repos
     agg_desc = repos_df.groupby("owner_login")["description"].apply(
         lambda x: " . ".join([d for d in x if isinstance(d, str) and d.strip() != ""])
@@ -66,7 +84,7 @@ def main():
     agg_stars = repos_df.groupby("owner_login")["stargazers_count"].sum()
     agg_nb_repos = repos_df.groupby("owner_login")["repo_name"].count()
 
-    repos_agg_df = pd.DataFrame({
+    return pd.DataFrame({
         "login": agg_desc.index,
         "repos_descriptions": agg_desc.values,
         "languages_list": agg_lang.reindex(agg_desc.index).fillna(""),
@@ -74,10 +92,137 @@ def main():
         "nb_repos_fetched": agg_nb_repos.reindex(agg_desc.index).fillna(0).astype(int),
     })
 
+
+def _nonblank(s):
+    """Masque des valeurs qui sont des chaînes non vides (hors espaces) ; le reste est ignoré."""
+    if not (s.dtype == object or pd.api.types.is_string_dtype(s)):
+        return pd.Series(False, index=s.index)
+    return s.str.strip().fillna("") != ""
+
+
+def _join_groups(keys, values, sep):
+    """sep.join(values) par clé, dans l'ordre des lignes (concaténation groupby, sans lambda)."""
+    joined = (values.astype(object) + sep).groupby(keys.to_numpy(), sort=False).sum()
+    return joined.str[: -len(sep)]
+
+
+def aggregate_repos(repos_df):
+    """Même résultat que aggregate_repos_rowwise, en opérations vectorisées."""
+    desc_ok = _nonblank(repos_df["description"])
+    lang_ok = _nonblank(repos_df["language"])
+
+    # Un seul groupby-agg pour les compteurs ; les descriptions vides contribuent ""
+    grouped = pd.DataFrame({
+        "owner_login": repos_df["owner_login"],
+        "description": repos_df["description"].where(desc_ok, "").astype(object) + np.where(desc_ok, " . ", ""),
+        "stargazers_count": repos_df["stargazers_count"],
+        "repo_name": repos_df["repo_name"],
+    }).groupby("owner_login").agg(
+        repos_descriptions=("description", "sum"),
+        total_stars=("stargazers_count", "sum"),
+        nb_repos_fetched=("repo_name", "count"),
+    )
+    repos_descriptions = grouped["repos_descriptions"].str[:-3]
+
+    # Langages : dédoublonnage + tri, équivalent de sorted(set(...)) par utilisateur
+    langs = repos_df.loc[lang_ok, ["owner_login", "language"]].astype(object).drop_duplicates()
+    langs = langs.sort_values(["owner_login", "language"], kind="stable")
+    agg_lang = _join_groups(langs["owner_login"], langs["language"], ", ")
+
+    return pd.DataFrame({
+        "login": grouped.index,
+        "repos_descriptions": repos_descriptions.to_numpy(),
+        "languages_list": agg_lang.reindex(grouped.index).fillna("").to_numpy(),
+        "total_stars": grouped["total_stars"].astype(int).to_numpy(),
+        "nb_repos_fetched": grouped["nb_repos_fetched"].astype(int).to_numpy(),
+    })
+
+
+# --- Construction du texte profil pour le NLP ---
+
+def build_profile_text(row):
+    """Implémentation de référence, appliquée ligne par ligne."""
+    parts = []
+
+    # Infos perso
+    if row.get("name"):
+        parts.append(str(row["name"]))
+    if row.get("bio"):
+        parts.append(str(row["bio"]))
+    if row.get("company"):
+        parts.append(f"Company: {row['company']}")
+    if row.get("location"):
+        parts.append(f"Location: {row['location']}")
+
+    # Langages
+    if row.get("languages_list"):
+        parts.append(f"Languages: {row['languages_list']}")
+
+    # Infos sur les repos
+    if row.get("nb_repos_fetched", 0) > 0:
+        parts.append(f"Number of repositories fetched: {row['nb_repos_fetched']}")
+    if row.get("total_stars", 0) > 0:
+        parts.append(f"Total stars: {row['total_stars']}")
+
+    if row.get("repos_descriptions"):
+        parts.append(f"Projects: {row['repos_descriptions']}")
+
+    text = " . ".join([p for p in parts if isinstance(p, str) and p.strip() != ""])
+    return text
+
+
+def build_profile_texts(df):
+    """Version vectorisée de build_profile_text sur tout le DataFrame."""
+    empty = pd.Series("", index=df.index, dtype=object)
+
+    def part(column, prefix="", condition=None):
+        if column not in df.columns:
+            return empty
+        values = df[column]
+        keep = values.astype(object).astype(bool) if condition is None else condition(values)
+        text = prefix + values.astype(str).astype(object)
+        return text.where(keep & (text.str.strip() != ""), "")
+
+    parts = [
+        part("name"),
+        part("bio"),
+        part("company", "Company: "),
+        part("location", "Location: "),
+        part("languages_list", "Languages: "),
+        part("nb_repos_fetched", "Number of repositories fetched: ", lambda v: v > 0),
+        part("total_stars", "Total stars: ", lambda v: v > 0),
+        part("repos_descriptions", "Projects: "),
+    ]
+
+    text = empty
+    for p in parts:
+        sep = pd.Series(np.where((text != "") & (p != ""), " . ", ""), index=df.index, dtype=object)
+        text = text + sep + p
+    return text
+
+
+def finalize_profiles(merged_df):
+    # On enlève les lignes où le texte profil est vide
+    merged_df = merged_df[merged_df["profile_text"].str.strip() != ""].copy()
+
+    # On peut trier par total_stars pour avoir les plus 'forts' en premier
+    merged_df["total_stars"] = pd.to_numeric(merged_df["total_stars"], errors="coerce").fillna(0).astype(int)
+    return merged_df.sort_values("total_stars", ascending=False)
+
+
+def build_profiles(users_df, repos_df, mode="vectorized"):
+    """users_df / repos_df bruts (tels que lus) -> profils enrichis triés."""
+    users_df = prepare_users(users_df)
+    repos_df = prepare_repos(repos_df)
+
+    if mode == "rowwise":
+        repos_agg_df = aggregate_repos_rowwise(repos_df)
+    else:
+        repos_agg_df = aggregate_repos(repos_df)
+
     print(f"[INFO] Utilisateurs avec au moins un repo récupéré : {len(repos_agg_df)}")
 
     # --- Fusion users + repos agrégés ---
-
     merged_df = pd.merge(
         users_df,
         repos_agg_df,
@@ -87,51 +232,186 @@ def main():
 
     print(f"[INFO] Taille finale après merge : {len(merged_df)}")
 
-    # --- Construction du texte profil pour le NLP ---
-
-    def build_profile_text(row):
-        parts = []
+    if mode == "rowwise":
+        merged_df["profile_text"] = merged_df.apply(build_profile_text, axis=1)
+    else:
+        merged_df["profile_text"] = build_profile_texts(merged_df)
 
-        # Infos perso
-        if row.get("name"):
-            parts.append(str(row["name"]))
-        if row.get("bio"):
-            parts.append(str(row["bio"]))
-        if row.get("company"):
-            parts.append(f"Company: {row['company']}")
-        if row.get("location"):
-            parts.append(f"Location: {row['location']}")
+    return finalize_profiles(merged_df)
 
-        # Langages
-        if row.get("languages_list"):
-            parts.append(f"Languages: {row['languages_list']}")
 
-        # Infos sur les repos
-        if row.get("nb_repos_fetched", 0) > 0:
-            parts.append(f"Number of repositories fetched: {row['nb_repos_fetched']}")
-        if row.get("total_stars", 0) > 0:
-            parts.append(f"Total stars: {row['total_stars']}")
+# --- Mode chunked (mémoire bornée) ---
 
-        if row.get("repos_descriptions"):
-            parts.append(f"Projects: {row['repos_descriptions']}")
+def _partition_of(logins, n_partitions):
+    return pd.util.hash_pandas_object(logins.astype(object), index=False).to_numpy() % n_partitions
 
-        text = " . ".join([p for p in parts if isinstance(p, str) and p.strip() != ""])
-        return text
 
-    merged_df["profile_text"] = merged_df.apply(build_profile_text, axis=1)
+def build_profiles_chunked(users_path, repos_path, output_path, chunk_size=200_000, n_partitions=64):
+    """
+    Construit profiles_enriched.csv sans charger github_repos.csv en entier :
 
-    # On enlève les lignes où le texte profil est vide
-    merged_df = merged_df[merged_df["profile_text"].str.strip() != ""].copy()
+    1) les repos sont lus par morceaux et répartis dans n_partitions fichiers
+       selon un hash de owner_login (tous les repos d'un user dans la même partition)
+    2) chaque partition est agrégée et fusionnée avec ses users (même code que le
+       mode vectorisé) ; on ne garde en mémoire que la position du user et ses stars
+    3) le tri final (même appel sort_values que les autres modes) donne le rang de
+       chaque profil ; chaque partition est réécrite triée par rang, puis les
+       partitions sont fusionnées (k-way merge) dans le fichier de sortie.
 
-    # On peut trier par total_stars pour avoir les plus 'forts' en premier
-    merged_df["total_stars"] = pd.to_numeric(merged_df["total_stars"], errors="coerce").fillna(0).astype(int)
-    merged_df = merged_df.sort_values("total_stars", ascending=False)
+    Les lignes passent d'un fichier à l'autre via csv.reader / csv.writer, le module
+    utilisé par to_csv : les champs sont recopiés tels quels.
+    Les users (bien plus petits que les repos) sont lus en entier.
+    """
+    print(f"[INFO] Lecture utilisateurs : {users_path}")
+    users_df = prepare_users(pd.read_csv(users_path, dtype={"login": str}))
+    users_df.insert(0, "_pos", np.arange(len(users_df)))
+    users_part = _partition_of(users_df["login"], n_partitions)
+
+    tmp_dir = tempfile.mkdtemp(prefix="build_profiles_", dir=os.path.dirname(output_path) or ".")
+    try:
+        def part_path(p, kind):
+            return os.path.join(tmp_dir, f"{kind}-{p:04d}.csv")
+
+        # 1) Partitionnement des repos par owner_login
+        print(f"[INFO] Lecture repos par morceaux : {repos_path}")
+        n_repos = 0
+        repos_columns = None
+        for chunk in pd.read_csv(
+            repos_path,
+            chunksize=chunk_size,
+            dtype={c: str for c in REPOS_TEXT_COLS},
+        ):
+            if "owner_login" not in chunk.columns:
+                raise ValueError("La colonne 'owner_login' est absente de github_repos.csv")
+            repos_columns = list(chunk.columns)
+            chunk = chunk[chunk["owner_login"].notna()]
+            n_repos += len(chunk)
+            chunk_part = _partition_of(chunk["owner_login"], n_partitions)
+            for p in np.unique(chunk_part):
+                path = part_path(p, "repos")
+                chunk[chunk_part == p].to_csv(
+                    path, mode="a", header=not os.path.exists(path), index=False, encoding="utf-8"
+                )
+        print(f"[INFO] {n_repos} repos répartis en {n_partitions} partitions.")
+
+        # 2) Agrégation + fusion + texte, partition par partition
+        columns = None
+        positions, stars = [], []
+        n_agg = 0
+        for p in range(n_partitions):
+            path = part_path(p, "repos")
+            if not os.path.exists(path):
+                continue
+            repos_df = prepare_repos(pd.read_csv(path, dtype=str))
+
+            repos_agg_df = aggregate_repos(repos_df)
+            n_agg += len(repos_agg_df)
+            merged_df = pd.merge(users_df[users_part == p], repos_agg_df, on="login", how="inner")
+            merged_df["profile_text"] = build_profile_texts(merged_df)
+            merged_df = merged_df[merged_df["profile_text"].str.strip() != ""]
+            if merged_df.empty:
+                continue
+
+            merged_df.to_csv(part_path(p, "profiles"), index=False, encoding="utf-8")
+            columns = [c for c in merged_df.columns if c != "_pos"]
+            positions.append(merged_df["_pos"].to_numpy())
+            stars.append(merged_df["total_stars"].astype(int).to_numpy())
+
+        print(f"[INFO] Utilisateurs avec au moins un repo récupéré : {n_agg}")
+
+        if not positions:
+            empty_cols = [c for c in USERS_COLS if c in users_df.columns] + [
+                "repos_descriptions", "languages_list", "total_stars", "nb_repos_fetched", "profile_text"
+            ]
+            pd.DataFrame(columns=empty_cols).to_csv(output_path, index=False, encoding="utf-8")
+            return 0
+
+        # 3) Rang final : ordre du merge (ordre des users) puis même tri que les autres modes
+        positions = np.concatenate(positions)
+        stars = np.concatenate(stars)
+        merge_order = np.argsort(positions, kind="stable")
+        sorted_idx = pd.DataFrame({"total_stars": stars[merge_order]}).sort_values(
+            "total_stars", ascending=False
+        ).index.to_numpy()
+        rank_by_pos = np.empty(len(users_df), dtype=np.int64)
+        rank_by_pos[positions[merge_order[sorted_idx]]] = np.arange(len(positions))
+        print(f"[INFO] Taille finale après merge : {len(positions)}")
+
+        # Chaque partition réécrite triée par rang (runs triés)
+        runs = []
+        for p in range(n_partitions):
+            path = part_path(p, "profiles")
+            if not os.path.exists(path):
+                continue
+            with open(path, newline="", encoding="utf-8") as f:
+                reader = csv.reader(f)
+                next(reader)
+                rows = sorted(((rank_by_pos[int(r[0])], r[1:]) for r in reader), key=lambda x: x[0])
+            run_path = part_path(p, "run")
+            with open(run_path, "w", newline="", encoding="utf-8") as f:
+                writer = csv.writer(f, lineterminator=os.linesep)
+                writer.writerows([rank] + fields for rank, fields in rows)
+            runs.append(run_path)
+
+        # k-way merge des runs dans le fichier final
+        files = [open(path, newline="", encoding="utf-8") for path in runs]
+        try:
+            readers = [((int(r[0]), r[1:]) for r in csv.reader(f)) for f in files]
+            tmp_output = output_path + ".tmp"
+            with open(tmp_output, "w", newline="", encoding="utf-8") as out:
+                writer = csv.writer(out, lineterminator=os.linesep)
+                writer.writerow(columns)
+                for _, fields in heapq.merge(*readers, key=lambda x: x[0]):
+                    writer.writerow(fields)
+        finally:
+            for f in files:
+                f.close()
+        os.replace(tmp_output, output_path)
+        return len(positions)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def main(mode="vectorized", chunk_size=200_000, n_partitions=64, base_dir=None):
+    """base_dir : racine contenant data/raw et data/processed (défaut : le projet)."""
+    if mode not in BUILD_MODES:
+        raise ValueError(f"Mode inconnu : {mode} (attendu : {BUILD_MODES})")
+
+    profiles_path = PROCESSED_DATA_PATH
+    if base_dir is None:
+        base_dir = get_base_dir()
+    else:
+        profiles_path = os.path.join(base_dir, "data", "processed", os.path.basename(PROCESSED_DATA_PATH))
 
-    # Sauvegarde
+    users_path = os.path.join(base_dir, "data", "raw", "github_users.csv")
+    repos_path = os.path.join(base_dir, "data", "raw", "github_repos.csv")
+    processed_dir = os.path.join(base_dir, "data", "processed")
+    os.makedirs(processed_dir, exist_ok=True)
     output_path = os.path.join(processed_dir, "profiles_enriched.csv")
-    merged_df.to_csv(output_path, index=False, encoding="utf-8")
 
-    print(f"[OK] Fichier enrichi sauvegardé dans : {output_path}")
+    if mode == "chunked":
+        # Le CSV est la sortie du k-way merge ; l'artefact Parquet en est converti par morceaux
+        build_profiles_chunked(users_path, repos_path, output_path, chunk_size, n_partitions)
+        print(f"[OK] Fichier enrichi sauvegardé dans : {output_path}")
+        write_artifact_from_csv(output_path, profiles_path, kind="profiles", chunk_size=chunk_size)
+        print(f"[OK] Artefact Parquet sauvegardé dans : {profiles_path}")
+        return
+
+    print(f"[INFO] Lecture utilisateurs : {users_path}")
+    users_df = pd.read_csv(users_path)
+
+    print(f"[INFO] Lecture repos : {repos_path}")
+    repos_df = pd.read_csv(repos_path)
+
+    merged_df = build_profiles(users_df, repos_df, mode=mode)
+
+    # Sauvegarde : artefact Parquet typé + copie CSV
+    write_artifact(merged_df, profiles_path, kind="profiles")
+    print(f"[OK] Artefact Parquet sauvegardé dans : {profiles_path}")
+
+    if WRITE_CSV_COPIES:
+        merged_df.to_csv(output_path, index=False, encoding="utf-8")
+        print(f"[OK] Fichier enrichi sauvegardé dans : {output_path}")
 
 
 if __name__ == "__main__":
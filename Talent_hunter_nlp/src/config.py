@@ -8,6 +8,122 @@ DATA_PROCESSED_DIR = os.path.join(BASE_DIR, "data", "processed")
 
 GITHUB_DATA_PATH = os.path.join(DATA_RAW_DIR, "github_profiles.csv")
 PROCESSED_DATA_PATH = os.path.join(DATA_PROCESSED_DIR, "profiles_processed.parquet")
-EMBEDDINGS_PATH = os.path.join(DATA_PROCESSED_DIR, "profiles_embeddings.npy")
+PROFILES_INDEX_PATH = os.path.join(DATA_PROCESSED_DIR, "profiles_index.parquet")
+
+# Les artefacts entre étapes sont en Parquet (voir artifacts.py) ; on garde aussi
+# les copies CSV (profiles_enriched.csv, profiles_index.csv) pour les outils existants
+WRITE_CSV_COPIES = True
 
 EMBEDDING_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+
+# Backend d'encodage (encoders.py) : "torch" (SentenceTransformer), "onnx"
+# (export ONNX + quantification int8 dynamique, exécuté par ONNX Runtime sur CPU)
+# ou "hash" (sans modèle, pour les benchmarks et les tests)
+ENCODER_BACKEND = "torch"
+ONNX_MODEL_DIR = os.path.join(BASE_DIR, "models", "onnx")
+ONNX_QUANTIZE = True
+ENCODER_THREADS = 0  # threads d'inférence par processus (0 = choix du runtime)
+# Encodage du corpus (embedding.py) sur plusieurs processus ; 1 = dans le processus courant.
+# Sur une machine dédiée : ENCODE_WORKERS * ENCODER_THREADS ~ nombre de cœurs
+ENCODE_WORKERS = 1
+# Cosinus minimal exigé entre un backend et les embeddings de référence (torch)
+ENCODER_MIN_COSINE = 0.99
+
+# Index de plus proches voisins (FAISS) construit par embedding.py
+# (fichier data/processed/profiles_embeddings.faiss)
+# ANN_INDEX_TYPE : "hnsw", "ivf", "flat" ou None (recherche exacte uniquement)
+ANN_INDEX_TYPE = "hnsw"
+IVF_NLIST = None  # None = choisi automatiquement (~4 * sqrt(N))
+IVF_NPROBE = 16
+HNSW_M = 32
+HNSW_EF_CONSTRUCTION = 200
+HNSW_EF_SEARCH = 128
+
+# En dessous de cette fraction de profils retenus par les filtres, on calcule
+# la similarité exacte sur le sous-ensemble plutôt que d'interroger l'index ANN
+ANN_FILTER_MIN_FRACTION = 0.05
+
+# Index lexical BM25 (profiles_bm25.npz, construit par embedding.py) et mode de recherche
+# SEARCH_MODE : "dense" (cosinus), "lexical" (BM25) ou "hybrid" (fusion RRF des deux)
+# "dense" par défaut (classement inchangé) ; les appelants choisissent "hybrid" via search_mode
+SEARCH_MODE = "dense"
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Mode hybride : profondeur de chaque classement avant fusion, et constante k de la RRF
+HYBRID_CANDIDATES = 100
+RRF_K = 60
+
+# Versions de l'index publiées par embedding.py (data/processed/snapshots, voir snapshots.py)
+# SNAPSHOTS_KEEP : versions conservées sur disque (la version courante n'est jamais supprimée)
+# SNAPSHOT_WATCH_SECONDS : l'API vérifie CURRENT à cet intervalle et bascule sur
+# une nouvelle version sans redémarrage (None = seulement via POST /admin/reload)
+SNAPSHOTS_KEEP = 3
+SNAPSHOT_WATCH_SECONDS = 30
+# Recherche répartie (sharding.py) : embedding.py découpe aussi l'index en N_SHARDS
+# partitions (1 = pas de découpage), chacune servie par son propre processus ;
+# le coordinateur interroge tous les shards en parallèle et fusionne leurs top_k
+# (recherche dense uniquement). Avec N_SHARDS > 1, l'API sert la recherche par ce
+# coordinateur : SHARD_SERVING "local" = un processus par shard lancé par l'API,
+# "http" = serveurs de shards déjà lancés (SHARD_URLS, sinon localhost à partir de
+# SHARD_BASE_PORT, un port par shard)
+N_SHARDS = 1
+SHARD_SERVING = "local"
+SHARD_URLS = None
+SHARD_BASE_PORT = 8100
+SHARD_TIMEOUT_SECONDS = 10
+# Jeton exigé (en-tête X-Admin-Token) par les routes /admin ; None = routes /admin refusées (403)
+ADMIN_TOKEN = os.environ.get("TALENT_HUNTER_ADMIN_TOKEN")
+
+# Cache LRU des embeddings de requêtes (TalentSearcher)
+# QUERY_CACHE_PATH = None pour ne pas persister le cache sur disque
+QUERY_CACHE_SIZE = 2048
+QUERY_CACHE_PATH = os.path.join(DATA_PROCESSED_DIR, "query_embeddings_cache.npz")
+
+# Stockage des embeddings : format chargé par TalentSearcher ("float32", "float16", "int8")
+# et chargement en memory-map (pages partagées entre workers via le cache de l'OS).
+# embedding.py écrit toujours le float32 de référence, plus le format choisi.
+EMBEDDINGS_DTYPE = "float32"
+EMBEDDINGS_MMAP = True
+
+# Reranking par cross-encoder entre la recherche et le LLM (reranker.py)
+# RERANK_CANDIDATES candidats sont rescorés, seuls les top_k meilleurs vont au LLM
+# (et seulement ceux d'au moins RERANK_MIN_SCORE, si ce n'est pas None ; score sigmoïde entre 0 et 1)
+RERANK_ENABLED = False
+RERANKER_MODEL_NAME = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+RERANKER_MAX_LENGTH = 512
+RERANK_CANDIDATES = 50
+RERANK_BATCH_SIZE = 32
+RERANK_MIN_SCORE = None
+
+# Nombre maximal d'appels simultanés à Ollama (enrichissement LLM de /agent_search)
+LLM_CONCURRENCY = 4
+
+# Enrichissement LLM : "combined" (un seul appel JSON par candidat, repli sur les
+# appels séparés si la réponse est invalide) ou "separate" (compétences, résumé, score)
+# "separate" par défaut (scores inchangés) ; "combined" se choisit via llm_mode
+LLM_MODE = "separate"
+
+# Cache persistant des résultats LLM (SQLite) ; LLM_CACHE_PATH = None pour le désactiver
+LLM_CACHE_PATH = os.path.join(DATA_PROCESSED_DIR, "llm_cache.sqlite")
+LLM_CACHE_MAX_ENTRIES = 200_000
+LLM_CACHE_TTL_DAYS = 30  # None = pas d'expiration
+
+# Journal append-only des agent_score (lu par eval_metrics.py), vidé en arrière-plan
+SCORE_LOG_PATH = os.path.join(DATA_PROCESSED_DIR, "agent_scores_log.csv")
+SCORE_LOG_FLUSH_SECONDS = 2.0
+
+# Scraper GitHub asynchrone (scraping_github_async.py)
+# GITHUB_API_URL peut pointer vers un faux serveur GitHub local pour les tests
+GITHUB_API_URL = "https://api.github.com"
+GITHUB_CONCURRENCY = 8
+GITHUB_MAX_REPOS_PER_USER = 5
+GITHUB_ETAG_CACHE_PATH = os.path.join(DATA_RAW_DIR, "github_etags.sqlite")
+
+# Sortie du scraping en shards + checkpoint (reprise après interruption)
+# GITHUB_MAX_AGE_DAYS : re-scraper les utilisateurs plus anciens (None = jamais)
+GITHUB_SHARDS_DIR = os.path.join(DATA_RAW_DIR, "github_repos_shards")
+GITHUB_ROWS_PER_SHARD = 50_000
+GITHUB_MAX_AGE_DAYS = None
+
+# Benchmarks (benchmark.py) : corpus synthétiques et fichiers de résultats JSON
+BENCHMARK_DIR = os.path.join(BASE_DIR, "data", "benchmark")
@@ -1,67 +1,306 @@
 # génération des embeddings
+import hashlib
 import os
 import numpy as np
 import pandas as pd
-from sentence_transformers import SentenceTransformer
+
+# Lancé comme script (python src/embedding.py) : imports relatifs résolus via le paquet src
+if __package__ in (None, ""):
+    import sys
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    __package__ = "src"
+
+from .ann_index import ExactIndex, build_index, faiss_available, recall_at_k, save_index
+from .artifacts import PROFILE_INDEX_COLUMNS, read_artifact_or_csv, write_artifact
+from .config import (
+    ANN_INDEX_TYPE,
+    BM25_B,
+    BM25_K1,
+    EMBEDDING_MODEL_NAME,
+    EMBEDDINGS_DTYPE,
+    ENCODE_WORKERS,
+    ENCODER_BACKEND,
+    ENCODER_THREADS,
+    HNSW_EF_CONSTRUCTION,
+    HNSW_EF_SEARCH,
+    HNSW_M,
+    IVF_NLIST,
+    IVF_NPROBE,
+    N_SHARDS,
+    PROCESSED_DATA_PATH,
+    SNAPSHOTS_KEEP,
+    WRITE_CSV_COPIES,
+)
+from .embedding_store import save_embeddings
+from .encoders import encode_parallel, encoder_fingerprint
+from .lexical_index import BM25Index
+from .snapshots import (
+    current_snapshot_dir,
+    new_version,
+    prune,
+    publish,
+    shard_dir,
+    staging_dir as snapshot_staging_dir,
+)
 
 
 def get_base_dir():
     return os.path.dirname(os.path.dirname(__file__))
 
 
-def main():
-    base_dir = get_base_dir()
+def build_ann_index(embeddings, ann_index_path, index_type):
+    """Construit l'index FAISS à côté des embeddings et mesure son rappel@10."""
+    if not index_type:
+        print("[INFO] Pas d'index ANN demandé : recherche exacte uniquement.")
+        return
+
+    if not faiss_available():
+        print("[ATTENTION] faiss n'est pas installé : index ANN non construit.")
+        return
+
+    print(f"[INFO] Construction de l'index ANN ({index_type})...")
+    index = build_index(
+        embeddings,
+        index_type=index_type,
+        nlist=IVF_NLIST,
+        hnsw_m=HNSW_M,
+        ef_construction=HNSW_EF_CONSTRUCTION,
+    )
+    index.set_search_params(nprobe=IVF_NPROBE, ef_search=HNSW_EF_SEARCH)
+    save_index(index, ann_index_path)
+    print(f"[OK] Index ANN sauvegardé dans : {ann_index_path}")
+
+    # Contrôle du rappel par rapport à la recherche exacte (profils tirés au hasard comme requêtes)
+    rng = np.random.default_rng(0)
+    sample = rng.choice(len(embeddings), size=min(200, len(embeddings)), replace=False)
+    recall = recall_at_k(index, ExactIndex(embeddings), embeddings[sample], k=10)
+    print(f"[INFO] Rappel@10 de l'index {index_type} vs recherche exacte : {recall:.3f}")
+
+
+def write_shards(staging_dir, embeddings, index_df, n_shards, embeddings_dtype, index_type) -> list[list[int]]:
+    """
+    Découpe la version en n_shards partitions contiguës (embeddings, index des profils,
+    index ANN), chacune chargeable seule par un processus de sharding.py.
+    Retourne les bornes [début, fin) de chaque shard dans l'ordre global des lignes.
+    """
+    bounds = []
+    for shard, rows in enumerate(np.array_split(np.arange(len(embeddings)), n_shards)):
+        start, stop = (int(rows[0]), int(rows[-1]) + 1) if len(rows) else (0, 0)
+        directory = shard_dir(staging_dir, shard)
+        os.makedirs(directory)
+
+        shard_embeddings = embeddings[start:stop]
+        embeddings_path = os.path.join(directory, "profiles_embeddings.npy")
+        save_embeddings(embeddings_path, shard_embeddings)
+        if embeddings_dtype != "float32":
+            save_embeddings(embeddings_path, shard_embeddings, dtype=embeddings_dtype)
+        write_artifact(
+            index_df.iloc[start:stop].reset_index(drop=True),
+            os.path.join(directory, "profiles_index.parquet"),
+            kind="profiles_index",
+        )
+
+        print(f"[INFO] Shard {shard} : profils {start} à {stop - 1}")
+        build_ann_index(shard_embeddings, os.path.join(directory, "profiles_embeddings.faiss"), index_type)
+        bounds.append([start, stop])
+    return bounds
+
+
+def content_hashes(logins, texts, model_name: str) -> list[str]:
+    """Empreinte du contenu d'un profil (inclut le modèle : changer de modèle ré-encode tout)."""
+    return [
+        hashlib.sha256(f"{model_name}\0{login}\0{text}".encode("utf-8")).hexdigest()
+        for login, text in zip(logins, texts)
+    ]
+
+
+def load_previous_embeddings(manifest_path: str, embeddings_path: str):
+    """
+    Manifeste (login, content_hash) et embeddings float32 du run précédent,
+    ou (None, None) s'ils sont absents ou incohérents.
+    """
+    if not os.path.exists(manifest_path) or not os.path.exists(embeddings_path):
+        return None, None
+
+    manifest = pd.read_csv(manifest_path, dtype=str, keep_default_na=False)
+    embeddings = np.load(embeddings_path, mmap_mode="r")
+    if len(manifest) != len(embeddings):
+        print("[ATTENTION] Manifeste désynchronisé des embeddings : ré-encodage complet.")
+        return None, None
+    return manifest, embeddings
+
+
+def main(
+    index_type: str | None = ANN_INDEX_TYPE,
+    embeddings_dtype: str = EMBEDDINGS_DTYPE,
+    incremental: bool = True,
+    encoder_backend: str = ENCODER_BACKEND,
+    model_name: str = EMBEDDING_MODEL_NAME,
+    n_workers: int = ENCODE_WORKERS,
+    threads_per_worker: int = ENCODER_THREADS,
+    base_dir: str | None = None,
+    n_shards: int = N_SHARDS,
+):
+    """
+    incremental : ne ré-encode que les profils nouveaux ou modifiés depuis le run
+    précédent (d'après le manifeste des empreintes de contenu), les profils
+    disparus sont retirés.
+    encoder_backend : "torch", "onnx" ou "hash" (voir encoders.py).
+    n_workers / threads_per_worker : encodage sur plusieurs processus (voir encode_parallel).
+    base_dir : racine contenant data/processed (défaut : le projet).
+    n_shards : au-delà de 1, la version est aussi découpée en partitions servies
+    par des processus séparés (recherche répartie, voir sharding.py).
+
+    Le résultat est publié comme une nouvelle version (data/processed/snapshots/<version>,
+    voir snapshots.py) : l'API en service peut la charger sans redémarrer.
+    """
+    profiles_path = PROCESSED_DATA_PATH
+    if base_dir is None:
+        base_dir = get_base_dir()
+    else:
+        profiles_path = os.path.join(base_dir, "data", "processed", os.path.basename(PROCESSED_DATA_PATH))
 
     processed_dir = os.path.join(base_dir, "data", "processed")
     os.makedirs(processed_dir, exist_ok=True)
 
-    profiles_path = os.path.join(processed_dir, "profiles_enriched.csv")
-    embeddings_path = os.path.join(processed_dir, "profiles_embeddings.npy")
-    index_path = os.path.join(processed_dir, "profiles_index.csv")
+    profiles_csv_path = os.path.join(processed_dir, "profiles_enriched.csv")
+    embeddings_name = "profiles_embeddings.npy"
+    index_name = "profiles_index.parquet"
+    index_csv_name = "profiles_index.csv"
+    ann_index_name = "profiles_embeddings.faiss"
+    lexical_index_name = "profiles_bm25.npz"
+    manifest_name = "profiles_embeddings_manifest.csv"
 
+    # Tous les fichiers de la nouvelle version sont écrits ici, puis publiés ensemble
+    version = new_version()
+    staging_dir = snapshot_staging_dir(processed_dir, version)
+    # Version en service : base de l'encodage incrémental
+    previous_dir = current_snapshot_dir(processed_dir)
+
+    # Seules les colonnes utiles sont lues (texte + colonnes de l'index)
     print(f"[INFO] Lecture des profils enrichis : {profiles_path}")
-    df = pd.read_csv(profiles_path)
+    df = read_artifact_or_csv(
+        profiles_path,
+        profiles_csv_path,
+        columns=["profile_text"] + PROFILE_INDEX_COLUMNS,
+        kind="profiles",
+    )
 
     # On vérifie qu'on a bien la colonne profile_text
     if "profile_text" not in df.columns:
-        raise ValueError("La colonne 'profile_text' est absente de profiles_enriched.csv")
+        raise ValueError("La colonne 'profile_text' est absente des profils enrichis")
 
-    # Optionnel : si on avait beaucoup de profils, on pourrait limiter
-    # Ici, on garde tout
     texts = df["profile_text"].astype(str).tolist()
-    print(f"[INFO] Nombre de profils à encoder : {len(texts)}")
-
-    # Charger le modèle de SentenceTransformers
-    model_name = "sentence-transformers/all-MiniLM-L6-v2"
-    print(f"[INFO] Chargement du modèle : {model_name}")
-    model = SentenceTransformer(model_name)
-
-    print("[INFO] Encodage des textes (embeddings)...")
-    embeddings = model.encode(
-        texts,
-        batch_size=32,
-        show_progress_bar=True,
-        convert_to_numpy=True,
-        normalize_embeddings=True,  # on normalise pour que cosine = dot
-    )
+    logins = df["login"].astype(str).tolist()
+    print(f"[INFO] Nombre de profils : {len(texts)}")
+
+    # L'empreinte dépend du modèle et du backend : changer l'un ou l'autre ré-encode tout
+    fingerprint = encoder_fingerprint(encoder_backend, model_name)
+    hashes = content_hashes(logins, texts, fingerprint)
+
+    # --- Réutilisation des embeddings des profils inchangés ---
+    reuse_rows = np.full(len(texts), -1, dtype=np.int64)
+    previous = None
+    if incremental:
+        manifest, previous = load_previous_embeddings(
+            os.path.join(previous_dir, manifest_name),
+            os.path.join(previous_dir, embeddings_name),
+        )
+        if manifest is not None:
+            previous_rows = {
+                (login, h): i for i, (login, h) in enumerate(zip(manifest["login"], manifest["content_hash"]))
+            }
+            reuse_rows = np.array(
+                [previous_rows.get(key, -1) for key in zip(logins, hashes)], dtype=np.int64
+            )
+            n_removed = len(set(manifest["login"]) - set(logins))
+            print(
+                f"[INFO] Profils inchangés : {(reuse_rows >= 0).sum()}, "
+                f"nouveaux ou modifiés : {(reuse_rows < 0).sum()}, supprimés : {n_removed}"
+            )
+
+    to_encode = np.flatnonzero(reuse_rows < 0)
+    embeddings = None
+    if previous is not None:
+        embeddings = np.empty((len(texts), previous.shape[1]), dtype=np.float32)
+        reused = np.flatnonzero(reuse_rows >= 0)
+        embeddings[reused] = previous[reuse_rows[reused]]
+
+    if len(to_encode) > 0:
+        # Le modèle n'est chargé que s'il y a des profils à encoder
+        print(
+            f"[INFO] Encodage de {len(to_encode)} profils (embeddings) "
+            f"avec {model_name} (backend {encoder_backend})..."
+        )
+        new_embeddings = encode_parallel(
+            [texts[i] for i in to_encode],
+            backend=encoder_backend,
+            model_name=model_name,
+            n_workers=n_workers,
+            threads_per_worker=threads_per_worker,
+            batch_size=32,
+        )
+        if embeddings is None:
+            embeddings = np.empty((len(texts), new_embeddings.shape[1]), dtype=np.float32)
+        embeddings[to_encode] = new_embeddings
+    elif embeddings is None:
+        raise ValueError("Aucun profil à encoder.")
+    else:
+        print("[INFO] Aucun profil nouveau ou modifié.")
 
     print(f"[INFO] Forme des embeddings : {embeddings.shape}")
+    previous = None  # libère le memory-map de la version précédente
+
+    # Dossier de préparation créé seulement maintenant : pas de dossier vide pendant
+    # l'encodage, que prune pourrait prendre pour un run abandonné
+    os.makedirs(staging_dir)
+
+    # Sauvegarde des embeddings (float32 de référence + format compact éventuel)
+    save_embeddings(os.path.join(staging_dir, embeddings_name), embeddings)
+    if embeddings_dtype != "float32":
+        save_embeddings(os.path.join(staging_dir, embeddings_name), embeddings, dtype=embeddings_dtype)
+
+    build_ann_index(embeddings, os.path.join(staging_dir, ann_index_name), index_type)
 
-    # Sauvegarde des embeddings
-    np.save(embeddings_path, embeddings)
-    print(f"[OK] Embeddings sauvegardés dans : {embeddings_path}")
+    # Index inversé BM25 (recherche lexicale / hybride), toujours reconstruit en entier :
+    # sans modèle, il coûte peu par rapport à l'encodage
+    print("[INFO] Construction de l'index BM25...")
+    lexical_index = BM25Index.build(texts, k1=BM25_K1, b=BM25_B)
+    lexical_index.save(os.path.join(staging_dir, lexical_index_name))
+    print(
+        f"[OK] Index BM25 : {len(lexical_index.vocabulary)} termes, "
+        f"{len(lexical_index.doc_ids)} postings"
+    )
 
     # Sauvegarde d'un index minimal (login + quelques infos)
-        # Sauvegarde d'un index minimal (login + quelques infos)
-    index_cols = []
-    for col in ["login", "name", "company", "location", "total_stars", "nb_repos_fetched", "languages_list"]:
-        if col in df.columns:
-            index_cols.append(col)
+    index_cols = [col for col in PROFILE_INDEX_COLUMNS if col in df.columns]
 
     index_df = df[index_cols].copy()
+    write_artifact(index_df, os.path.join(staging_dir, index_name), kind="profiles_index")
+    if WRITE_CSV_COPIES:
+        index_df.to_csv(os.path.join(staging_dir, index_csv_name), index=False, encoding="utf-8")
+
+    # Manifeste des empreintes, dans l'ordre des lignes des embeddings
+    pd.DataFrame({"login": logins, "content_hash": hashes}).to_csv(
+        os.path.join(staging_dir, manifest_name), index=False, encoding="utf-8"
+    )
+
+    # Partitions pour la recherche répartie ; la version complète reste la référence
+    # (encodage incrémental, recherche dans un seul processus, BM25)
+    metadata = {"encoder": fingerprint, "n_profiles": len(texts), "embeddings_dtype": embeddings_dtype}
+    if n_shards > 1:
+        print(f"[INFO] Découpage de l'index en {n_shards} shards...")
+        metadata["shards"] = write_shards(staging_dir, embeddings, index_df, n_shards, embeddings_dtype, index_type)
 
-    index_df.to_csv(index_path, index=False, encoding="utf-8")
-    print(f"[OK] Index des profils sauvegardé dans : {index_path}")
+    # Bascule : la version n'est visible (CURRENT) qu'une fois complète
+    snapshot_dir = publish(processed_dir, staging_dir, version, metadata)
+    removed = prune(processed_dir, keep=SNAPSHOTS_KEEP)
+    print(f"[OK] Version {version} publiée dans : {snapshot_dir}")
+    print(f"[OK] Embeddings sauvegardés dans : {os.path.join(snapshot_dir, embeddings_name)}")
+    print(f"[OK] Index des profils sauvegardé dans : {os.path.join(snapshot_dir, index_name)}")
+    if removed:
+        print(f"[INFO] Anciennes versions supprimées : {', '.join(removed)}")
 
 
 if __name__ == "__main__":
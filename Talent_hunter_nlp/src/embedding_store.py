@@ -0,0 +1,123 @@
+# stockage des embeddings (float32 / float16 / int8, memory-mapped)
+"""
+embedding_store.py
+Formats de stockage de la matrice d'embeddings :
+
+- float32 : profiles_embeddings.npy (référence)
+- float16 : profiles_embeddings.f16.npy (2x moins de RAM)
+- int8    : profiles_embeddings.i8.npy + profiles_embeddings.i8_scales.npy
+            (quantification scalaire avec une échelle par vecteur, 4x moins de RAM)
+
+Chargés en memory-map, les fichiers sont partagés entre les workers via le cache de l'OS.
+"""
+
+import os
+import numpy as np
+
+EMBEDDING_DTYPES = ("float32", "float16", "int8")
+
+_SUFFIXES = {"float32": "", "float16": ".f16", "int8": ".i8"}
+
+
+def embedding_paths(embeddings_path: str, dtype: str = "float32"):
+    """
+    Chemins (codes, échelles) d'un format, dérivés du chemin float32 de référence.
+    Les échelles n'existent que pour int8 (None sinon).
+    """
+    if dtype not in EMBEDDING_DTYPES:
+        raise ValueError(f"Format d'embeddings inconnu : {dtype} (attendu : {EMBEDDING_DTYPES})")
+
+    root, ext = os.path.splitext(embeddings_path)
+    codes_path = root + _SUFFIXES[dtype] + ext
+    scales_path = root + ".i8_scales" + ext if dtype == "int8" else None
+    return codes_path, scales_path
+
+
+def quantize_int8(embeddings: np.ndarray):
+    """Quantification scalaire symétrique : x ≈ codes * scale, une échelle par vecteur."""
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    scales = np.abs(embeddings).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    codes = np.clip(np.rint(embeddings / scales[:, None]), -127, 127).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+def _save_npy(path: str, array: np.ndarray):
+    tmp_path = path + ".tmp.npy"
+    np.save(tmp_path, array)
+    os.replace(tmp_path, path)
+
+
+def save_embeddings(embeddings_path: str, embeddings: np.ndarray, dtype: str = "float32"):
+    """Écrit les embeddings au format demandé (écriture atomique). Retourne le chemin des codes."""
+    codes_path, scales_path = embedding_paths(embeddings_path, dtype)
+
+    if dtype == "int8":
+        codes, scales = quantize_int8(embeddings)
+        _save_npy(scales_path, scales)
+    else:
+        codes = np.asarray(embeddings, dtype=dtype)
+
+    _save_npy(codes_path, codes)
+    return codes_path
+
+
+class EmbeddingStore:
+    """
+    Matrice d'embeddings (N, d) stockée en float32, float16 ou int8.
+    Les produits scalaires sont calculés par blocs de lignes convertis en float32,
+    pour ne jamais matérialiser toute la matrice décompressée.
+    """
+
+    block_rows = 16384
+
+    def __init__(self, codes: np.ndarray, scales: np.ndarray | None = None):
+        self.codes = codes
+        self.scales = scales
+        self.dtype = str(codes.dtype)
+
+    @classmethod
+    def load(cls, embeddings_path: str, dtype: str = "float32", mmap: bool = True):
+        codes_path, scales_path = embedding_paths(embeddings_path, dtype)
+        mmap_mode = "r" if mmap else None
+        codes = np.load(codes_path, mmap_mode=mmap_mode)
+        scales = np.load(scales_path) if scales_path else None
+        return cls(codes, scales)
+
+    def __len__(self):
+        return self.codes.shape[0]
+
+    @property
+    def shape(self):
+        return self.codes.shape
+
+    @property
+    def nbytes(self) -> int:
+        return self.codes.nbytes + (self.scales.nbytes if self.scales is not None else 0)
+
+    def to_float32(self, rows: np.ndarray | slice | None = None) -> np.ndarray:
+        """Lignes décompressées en float32 (toutes si rows est None)."""
+        rows = slice(None) if rows is None else rows
+        x = np.asarray(self.codes[rows], dtype=np.float32)
+        if self.scales is not None:
+            x *= self.scales[rows][:, None]
+        return x
+
+    def dot(self, queries: np.ndarray, rows: np.ndarray | None = None) -> np.ndarray:
+        """
+        Produits scalaires (Q, n) entre les requêtes et les lignes demandées
+        (toutes les lignes si rows est None).
+        """
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+
+        if self.dtype == "float32":
+            matrix = self.codes if rows is None else self.codes[rows]
+            return queries @ matrix.T
+
+        n = len(self) if rows is None else len(rows)
+        out = np.empty((len(queries), n), dtype=np.float32)
+        for start in range(0, n, self.block_rows):
+            stop = min(start + self.block_rows, n)
+            block_rows = slice(start, stop) if rows is None else rows[start:stop]
+            out[:, start:stop] = queries @ self.to_float32(block_rows).T
+        return out
@@ -0,0 +1,461 @@
+# backends d'encodage des textes (PyTorch / ONNX Runtime)
+"""
+encoders.py
+Encodeurs interchangeables pour les requêtes (TalentSearcher) et le corpus (embedding.py) :
+
+- "torch" : SentenceTransformer d'origine (référence)
+- "onnx"  : même modèle exporté en ONNX, poids quantifiés en int8 (quantification
+            dynamique), exécuté par ONNX Runtime sur CPU. Tokenizer HF + mean pooling
+            + normalisation L2, comme le pipeline de all-MiniLM-L6-v2.
+            N'importe ni torch ni sentence_transformers à l'exécution.
+- "hash"  : sans modèle (sacs de mots hachés, projection fixe), pour les benchmarks
+            et les tests : mêmes dimensions et mêmes coûts d'index que MiniLM,
+            sans le coût (ni la qualité) du modèle.
+
+Tous les encodeurs renvoient des embeddings float32 normalisés (cosinus = produit scalaire).
+fingerprint identifie modèle + backend : il entre dans les empreintes du manifeste
+et du cache des requêtes, pour ne jamais mélanger des vecteurs de deux backends.
+
+Export + contrôle d'équivalence :
+    python -m src.encoders
+"""
+
+import os
+import time
+
+import numpy as np
+
+# Lancé comme script (python src/encoders.py) : imports relatifs résolus via le paquet src
+if __package__ in (None, ""):
+    import sys
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    __package__ = "src"
+
+from .config import (
+    DATA_PROCESSED_DIR,
+    EMBEDDING_MODEL_NAME,
+    ENCODER_BACKEND,
+    ENCODER_MIN_COSINE,
+    ENCODER_THREADS,
+    ONNX_MODEL_DIR,
+    ONNX_QUANTIZE,
+    PROCESSED_DATA_PATH,
+)
+
+ENCODER_BACKENDS = ("torch", "onnx", "hash")
+
+# Longueur maximale utilisée par SentenceTransformer pour all-MiniLM-L6-v2
+MAX_SEQ_LENGTH = 256
+
+# Dimension de l'encodeur "hash" (celle de all-MiniLM-L6-v2)
+HASH_ENCODER_DIM = 384
+
+
+def encoder_fingerprint(
+    backend: str,
+    model_name: str = EMBEDDING_MODEL_NAME,
+    quantized: bool = ONNX_QUANTIZE,
+) -> str:
+    """Identifiant modèle + backend (le backend torch garde le nom seul du modèle)."""
+    if backend == "hash":
+        return f"hash#{HASH_ENCODER_DIM}"
+    if backend == "onnx":
+        return f"{model_name}#onnx" + ("-int8" if quantized else "")
+    return model_name
+
+
+def _normalize(embeddings: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    return (embeddings / np.clip(norms, 1e-12, None)).astype(np.float32)
+
+
+class TorchEncoder:
+    backend = "torch"
+
+    def __init__(self, model_name: str = EMBEDDING_MODEL_NAME, threads: int = ENCODER_THREADS):
+        from sentence_transformers import SentenceTransformer
+
+        if threads:
+            import torch
+
+            torch.set_num_threads(threads)
+
+        self.model_name = model_name
+        self.fingerprint = encoder_fingerprint("torch", model_name)
+        self.model = SentenceTransformer(model_name)
+
+    def encode(self, texts: list[str], batch_size: int = 32, show_progress_bar: bool = False) -> np.ndarray:
+        embs = self.model.encode(
+            texts,
+            batch_size=batch_size,
+            show_progress_bar=show_progress_bar,
+            convert_to_numpy=True,
+            normalize_embeddings=True,  # on normalise pour que cosine = dot
+        )
+        return np.asarray(embs, dtype=np.float32)
+
+
+class HashEncoder:
+    """
+    Encodeur sans modèle : comptes de tokens hachés (HashingVectorizer) sur
+    HASH_ENCODER_DIM dimensions, normalisés. Déterministe, aucun téléchargement.
+    """
+
+    backend = "hash"
+
+    def __init__(self, model_name: str = EMBEDDING_MODEL_NAME, threads: int = ENCODER_THREADS):
+        from sklearn.feature_extraction.text import HashingVectorizer
+
+        self.model_name = model_name
+        self.fingerprint = encoder_fingerprint("hash", model_name)
+        self.vectorizer = HashingVectorizer(n_features=HASH_ENCODER_DIM, alternate_sign=True, norm=None)
+
+    def encode(self, texts: list[str], batch_size: int = 32, show_progress_bar: bool = False) -> np.ndarray:
+        embs = self.vectorizer.transform(texts).toarray().astype(np.float32)
+        return _normalize(embs)
+
+
+def onnx_model_dir(model_name: str = EMBEDDING_MODEL_NAME, base_dir: str = ONNX_MODEL_DIR) -> str:
+    return os.path.join(base_dir, model_name.replace("/", "__"))
+
+
+def export_onnx(
+    model_name: str = EMBEDDING_MODEL_NAME,
+    out_dir: str | None = None,
+    quantize: bool = ONNX_QUANTIZE,
+) -> str:
+    """
+    Exporte le transformer en ONNX (axes batch / séquence dynamiques), puis, si demandé,
+    le quantifie en int8 (quantification dynamique des poids). Le tokenizer est
+    sauvegardé à côté. Nécessite torch + transformers (une seule fois, hors service).
+    Retourne le dossier du modèle.
+    """
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    out_dir = out_dir or onnx_model_dir(model_name)
+    os.makedirs(out_dir, exist_ok=True)
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModel.from_pretrained(model_name)
+    model.eval()
+
+    class _LastHiddenState(torch.nn.Module):
+        def __init__(self, model):
+            super().__init__()
+            self.model = model
+
+        def forward(self, *inputs):
+            return self.model(*inputs, return_dict=False)[0]
+
+    dummy = tokenizer(["Talent Hunter export"], return_tensors="pt")
+    input_names = [n for n in ("input_ids", "attention_mask", "token_type_ids") if n in dummy]
+    dynamic_axes = {n: {0: "batch", 1: "sequence"} for n in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+    fp32_path = os.path.join(out_dir, "model.onnx")
+    print(f"[INFO] Export ONNX de {model_name} -> {fp32_path}")
+    with torch.no_grad():
+        torch.onnx.export(
+            _LastHiddenState(model),
+            tuple(dummy[n] for n in input_names),
+            fp32_path,
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=14,
+        )
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        int8_path = os.path.join(out_dir, "model.int8.onnx")
+        quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+        print(f"[OK] Modèle quantifié (int8) : {int8_path}")
+
+    tokenizer.save_pretrained(out_dir)
+    return out_dir
+
+
+class OnnxEncoder:
+    backend = "onnx"
+
+    def __init__(
+        self,
+        model_name: str = EMBEDDING_MODEL_NAME,
+        model_dir: str | None = None,
+        quantized: bool = ONNX_QUANTIZE,
+        threads: int = ENCODER_THREADS,
+        max_seq_length: int = MAX_SEQ_LENGTH,
+    ):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        model_dir = model_dir or onnx_model_dir(model_name)
+        model_path = os.path.join(model_dir, "model.int8.onnx" if quantized else "model.onnx")
+        if not os.path.exists(model_path):
+            print(f"[INFO] Modèle ONNX absent ({model_path}) : export...")
+            export_onnx(model_name, model_dir, quantize=quantized)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self.max_seq_length = max_seq_length
+
+        self.model_name = model_name
+        self.fingerprint = encoder_fingerprint("onnx", model_name, quantized)
+
+    def _encode_batch(self, texts: list[str]) -> np.ndarray:
+        tokens = self.tokenizer(
+            texts,
+            padding=True,
+            truncation=True,
+            max_length=self.max_seq_length,
+            return_tensors="np",
+        )
+        feeds = {k: v.astype(np.int64) for k, v in tokens.items() if k in self.input_names}
+        hidden = self.session.run(None, feeds)[0]  # (B, T, d)
+
+        # Mean pooling sur les tokens réels (masque d'attention)
+        mask = tokens["attention_mask"][..., None].astype(np.float32)
+        pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        return _normalize(pooled)
+
+    def encode(self, texts: list[str], batch_size: int = 32, show_progress_bar: bool = False) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+
+        # Lots de longueurs proches : moins de padding (comme SentenceTransformer)
+        order = np.argsort([-len(t) for t in texts], kind="stable")
+        out = [None] * len(texts)
+        n_batches = (len(texts) + batch_size - 1) // batch_size
+        for b, start in enumerate(range(0, len(texts), batch_size), start=1):
+            idx = order[start:start + batch_size]
+            for i, emb in zip(idx, self._encode_batch([texts[i] for i in idx])):
+                out[i] = emb
+            if show_progress_bar and (b % 50 == 0 or b == n_batches):
+                print(f"[INFO] Lots encodés : {b}/{n_batches}")
+        return np.stack(out)
+
+
+def load_encoder(
+    backend: str = ENCODER_BACKEND,
+    model_name: str = EMBEDDING_MODEL_NAME,
+    threads: int = ENCODER_THREADS,
+):
+    if backend == "torch":
+        return TorchEncoder(model_name, threads=threads)
+    if backend == "onnx":
+        return OnnxEncoder(model_name, threads=threads)
+    if backend == "hash":
+        return HashEncoder(model_name, threads=threads)
+    raise ValueError(f"Backend d'encodage inconnu : {backend} (attendu : {ENCODER_BACKENDS})")
+
+
+# --- Encodage du corpus en parallèle (plusieurs processus) ---
+
+_worker_encoder = None
+_worker_config = None
+
+
+def _init_worker(backend: str, model_name: str, threads: int):
+    """Initialisation d'un processus worker : bornage des threads (avant tout import de runtime)."""
+    global _worker_config
+    if threads:
+        for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+            os.environ[var] = str(threads)
+    _worker_config = (backend, model_name, threads)
+
+
+def _encode_shard(args):
+    # Modèle chargé à la première tâche et non dans l'initializer : une erreur de
+    # chargement remonte au processus parent au lieu de relancer les workers en boucle
+    global _worker_encoder
+    if _worker_encoder is None:
+        backend, model_name, threads = _worker_config
+        _worker_encoder = load_encoder(backend, model_name, threads=threads)
+
+    indices, texts, batch_size = args
+    return indices, _worker_encoder.encode(texts, batch_size=batch_size)
+
+
+def length_sorted_shards(texts: list[str], shard_size: int) -> list[np.ndarray]:
+    """
+    Indices des textes triés par longueur décroissante, découpés en shards de shard_size :
+    chaque shard regroupe des textes de longueurs proches (peu de padding dans les lots).
+    """
+    order = np.argsort([-len(t) for t in texts], kind="stable")
+    return [order[start:start + shard_size] for start in range(0, len(texts), shard_size)]
+
+
+def encode_parallel(
+    texts: list[str],
+    backend: str = ENCODER_BACKEND,
+    model_name: str = EMBEDDING_MODEL_NAME,
+    n_workers: int = 1,
+    threads_per_worker: int = ENCODER_THREADS,
+    batch_size: int = 32,
+    shard_batches: int = 16,
+    encoder=None,
+) -> np.ndarray:
+    """
+    Encode texts sur n_workers processus, chacun avec son propre modèle et
+    threads_per_worker threads d'inférence. Les textes sont triés par longueur puis
+    découpés en shards de shard_batches lots, distribués dynamiquement (les shards
+    longs ne bloquent pas un worker pendant que les autres attendent). Le résultat
+    est remis dans l'ordre d'origine. Affiche le débit en profils/s.
+
+    n_workers <= 1 : encodage dans le processus courant (encoder s'il est fourni).
+    """
+    if not texts:
+        raise ValueError("Aucun texte à encoder.")
+
+    shards = length_sorted_shards(texts, batch_size * shard_batches)
+    out = None
+    done = 0
+    n_shards = 0
+    start = time.perf_counter()
+
+    def collect(indices, embs):
+        nonlocal out, done, n_shards
+        if out is None:
+            out = np.empty((len(texts), embs.shape[1]), dtype=np.float32)
+        out[indices] = embs
+        done += len(indices)
+        n_shards += 1
+        if n_shards % 10 == 0 or n_shards == len(shards):
+            elapsed = time.perf_counter() - start
+            print(f"[INFO] {done}/{len(texts)} profils encodés ({done / elapsed:.1f} profils/s)")
+
+    if n_workers <= 1:
+        if encoder is None:
+            encoder = load_encoder(backend, model_name, threads=threads_per_worker)
+        for indices in shards:
+            collect(indices, encoder.encode([texts[i] for i in indices], batch_size=batch_size))
+    else:
+        import multiprocessing as mp
+
+        # "spawn" : chaque worker démarre proprement (pas de fork d'un runtime multi-thread)
+        ctx = mp.get_context("spawn")
+        tasks = [(indices, [texts[i] for i in indices], batch_size) for indices in shards]
+        print(f"[INFO] Encodage sur {n_workers} processus x {threads_per_worker or 'auto'} threads...")
+        with ctx.Pool(
+            n_workers,
+            initializer=_init_worker,
+            initargs=(backend, model_name, threads_per_worker),
+        ) as pool:
+            for indices, embs in pool.imap_unordered(_encode_shard, tasks):
+                collect(indices, embs)
+
+    elapsed = time.perf_counter() - start
+    print(f"[OK] {len(texts)} profils encodés en {elapsed:.1f}s ({len(texts) / elapsed:.1f} profils/s)")
+    return out
+
+
+def check_equivalence(
+    encoder,
+    texts: list[str],
+    reference: np.ndarray,
+    min_cosine: float = ENCODER_MIN_COSINE,
+) -> dict:
+    """
+    Compare les embeddings de encoder à des embeddings de référence (mêmes textes,
+    même ordre, normalisés). Lève ValueError si un cosinus passe sous min_cosine.
+    """
+    embs = encoder.encode(texts)
+    cosines = (embs * _normalize(np.asarray(reference, dtype=np.float32))).sum(axis=1)
+    report = {
+        "n": len(texts),
+        "min_cosine": float(cosines.min()),
+        "mean_cosine": float(cosines.mean()),
+        "tolerance": min_cosine,
+    }
+    if report["min_cosine"] < min_cosine:
+        raise ValueError(
+            f"Backend {encoder.backend} non équivalent : cosinus min {report['min_cosine']:.4f} < {min_cosine}"
+        )
+    return report
+
+
+def benchmark_queries(encoder, queries: list[str], repeat: int = 3) -> dict:
+    """Latence d'encodage d'une requête seule (cas de l'API), en millisecondes."""
+    latencies = []
+    for _ in range(repeat):
+        for q in queries:
+            start = time.perf_counter()
+            encoder.encode([q])
+            latencies.append((time.perf_counter() - start) * 1000)
+    return {
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+    }
+
+
+def main(backend: str = "onnx", sample_size: int = 256):
+    """
+    Exporte (si besoin) le backend demandé et le compare aux embeddings de
+    référence de data/processed (calculés par le backend torch), profil par profil
+    d'après le manifeste de la version (login + empreinte du contenu).
+    """
+    from .artifacts import read_artifact
+    from .embedding import content_hashes, load_previous_embeddings
+    from .snapshots import current_snapshot_dir, read_metadata
+
+    # Embeddings de la version en service (voir snapshots.py) : ils ne servent de
+    # référence que s'ils ont été calculés par le backend torch
+    snapshot_dir = current_snapshot_dir(DATA_PROCESSED_DIR)
+    reference_encoder = read_metadata(snapshot_dir).get("encoder")
+    expected = encoder_fingerprint("torch")
+    if reference_encoder != expected:
+        raise ValueError(
+            f"La version en service a été encodée avec {reference_encoder or 'un encodeur inconnu'}, "
+            f"pas avec la référence {expected} : relancer embedding.py avec encoder_backend=\"torch\"."
+        )
+
+    # Alignement profil -> ligne de référence par le manifeste (login, empreinte du
+    # contenu) : seuls les profils encodés tels quels dans la version sont comparés
+    manifest, reference = load_previous_embeddings(
+        os.path.join(snapshot_dir, "profiles_embeddings_manifest.csv"),
+        os.path.join(snapshot_dir, "profiles_embeddings.npy"),
+    )
+    if manifest is None:
+        raise ValueError("Manifeste ou embeddings de référence absents : relancer embedding.py.")
+    profiles = read_artifact(PROCESSED_DATA_PATH, columns=["login", "profile_text"], kind="profiles")
+    logins = profiles["login"].astype(str).tolist()
+    texts = profiles["profile_text"].astype(str).tolist()
+    reference_rows = {
+        (login, h): i for i, (login, h) in enumerate(zip(manifest["login"], manifest["content_hash"]))
+    }
+    matched = [
+        (i, reference_rows[key])
+        for i, key in enumerate(zip(logins, content_hashes(logins, texts, expected)))
+        if key in reference_rows
+    ]
+    if not matched:
+        raise ValueError("Aucun profil identique à ceux de la version en service : relancer embedding.py.")
+    if len(matched) < len(texts):
+        print(f"[INFO] {len(texts) - len(matched)} profils modifiés depuis la version en service, ignorés.")
+
+    encoder = load_encoder(backend)
+
+    rng = np.random.default_rng(0)
+    picked = np.sort(rng.choice(len(matched), size=min(sample_size, len(matched)), replace=False))
+    sample = [matched[j][0] for j in picked]
+    reference_sample = reference[np.array([matched[j][1] for j in picked])]
+    report = check_equivalence(encoder, [texts[i] for i in sample], reference_sample)
+    print(
+        f"[OK] {encoder.fingerprint} équivalent à la référence sur {report['n']} profils "
+        f"(cosinus min {report['min_cosine']:.4f}, moyen {report['mean_cosine']:.4f})"
+    )
+
+    latency = benchmark_queries(encoder, [texts[i][:300] for i in sample[:20]])
+    print(f"[INFO] Latence par requête : p50 {latency['p50_ms']:.1f} ms, p95 {latency['p95_ms']:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
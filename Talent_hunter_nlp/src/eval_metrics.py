@@ -6,8 +6,14 @@ from sklearn.metrics import mean_absolute_error
 def evaluate_agent():
     # Chemins des fichiers
     gold_path = "data/processed/gold_standard.csv"
+    scores_log_path = "data/processed/agent_scores_log.csv"
     results_path = "data/processed/profiles_enriched.csv"
 
+    # Scores écrits par l'API dans le journal append-only ; à défaut, l'ancienne
+    # colonne agent_score de profiles_enriched.csv
+    if os.path.exists(scores_log_path):
+        results_path = scores_log_path
+
     if not os.path.exists(gold_path) or not os.path.exists(results_path):
         print(f"[ERREUR] Fichiers introuvables dans data/processed/")
         return
@@ -16,6 +22,11 @@ def evaluate_agent():
     gold_df = pd.read_csv(gold_path)
     results_df = pd.read_csv(results_path)
 
+    if results_path == scores_log_path:
+        # Le dernier score de chaque login fait foi
+        results_df = results_df.sort_values("timestamp", kind="stable")
+        results_df = results_df.drop_duplicates("login", keep="last")
+
     # 2. Harmonisation des noms de colonnes pour la fusion
     # On force tout en minuscules pour éviter les erreurs de casse
     gold_df.columns = [c.strip().lower() for c in gold_df.columns]
@@ -0,0 +1,112 @@
+# index des filtres (langages, stars) construit au chargement
+"""
+filter_index.py
+Résolution des filtres de recherche sans parcourir les chaînes de l'index à chaque requête.
+
+- un bitset par langage (bits empaquetés, ordre "little" comme FAISS IDSelectorBitmap)
+- la colonne total_stars triée, interrogée par recherche dichotomique
+"""
+
+import numpy as np
+import pandas as pd
+
+LANGUAGE_MODES = ("any", "all")
+
+
+def _pack(mask: np.ndarray) -> np.ndarray:
+    return np.packbits(mask, bitorder="little")
+
+
+class FilterIndex:
+    def __init__(self, index_df: pd.DataFrame):
+        self.n = len(index_df)
+
+        # --- Bitsets par langage ---
+        self.language_bits = {}
+        if "languages_list" in index_df.columns:
+            # Chaque liste de langages distincte n'est découpée qu'une fois
+            # (colonne catégorielle quand l'index vient du Parquet)
+            codes, uniques = pd.factorize(index_df["languages_list"])
+            langs = (
+                pd.Series(np.asarray(uniques, dtype=object))
+                .astype(str)
+                .str.split(",")
+                .explode()
+                .str.strip()
+            )
+            langs = langs[langs != ""]
+            unique_ids = langs.index.to_numpy()
+            keys = langs.str.lower().to_numpy()
+            for key in np.unique(keys):
+                mask = np.isin(codes, unique_ids[keys == key])
+                self.language_bits[key] = _pack(mask)
+
+        # --- Colonne des stars triée ---
+        self.has_stars = "total_stars" in index_df.columns
+        if self.has_stars:
+            stars = pd.to_numeric(index_df["total_stars"], errors="coerce").fillna(0).to_numpy()
+            self._star_order = np.argsort(stars, kind="stable")
+            self._sorted_stars = stars[self._star_order]
+
+        self._all_bits = _pack(np.ones(self.n, dtype=bool))
+        self._no_bits = np.zeros_like(self._all_bits)
+
+    @property
+    def languages(self) -> list[str]:
+        return sorted(self.language_bits)
+
+    def _term_bits(self, term: str) -> np.ndarray:
+        """
+        Bitset d'un terme de filtre : union des langages qui le contiennent
+        (même sémantique de sous-chaîne que l'ancien str.contains, ex. "java" -> Java, JavaScript).
+        """
+        term = term.strip().lower()
+        bits = self._no_bits
+        for key, key_bits in self.language_bits.items():
+            if term in key:
+                bits = bits | key_bits
+        return bits
+
+    def _stars_bits(self, min_stars: int) -> np.ndarray:
+        start = np.searchsorted(self._sorted_stars, min_stars, side="left")
+        mask = np.zeros(self.n, dtype=bool)
+        mask[self._star_order[start:]] = True
+        return _pack(mask)
+
+    def bitmap(
+        self,
+        min_stars: int | None = None,
+        languages: str | list[str] | None = None,
+        language_mode: str = "any",
+    ) -> np.ndarray | None:
+        """
+        Bitset empaqueté des profils qui passent les filtres, ou None s'il n'y a aucun filtre.
+        language_mode : "any" (OU entre langages) ou "all" (ET).
+        """
+        if language_mode not in LANGUAGE_MODES:
+            raise ValueError(f"language_mode inconnu : {language_mode} (attendu : {LANGUAGE_MODES})")
+
+        if isinstance(languages, str):
+            languages = [languages]
+        languages = [l for l in (languages or []) if l and l.strip()]
+
+        bits = None
+        if languages:
+            terms = [self._term_bits(l) for l in languages]
+            reduce = np.bitwise_or if language_mode == "any" else np.bitwise_and
+            bits = reduce.reduce(terms)
+
+        if min_stars and self.has_stars:
+            star_bits = self._stars_bits(min_stars)
+            bits = star_bits if bits is None else bits & star_bits
+
+        return bits
+
+    def unpack(self, bits: np.ndarray) -> np.ndarray:
+        """Bitset empaqueté -> masque booléen de taille N."""
+        return np.unpackbits(bits, count=self.n, bitorder="little").astype(bool)
+
+    def mask(self, *args, **kwargs) -> np.ndarray | None:
+        """Même chose que bitmap(), déballé en masque booléen de taille N."""
+        bits = self.bitmap(*args, **kwargs)
+        return None if bits is None else self.unpack(bits)
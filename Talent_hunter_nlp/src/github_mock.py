@@ -0,0 +1,140 @@
+# faux serveur GitHub en mémoire pour vérifier le scraper asynchrone
+"""
+github_mock.py
+Faux GitHub (GET /users/<login>/repos) servi par httpx.MockTransport, sans réseau :
+
+- pagination : page_size repos par page, en-tête Link rel="next"
+- ETag par page : If-None-Match identique -> 304
+- login inconnu -> 404
+- logins de rate_limited : un premier 429 (Retry-After: 0), puis la réponse normale
+
+main() lance scrape_users_async deux fois contre ce serveur et vérifie la pagination,
+le 404 (aucun repo), puis la réutilisation des pages en cache (304) au second passage.
+"""
+
+import asyncio
+import os
+import tempfile
+
+import httpx
+
+# Lancé comme script (python src/github_mock.py) : imports relatifs résolus via le paquet src
+if __package__ in (None, ""):
+    import sys
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    __package__ = "src"
+
+MOCK_BASE_URL = "https://github.mock"
+
+
+class MockGitHub:
+    def __init__(self, repos: dict[str, list[dict]], page_size: int = 2, rate_limited: tuple[str, ...] = ()):
+        self.repos = repos
+        self.page_size = page_size
+        self.rate_limited = set(rate_limited)
+        # Compteurs par code HTTP renvoyé, et en-têtes If-None-Match reçus
+        self.responses = {}
+        self.conditional_requests = 0
+
+    def transport(self) -> httpx.MockTransport:
+        return httpx.MockTransport(self.handler)
+
+    def _respond(self, status: int, **kwargs) -> httpx.Response:
+        self.responses[status] = self.responses.get(status, 0) + 1
+        return httpx.Response(status, **kwargs)
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        parts = request.url.path.strip("/").split("/")
+        if len(parts) != 3 or parts[0] != "users" or parts[2] != "repos":
+            return self._respond(404)
+        login = parts[1]
+
+        if login in self.rate_limited:
+            self.rate_limited.discard(login)
+            return self._respond(429, headers={"Retry-After": "0"})
+        if login not in self.repos:
+            return self._respond(404, json={"message": "Not Found"})
+
+        page = int(request.url.params.get("page", 1))
+        etag = f'"{login}-{page}"'
+        if request.headers.get("If-None-Match"):
+            self.conditional_requests += 1
+            if request.headers["If-None-Match"] == etag:
+                return self._respond(304, headers={"ETag": etag})
+
+        repos = self.repos[login]
+        start = (page - 1) * self.page_size
+        headers = {"ETag": etag}
+        if start + self.page_size < len(repos):
+            headers["Link"] = f'<{MOCK_BASE_URL}/users/{login}/repos?page={page + 1}>; rel="next"'
+        return self._respond(200, json=repos[start:start + self.page_size], headers=headers)
+
+
+def _fake_repos(login: str, n: int) -> list[dict]:
+    return [
+        {
+            "name": f"{login}-repo{i}",
+            "description": None,
+            "language": "Python",
+            "stargazers_count": i,
+            "html_url": f"{MOCK_BASE_URL}/{login}/repo{i}",
+        }
+        for i in range(n)
+    ]
+
+
+def _check(condition: bool, message: str):
+    if not condition:
+        raise RuntimeError(f"Vérification du scraper échouée : {message}")
+    print(f"[OK] {message}")
+
+
+def main(max_repos_per_user: int = 5):
+    from .scraping_github_async import scrape_users_async
+
+    server = MockGitHub(
+        {"alice": _fake_repos("alice", 7), "bob": _fake_repos("bob", 1)},
+        page_size=2,
+        rate_limited=("alice",),
+    )
+    logins = ["alice", "ghost", "bob"]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        etag_cache_path = os.path.join(tmp_dir, "github_etags.sqlite")
+
+        def scrape():
+            return asyncio.run(
+                scrape_users_async(
+                    logins,
+                    max_repos_per_user=max_repos_per_user,
+                    concurrency=2,
+                    base_url=MOCK_BASE_URL,
+                    token=None,
+                    etag_cache_path=etag_cache_path,
+                    transport=server.transport(),
+                )
+            )
+
+        first = scrape()
+        by_login = {}
+        for row in first:
+            by_login.setdefault(row["owner_login"], []).append(row["repo_name"])
+        _check(
+            by_login.get("alice") == [f"alice-repo{i}" for i in range(max_repos_per_user)],
+            f"pagination : {max_repos_per_user} repos sur 3 pages pour alice (après un 429)",
+        )
+        _check("ghost" not in by_login and by_login.get("bob") == ["bob-repo0"], "404 -> aucun repo")
+        _check(server.conditional_requests == 0, "premier passage sans If-None-Match")
+
+        server.responses.clear()
+        second = scrape()
+        _check(second == first, "second passage identique au premier")
+        _check(
+            server.responses.get(304, 0) == 4 and 200 not in server.responses,
+            "second passage : If-None-Match envoyé, pages reprises du cache (304)",
+        )
+
+
+if __name__ == "__main__":
+    main()
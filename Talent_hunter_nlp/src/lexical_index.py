@@ -0,0 +1,193 @@
+# index lexical BM25 (index inversé) sur profile_text
+"""
+lexical_index.py
+Recherche lexicale BM25 pour les termes exacts des offres (PyTorch, Kubernetes, Rust, C++...)
+que la similarité cosinus classe mal.
+
+- index inversé au format CSR : pour chaque terme, la liste des profils qui le
+  contiennent (postings), triée par profil
+- le poids BM25 de chaque posting est précalculé à la construction : une requête
+  ne fait que lire les postings de ses termes et les additionner (np.unique + np.bincount),
+  sans jamais parcourir tout le corpus
+- reciprocal_rank_fusion : fusion des classements lexical et dense (mode "hybrid" de TalentSearcher)
+
+profile_text contient déjà les descriptions des repos ("Projects: ..."), elles sont donc indexées aussi.
+"""
+
+import os
+import re
+from collections import Counter
+
+import numpy as np
+
+from .ann_index import top_k_indices
+
+# Garde les tokens techniques d'un seul morceau : c++, c#, node.js, vue.js, 3d
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#]*(?:\.[a-z0-9]+)*")
+
+
+def tokenize(text: str) -> list[str]:
+    return _TOKEN_RE.findall(str(text).lower())
+
+
+class BM25Index:
+    def __init__(
+        self,
+        vocabulary: np.ndarray,
+        offsets: np.ndarray,
+        doc_ids: np.ndarray,
+        weights: np.ndarray,
+        n_docs: int,
+        k1: float = 1.2,
+        b: float = 0.75,
+    ):
+        """
+        vocabulary : termes (V,) ; offsets : (V + 1,) bornes des postings de chaque terme
+        doc_ids / weights : postings concaténés (profil, poids BM25 précalculé)
+        """
+        self.vocabulary = vocabulary
+        self.offsets = offsets
+        self.doc_ids = doc_ids
+        self.weights = weights
+        self.n_docs = n_docs
+        self.k1 = k1
+        self.b = b
+        self.term_ids = {term: i for i, term in enumerate(vocabulary.tolist())}
+
+    def __len__(self):
+        return self.n_docs
+
+    @classmethod
+    def build(cls, texts: list[str], k1: float = 1.2, b: float = 0.75) -> "BM25Index":
+        vocab = {}
+        term_ids, doc_ids, tfs = [], [], []
+        doc_len = np.zeros(len(texts), dtype=np.float32)
+
+        for doc, text in enumerate(texts):
+            tokens = tokenize(text)
+            doc_len[doc] = len(tokens)
+            for term, tf in Counter(tokens).items():
+                term_ids.append(vocab.setdefault(term, len(vocab)))
+                doc_ids.append(doc)
+                tfs.append(tf)
+
+        term_ids = np.asarray(term_ids, dtype=np.int64)
+        doc_ids = np.asarray(doc_ids, dtype=np.int32)
+        tfs = np.asarray(tfs, dtype=np.float32)
+
+        # Tri stable par terme : les postings de chaque terme restent triés par profil
+        order = np.argsort(term_ids, kind="stable")
+        term_ids, doc_ids, tfs = term_ids[order], doc_ids[order], tfs[order]
+
+        df = np.bincount(term_ids, minlength=len(vocab))
+        offsets = np.zeros(len(vocab) + 1, dtype=np.int64)
+        np.cumsum(df, out=offsets[1:])
+
+        # Poids BM25 (idf Lucene, toujours positif) calculé une fois pour toutes
+        n_docs = len(texts)
+        idf = np.log1p((n_docs - df + 0.5) / (df + 0.5)).astype(np.float32)
+        avg_len = float(doc_len.mean()) if n_docs else 0.0
+        norm = k1 * (1 - b + b * doc_len[doc_ids] / max(avg_len, 1e-9))
+        weights = (idf[term_ids] * tfs * (k1 + 1) / (tfs + norm)).astype(np.float32)
+
+        vocabulary = np.array(list(vocab), dtype=str)
+        return cls(vocabulary, offsets, doc_ids, weights, n_docs, k1=k1, b=b)
+
+    def save(self, path: str):
+        """Écriture atomique d'un .npz non compressé (rechargeable sans pickle)."""
+        tmp_path = path + ".tmp.npz"
+        np.savez(
+            tmp_path,
+            vocabulary=self.vocabulary,
+            offsets=self.offsets,
+            doc_ids=self.doc_ids,
+            weights=self.weights,
+            params=np.array([self.n_docs, self.k1, self.b], dtype=np.float64),
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "BM25Index | None":
+        if not os.path.exists(path):
+            return None
+        with np.load(path, allow_pickle=False) as data:
+            n_docs, k1, b = data["params"]
+            return cls(
+                data["vocabulary"],
+                data["offsets"],
+                data["doc_ids"],
+                data["weights"],
+                int(n_docs),
+                k1=float(k1),
+                b=float(b),
+            )
+
+    def scores(self, query: str):
+        """
+        Scores BM25 des seuls profils contenant au moins un terme de la requête.
+        Retourne (doc_ids, scores) ; seules les postings des termes de la requête sont lues.
+        """
+        counts = Counter(t for t in tokenize(query) if t in self.term_ids)
+        if not counts:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        ids, weights = [], []
+        for term, qtf in counts.items():
+            t = self.term_ids[term]
+            start, stop = self.offsets[t], self.offsets[t + 1]
+            ids.append(self.doc_ids[start:stop])
+            weights.append(self.weights[start:stop] * qtf)
+
+        ids = np.concatenate(ids)
+        docs, inverse = np.unique(ids, return_inverse=True)
+        scores = np.bincount(inverse, weights=np.concatenate(weights), minlength=len(docs))
+        return docs.astype(np.int64), scores.astype(np.float32)
+
+    def score_rows(self, query: str, rows: np.ndarray) -> np.ndarray:
+        """Scores BM25 de profils donnés (0 pour ceux qui n'ont aucun terme commun)."""
+        docs, doc_scores = self.scores(query)
+        out = np.zeros(len(rows), dtype=np.float32)
+        if len(docs):
+            pos = np.minimum(np.searchsorted(docs, rows), len(docs) - 1)
+            hit = docs[pos] == rows
+            out[hit] = doc_scores[pos[hit]]
+        return out
+
+    def search(self, queries: list[str], k: int, mask: np.ndarray | None = None):
+        """
+        Même convention que ExactIndex.search : (scores, ids) de forme (Q, k),
+        complétés par -inf / -1 (profils sans aucun terme commun non retournés).
+        mask : masque booléen (N,) des profils autorisés, optionnel.
+        """
+        k = max(int(k), 0)  # top_k <= 0 : résultats vides
+        scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        ids = np.full((len(queries), k), -1, dtype=np.int64)
+
+        for q, query in enumerate(queries):
+            docs, doc_scores = self.scores(query)
+            if mask is not None:
+                keep = mask[docs]
+                docs, doc_scores = docs[keep], doc_scores[keep]
+
+            best = top_k_indices(doc_scores, k)
+            scores[q, :len(best)] = doc_scores[best]
+            ids[q, :len(best)] = docs[best]
+
+        return scores, ids
+
+
+def reciprocal_rank_fusion(rankings: list[np.ndarray], k: int, rrf_k: int = 60):
+    """
+    Fusion RRF de plusieurs classements (ids triés, -1 = vide) :
+    score(d) = somme sur les classements de 1 / (rrf_k + rang(d)).
+    Retourne (scores, ids) des k meilleurs profils, triés par score décroissant.
+    """
+    ids = np.concatenate([r[r >= 0] for r in rankings])
+    ranks = np.concatenate([np.flatnonzero(r >= 0) + 1 for r in rankings])
+    if len(ids) == 0:
+        return np.empty(0, dtype=np.float32), np.empty(0, dtype=np.int64)
+
+    docs, inverse = np.unique(ids, return_inverse=True)
+    fused = np.bincount(inverse, weights=1.0 / (rrf_k + ranks), minlength=len(docs))
+    best = top_k_indices(fused, k)
+    return fused[best].astype(np.float32), docs[best]
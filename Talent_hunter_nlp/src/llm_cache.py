@@ -0,0 +1,156 @@
+# cache persistant des résultats LLM (SQLite)
+"""
+llm_cache.py
+Cache persistant des réponses du LLM (compétences, résumés, scores).
+
+Clé = empreinte (type de résultat, modèle, version du prompt, texte du profil,
+[description de poste]) : changer de modèle ou de prompt invalide le cache.
+Éviction par TTL et par nombre maximal d'entrées (les moins récemment lues partent).
+
+get() ne fait que lire (il est appelé depuis la boucle d'événements de l'API) :
+les dates de dernière lecture sont gardées en mémoire et écrites avec la
+prochaine écriture (set, éviction ou fermeture).
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(str(text).encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    # Fréquence des passes d'éviction (toutes les N écritures)
+    evict_every = 100
+
+    def __init__(self, path: str, max_entries: int = 200_000, ttl_seconds: float | None = None):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = {}
+        self.misses = {}
+        self._writes = 0
+        # key -> date de dernière lecture, en attente d'écriture
+        self._touched = {}
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_access ON llm_cache(last_access)")
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(kind: str, model: str, prompt_version: int, *parts: str) -> str:
+        """parts : textes d'entrée (profil, puis éventuellement description de poste)."""
+        material = [kind, model, str(prompt_version)] + [text_hash(p) for p in parts]
+        return text_hash("\0".join(material))
+
+    def get(self, kind: str, key: str):
+        """Valeur décodée (JSON) ou None si absente / expirée."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            # Entrée expirée : absente pour l'appelant, supprimée à la prochaine éviction
+            if row is not None and self.ttl_seconds and now - row[1] > self.ttl_seconds:
+                row = None
+
+            if row is None:
+                self.misses[kind] = self.misses.get(kind, 0) + 1
+                return None
+
+            self._touched[key] = now
+            self.hits[kind] = self.hits.get(kind, 0) + 1
+        return json.loads(row[0])
+
+    def set(self, kind: str, key: str, value):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, kind, value, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, kind, json.dumps(value, ensure_ascii=False), now, now),
+            )
+            self._touched.pop(key, None)
+            self._write_touched()
+            self._conn.commit()
+            self._writes += 1
+            if self._writes % self.evict_every == 0:
+                self._evict(now)
+
+    def _write_touched(self):
+        """Dates de lecture en attente, dans la transaction en cours (pas de commit ici)."""
+        if self._touched:
+            self._conn.executemany(
+                "UPDATE llm_cache SET last_access = ? WHERE key = ?",
+                [(at, key) for key, at in self._touched.items()],
+            )
+            self._touched = {}
+
+    def _evict(self, now: float):
+        self._write_touched()
+        if self.ttl_seconds:
+            self._conn.execute(
+                "DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl_seconds,)
+            )
+        count = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        if count > self.max_entries:
+            self._conn.execute(
+                "DELETE FROM llm_cache WHERE key IN "
+                "(SELECT key FROM llm_cache ORDER BY last_access LIMIT ?)",
+                (count - self.max_entries,),
+            )
+        self._conn.commit()
+
+    def evict(self):
+        with self._lock:
+            self._evict(time.time())
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = dict(
+                self._conn.execute("SELECT kind, COUNT(*) FROM llm_cache GROUP BY kind").fetchall()
+            )
+        kinds = sorted(set(self.hits) | set(self.misses) | set(entries))
+        by_kind = {}
+        for kind in kinds:
+            hits, misses = self.hits.get(kind, 0), self.misses.get(kind, 0)
+            by_kind[kind] = {
+                "entries": entries.get(kind, 0),
+                "hits": hits,
+                "misses": misses,
+                "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+            }
+        total_hits, total_misses = sum(self.hits.values()), sum(self.misses.values())
+        return {
+            "entries": sum(entries.values()),
+            "max_entries": self.max_entries,
+            "hits": total_hits,
+            "misses": total_misses,
+            "hit_rate": total_hits / (total_hits + total_misses) if total_hits + total_misses else 0.0,
+            "by_kind": by_kind,
+        }
+
+    def close(self):
+        with self._lock:
+            self._write_touched()
+            self._conn.commit()
+            self._conn.close()
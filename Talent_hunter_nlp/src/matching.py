@@ -1,27 +1,92 @@
 import os
+import threading
+import time
 import numpy as np
 import pandas as pd
-from sentence_transformers import SentenceTransformer
+
+# Lancé comme script (python src/matching.py) : imports relatifs résolus via le paquet src
+if __package__ in (None, ""):
+    import sys
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    __package__ = "src"
+
+from .ann_index import ExactIndex, load_index
+from .artifacts import PROFILE_INDEX_COLUMNS, read_artifact_or_csv
+from .config import (
+    ANN_FILTER_MIN_FRACTION,
+    EMBEDDING_MODEL_NAME,
+    EMBEDDINGS_DTYPE,
+    ENCODER_BACKEND,
+    EMBEDDINGS_MMAP,
+    HNSW_EF_SEARCH,
+    HYBRID_CANDIDATES,
+    IVF_NPROBE,
+    QUERY_CACHE_PATH,
+    QUERY_CACHE_SIZE,
+    RRF_K,
+    SEARCH_MODE,
+)
+from .embedding_store import EmbeddingStore
+from .encoders import load_encoder
+from .filter_index import FilterIndex
+from .lexical_index import BM25Index, reciprocal_rank_fusion
+from .metrics import QUERY_CACHE, timer
+from .query_cache import QueryEmbeddingCache
+from .snapshots import current_version, read_metadata, shard_dir, snapshot_dir
+
+
+SEARCH_MODES = ("dense", "lexical", "hybrid")
 
 
 def get_base_dir():
     return os.path.dirname(os.path.dirname(__file__))
 
 
-class TalentSearcher:
-    def __init__(self, model_name: str = "sentence-transformers/all-MiniLM-L6-v2"):
-        base_dir = get_base_dir()
-        processed_dir = os.path.join(base_dir, "data", "processed")
+class SearchSnapshot:
+    """
+    Une version chargée de l'index (embeddings, profils, filtres, index ANN et BM25).
+    En lecture seule : une requête garde la même version du début à la fin,
+    même si TalentSearcher bascule sur une autre entre-temps.
+    shard : ne charge qu'une partition de la version (recherche répartie, voir sharding.py).
+    """
 
-        self.embeddings_path = os.path.join(processed_dir, "profiles_embeddings.npy")
-        self.index_path = os.path.join(processed_dir, "profiles_index.csv")
+    def __init__(
+        self,
+        processed_dir: str,
+        use_ann: bool = True,
+        embeddings_dtype: str = EMBEDDINGS_DTYPE,
+        mmap: bool = EMBEDDINGS_MMAP,
+        index_columns: list[str] = PROFILE_INDEX_COLUMNS,
+        shard: int | None = None,
+    ):
+        self.version = current_version(processed_dir)
+        directory = snapshot_dir(processed_dir, self.version)
+        self.metadata = read_metadata(directory)
+        self.shard = shard
+        if shard is not None:
+            n_shards = len(self.metadata.get("shards", []))
+            if not 0 <= shard < n_shards:
+                raise ValueError(f"Shard {shard} absent de la version {self.version} ({n_shards} shards)")
+            directory = shard_dir(directory, shard)
+
+        self.embeddings_path = os.path.join(directory, "profiles_embeddings.npy")
+        self.index_path = os.path.join(directory, "profiles_index.parquet")
+        self.index_csv_path = os.path.join(directory, "profiles_index.csv")
+        self.ann_index_path = os.path.join(directory, "profiles_embeddings.faiss")
+        self.lexical_index_path = os.path.join(directory, "profiles_bm25.npz")
+
+        print(f"[INFO] Chargement de la version {self.version} de l'index : {directory}")
 
         # Chargement des embeddings et de l'index
-        print(f"[INFO] Chargement des embeddings depuis : {self.embeddings_path}")
-        self.embeddings = np.load(self.embeddings_path)
+        # EmbeddingStore : float32 / float16 / int8, éventuellement en memory-map
+        print(f"[INFO] Chargement des embeddings ({embeddings_dtype}) depuis : {self.embeddings_path}")
+        self.embeddings = EmbeddingStore.load(self.embeddings_path, dtype=embeddings_dtype, mmap=mmap)
 
         print(f"[INFO] Chargement de l'index depuis : {self.index_path}")
-        self.index_df = pd.read_csv(self.index_path)
+        self.index_df = read_artifact_or_csv(
+            self.index_path, self.index_csv_path, columns=list(index_columns), kind="profiles_index"
+        )
 
         if len(self.embeddings) != len(self.index_df):
             raise ValueError(
@@ -31,52 +96,386 @@ class TalentSearcher:
 
         print(f"[INFO] Nombre de profils chargés : {len(self.index_df)}")
 
+        # Filtres précalculés (bitsets par langage + stars triées)
+        self.filters = FilterIndex(self.index_df)
+
+        # Index : la recherche exacte sert de repli et de référence pour le rappel
+        self.exact_index = ExactIndex(self.embeddings)
+        self.ann_index = None
+        if use_ann:
+            self.ann_index = load_index(
+                self.ann_index_path, nprobe=IVF_NPROBE, ef_search=HNSW_EF_SEARCH, mmap=mmap
+            )
+            if self.ann_index is not None and len(self.ann_index) != len(self.embeddings):
+                print("[ATTENTION] Index ANN désynchronisé des embeddings : recherche exacte.")
+                self.ann_index = None
+        if self.ann_index is not None:
+            print(f"[INFO] Index ANN chargé ({self.ann_index.kind}) : {self.ann_index_path}")
+        else:
+            print("[INFO] Pas d'index ANN : recherche exacte.")
+
+        # Index lexical BM25 (absent pour les runs plus anciens : modes dense uniquement)
+        self.lexical_index = BM25Index.load(self.lexical_index_path)
+        if self.lexical_index is not None and len(self.lexical_index) != len(self.index_df):
+            print("[ATTENTION] Index BM25 désynchronisé de l'index des profils : ignoré.")
+            self.lexical_index = None
+        if self.lexical_index is not None:
+            print(f"[INFO] Index BM25 chargé ({len(self.lexical_index.vocabulary)} termes)")
+        else:
+            print("[INFO] Pas d'index BM25 : recherche dense uniquement.")
+
+    def resolve_filters(self, filters: dict):
+        """Bitset empaqueté et masque booléen des profils autorisés (None, None sans filtre)."""
+        # Résolution des filtres : opérations bit à bit + recherche dichotomique
+        with timer("search.filters"):
+            bitmap = self.filters.bitmap(
+                filters.get("min_stars"),
+                filters.get("language_filter"),
+                filters.get("language_mode", "any"),
+            )
+            mask = None if bitmap is None else self.filters.unpack(bitmap)
+        return bitmap, mask
+
+    def dense_search(self, query_embs: np.ndarray, k: int, bitmap=None, mask=None):
+        """Top k par similarité cosinus : (scores, ids) de forme (Q, k), ids -1 en bout si moins de k."""
+        # Filtre très sélectif : la similarité exacte sur le sous-ensemble est moins chère
+        use_ann = self.ann_index is not None and (
+            mask is None or mask.sum() >= ANN_FILTER_MIN_FRACTION * len(mask)
+        )
+
+        # Similarité cosinus = produit scalaire (embeddings normalisés),
+        # puis sélection partielle des top_k sur le tableau de scores
+        with timer("search.dense"):
+            if use_ann:
+                return self.ann_index.search(query_embs, k, bitmap=bitmap)
+            return self.exact_index.search(query_embs, k, mask=mask)
+
+    def fuse(self, job_description, query_emb, dense_ids, lexical_ids, top_k) -> pd.DataFrame:
+        """Fusion RRF des classements dense et lexical, puis scores bruts des profils retenus."""
+        fused, ids = reciprocal_rank_fusion([dense_ids, lexical_ids], top_k, rrf_k=RRF_K)
+        # Cosinus et BM25 recalculés sur les seuls gagnants (certains n'apparaissent que d'un côté)
+        similarity = self.embeddings.dot(query_emb[None, :], ids)[0]
+        bm25 = self.lexical_index.score_rows(job_description, ids)
+        return self.build_results(similarity, ids, {"bm25": bm25, "hybrid_score": fused})
+
+    def build_results(
+        self, scores: np.ndarray | None, ids: np.ndarray, extra: dict | None = None
+    ) -> pd.DataFrame:
+        """
+        Seules les lignes gagnantes (déjà triées) sont extraites de l'index.
+        scores : similarité cosinus (None en mode lexical) ; extra : autres colonnes de score.
+        """
+        found = ids >= 0
+        df = self.index_df.iloc[ids[found]].copy()
+        # Colonnes catégorielles (dictionnaires Parquet) -> valeurs simples pour la sortie
+        for col in df.select_dtypes("category").columns:
+            df[col] = df[col].astype(object)
+        if scores is not None:
+            df["similarity"] = scores[found]
+        for col, values in (extra or {}).items():
+            df[col] = values[found]
+        return df.reset_index(drop=True)
+
+
+class QueryEncoder:
+    """Modèle d'encodage des requêtes + cache LRU des embeddings (TalentSearcher, ShardedSearcher)."""
+
+    def __init__(
+        self,
+        model_name: str = EMBEDDING_MODEL_NAME,
+        encoder_backend: str = ENCODER_BACKEND,
+        query_cache_size: int = QUERY_CACHE_SIZE,
+        query_cache_path: str | None = QUERY_CACHE_PATH,
+    ):
         # Chargement du modèle NLP
-        print(f"[INFO] Chargement du modèle : {model_name}")
-        self.model = SentenceTransformer(model_name)
+        print(f"[INFO] Chargement du modèle : {model_name} (backend {encoder_backend})")
+        self.model = load_encoder(encoder_backend, model_name)
+
+        # Cache LRU texte normalisé -> embedding (évite de ré-encoder les mêmes requêtes)
+        # Il est lié au modèle et au backend (fingerprint) qui ont produit les vecteurs
+        self.cache = QueryEmbeddingCache(
+            max_size=query_cache_size, path=query_cache_path, model_name=self.model.fingerprint
+        )
+
+    @property
+    def fingerprint(self) -> str:
+        return self.model.fingerprint
+
+    def encode(self, job_descriptions: list[str]) -> np.ndarray:
+        """
+        Embeddings normalisés des requêtes, via le cache LRU : seules les requêtes
+        absentes du cache passent par le modèle (en un seul forward batché).
+        """
+        keys = [QueryEmbeddingCache.normalize(jd) for jd in job_descriptions]
+        found = {key: self.cache.get(key) for key in dict.fromkeys(keys)}
+        missing = [key for key, emb in found.items() if emb is None]
+        QUERY_CACHE.inc(len(found) - len(missing), result="hit")
+        QUERY_CACHE.inc(len(missing), result="miss")
+
+        if missing:
+            embs = self.model.encode(missing, batch_size=64)
+            for key, emb in zip(missing, embs):
+                found[key] = emb
+                self.cache.put(key, emb)
+
+        return np.stack([found[key] for key in keys])
+
+    def save(self):
+        self.cache.save()
+
+
+class SnapshotHolder:
+    """
+    Version de l'index en service et bascule sans redémarrage vers la version courante
+    (TalentSearcher, et chaque shard de la recherche répartie).
+    """
+
+    def __init__(self, processed_dir: str, **snapshot_args):
+        self.processed_dir = processed_dir
+        self._snapshot_args = snapshot_args
+        self._snapshot = SearchSnapshot(processed_dir, **snapshot_args)
+        self._reload_lock = threading.Lock()
+        self._watch_stop = threading.Event()
+        self._watch_thread = None
+        # Appelées après chaque bascule, avec la nouvelle version (ex. textes des profils de l'API)
+        self.reload_callbacks = []
+
+    # Accès à la version en service (les anciens attributs de TalentSearcher)
+    @property
+    def snapshot(self) -> SearchSnapshot:
+        return self._snapshot
+
+    @property
+    def version(self) -> str:
+        return self._snapshot.version
+
+    @property
+    def index_df(self) -> pd.DataFrame:
+        return self._snapshot.index_df
+
+    @property
+    def embeddings(self) -> EmbeddingStore:
+        return self._snapshot.embeddings
+
+    @property
+    def filters(self) -> FilterIndex:
+        return self._snapshot.filters
+
+    @property
+    def exact_index(self) -> ExactIndex:
+        return self._snapshot.exact_index
+
+    @property
+    def ann_index(self):
+        return self._snapshot.ann_index
+
+    @property
+    def lexical_index(self) -> BM25Index | None:
+        return self._snapshot.lexical_index
+
+    def _check_snapshot(self, snapshot: SearchSnapshot):
+        """Contrôle d'une nouvelle version avant la bascule (ValueError pour la refuser)."""
+
+    def reload(self, force: bool = False) -> bool:
+        """
+        Charge la version courante (CURRENT) si elle a changé, puis bascule dessus.
+        Le chargement se fait à côté de la version en service, qui continue de répondre ;
+        la bascule est une simple affectation : les requêtes en cours finissent sur
+        l'ancienne version, libérée quand plus aucune ne l'utilise.
+        Retourne True si la version a changé. En cas d'erreur, l'ancienne version reste en service.
+        """
+        with self._reload_lock:
+            version = current_version(self.processed_dir)
+            if version == self._snapshot.version and not force:
+                return False
+
+            start = time.perf_counter()
+            snapshot = SearchSnapshot(self.processed_dir, **self._snapshot_args)
+            self._check_snapshot(snapshot)
+            previous, self._snapshot = self._snapshot, snapshot
+            print(
+                f"[OK] Index basculé de la version {previous.version} à {snapshot.version} "
+                f"({time.perf_counter() - start:.1f}s de chargement)"
+            )
+
+        for callback in self.reload_callbacks:
+            callback(snapshot)
+        return True
+
+    def start_watch(self, interval: float):
+        """Vérifie CURRENT toutes les interval secondes (thread) et recharge si besoin."""
+        if self._watch_thread is not None:
+            return
+        self._watch_stop.clear()
+
+        def watch():
+            while not self._watch_stop.wait(interval):
+                try:
+                    self.reload()
+                except Exception as e:
+                    print(f"[ERREUR] Rechargement de l'index : {e}")
+
+        self._watch_thread = threading.Thread(target=watch, name="snapshot-watch", daemon=True)
+        self._watch_thread.start()
+
+    def stop_watch(self):
+        self._watch_stop.set()
+        if self._watch_thread is not None:
+            self._watch_thread.join()
+            self._watch_thread = None
+
+
+class TalentSearcher(SnapshotHolder):
+    def __init__(
+        self,
+        model_name: str = EMBEDDING_MODEL_NAME,
+        use_ann: bool = True,
+        query_cache_size: int = QUERY_CACHE_SIZE,
+        query_cache_path: str | None = QUERY_CACHE_PATH,
+        embeddings_dtype: str = EMBEDDINGS_DTYPE,
+        mmap: bool = EMBEDDINGS_MMAP,
+        index_columns: list[str] = PROFILE_INDEX_COLUMNS,
+        encoder_backend: str = ENCODER_BACKEND,
+        search_mode: str = SEARCH_MODE,
+        base_dir: str | None = None,
+    ):
+        """
+        index_columns : colonnes de l'index chargées (projection à la lecture du Parquet).
+        encoder_backend : "torch", "onnx" ou "hash" pour l'encodage des requêtes (voir encoders.py).
+        search_mode : mode par défaut de search / search_many ("dense", "lexical", "hybrid").
+        base_dir : racine contenant data/processed (défaut : le projet).
+
+        L'index chargé est la version courante de data/processed (voir snapshots.py) ;
+        reload() ou start_watch() basculent sur une version plus récente sans redémarrage.
+        """
+        if search_mode not in SEARCH_MODES:
+            raise ValueError(f"search_mode doit être parmi {SEARCH_MODES}")
+        self.search_mode = search_mode
+
+        base_dir = base_dir or get_base_dir()
+        super().__init__(
+            os.path.join(base_dir, "data", "processed"),
+            use_ann=use_ann,
+            embeddings_dtype=embeddings_dtype,
+            mmap=mmap,
+            index_columns=list(index_columns),
+        )
+
+        self.query_encoder = QueryEncoder(model_name, encoder_backend, query_cache_size, query_cache_path)
+        self.model = self.query_encoder.model
+        self.query_cache = self.query_encoder.cache
+        self._check_encoder(self._snapshot, strict=False)
+
+    def _check_encoder(self, snapshot: SearchSnapshot, strict: bool = True):
+        """La version doit avoir été encodée par le même modèle / backend que les requêtes."""
+        encoder = snapshot.metadata.get("encoder")
+        if encoder is None or encoder == self.model.fingerprint:
+            return
+        message = (
+            f"Version {snapshot.version} encodée avec {encoder}, "
+            f"requêtes encodées avec {self.model.fingerprint}"
+        )
+        if strict:
+            raise ValueError(message)
+        print(f"[ATTENTION] {message}")
+
+    def _check_snapshot(self, snapshot: SearchSnapshot):
+        self._check_encoder(snapshot)
 
     def search(
         self,
         job_description: str,
         top_k: int = 5,
         min_stars: int | None = None,
-        language_filter: str | None = None,
+        language_filter: str | list[str] | None = None,
+        language_mode: str = "any",
+        search_mode: str | None = None,
     ):
         """
         Retourne les top_k profils les plus pertinents pour une description de poste,
-        avec filtres optionnels sur les stars et le langage.
+        avec filtres optionnels sur les stars et le(s) langage(s).
+        language_mode : "any" (au moins un des langages) ou "all" (tous).
+        search_mode : "dense", "lexical" ou "hybrid" (défaut : celui du searcher).
         """
         if not job_description or not job_description.strip():
             raise ValueError("La description de poste est vide.")
 
-        # Encodage de la description du poste
-        query_emb = self.model.encode(
-            [job_description],
-            convert_to_numpy=True,
-            normalize_embeddings=True,
-        )[0]  # vecteur 1D
+        filters = {
+            "min_stars": min_stars,
+            "language_filter": language_filter,
+            "language_mode": language_mode,
+        }
+        return self.search_many(
+            [job_description], top_k=top_k, filters=filters, search_mode=search_mode
+        )[0]
 
-        # Similarité cosinus = produit scalaire (embeddings normalisés)
-        similarities = np.dot(self.embeddings, query_emb)  # (N,)
+    def search_many(
+        self,
+        job_descriptions: list[str],
+        top_k: int = 5,
+        filters: dict | None = None,
+        search_mode: str | None = None,
+    ) -> list[pd.DataFrame]:
+        """
+        Classe plusieurs descriptions de poste en un seul appel : un seul passage
+        du modèle pour toutes les requêtes, un produit matrice-matrice pour les scores
+        et une sélection top_k vectorisée par requête.
+        filters : {"min_stars", "language_filter", "language_mode"}, communs à toutes les requêtes.
+        search_mode : "dense" (cosinus), "lexical" (BM25) ou "hybrid" (fusion RRF des deux
+        classements, colonnes similarity, bm25 et hybrid_score). Sans index BM25, "hybrid"
+        retombe sur "dense".
+        Retourne une liste de DataFrames (un par description, dans le même ordre).
+        """
+        empty = [i for i, jd in enumerate(job_descriptions) if not jd or not jd.strip()]
+        if empty:
+            raise ValueError(f"Description(s) de poste vide(s) aux positions : {empty}")
+        if not job_descriptions:
+            return []
 
-        # On met tout dans un DataFrame pour filtrer facilement
-        df = self.index_df.copy()
-        df["similarity"] = similarities
+        filters = filters or {}
+        # Une seule version de l'index pour toute la requête (même si reload() bascule entre-temps)
+        snap = self._snapshot
+        search_mode = search_mode or self.search_mode
+        if search_mode not in SEARCH_MODES:
+            raise ValueError(f"search_mode doit être parmi {SEARCH_MODES}")
+        if search_mode != "dense" and snap.lexical_index is None:
+            if search_mode == "lexical":
+                raise ValueError("Recherche lexicale impossible : index BM25 absent (relancer embedding.py).")
+            search_mode = "dense"
 
-        # Filtre sur les stars
-        if min_stars is not None and "total_stars" in df.columns:
-            df = df[df["total_stars"] >= min_stars]
+        bitmap, mask = snap.resolve_filters(filters)
 
-        # Filtre sur le langage
-        if language_filter and "languages_list" in df.columns:
-            lf = language_filter.lower()
-            df = df[df["languages_list"].fillna("").str.lower().str.contains(lf)]
+        if search_mode == "lexical":
+            # Pas d'encodage : seules les postings des termes des requêtes sont lues
+            with timer("search.lexical"):
+                scores, ids = snap.lexical_index.search(job_descriptions, top_k, mask=mask)
+            with timer("search.results"):
+                return [snap.build_results(None, i, {"bm25": s}) for s, i in zip(scores, ids)]
 
-        # Tri par similarité + top_k
-        df = df.sort_values("similarity", ascending=False)
-        df = df.head(min(top_k, len(df)))
+        with timer("search.encode"):
+            query_embs = self.encode_queries(job_descriptions)  # (Q, d)
 
-        return df.reset_index(drop=True)
+        depth = top_k if search_mode == "dense" else max(top_k, HYBRID_CANDIDATES)
+        scores, ids = snap.dense_search(query_embs, depth, bitmap, mask)
+
+        if search_mode == "dense":
+            with timer("search.results"):
+                return [snap.build_results(s, i) for s, i in zip(scores, ids)]
+
+        with timer("search.lexical"):
+            _, lexical_ids = snap.lexical_index.search(job_descriptions, depth, mask=mask)
+        with timer("search.fusion"):
+            return [
+                snap.fuse(job_descriptions[q], query_embs[q], ids[q], lexical_ids[q], top_k)
+                for q in range(len(job_descriptions))
+            ]
+
+    def encode_queries(self, job_descriptions: list[str]) -> np.ndarray:
+        return self.query_encoder.encode(job_descriptions)
+
+    def save_query_cache(self):
+        """Persiste le cache des requêtes (appelé à l'arrêt de l'API)."""
+        self.query_encoder.save()
 
 
 def main():
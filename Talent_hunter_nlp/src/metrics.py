@@ -0,0 +1,246 @@
+# métriques de latence et compteurs (format texte Prometheus)
+"""
+metrics.py
+Instrumentation sans dépendance externe :
+
+- Counter / Histogram avec labels, thread-safe, rendus au format texte Prometheus
+  (exposés par GET /metrics dans api/main.py)
+- timer(stage) : chronomètre une étape dans l'histogramme talent_hunter_stage_seconds
+  et, si une requête a demandé le détail (request_timings), dans son propre relevé
+- le relevé par requête suit le contexte (contextvars) : il traverse run_in_threadpool
+  et les tâches asyncio créées pendant la requête
+
+Les valeurs sont propres au processus (un relevé par worker uvicorn).
+"""
+
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels: dict) -> tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} : labels attendus {self.labelnames}, reçus {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._render_one(key, value))
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def _render_one(self, key, value):
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # [compteurs par borne (non cumulés), somme, nombre]
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    def _render_one(self, key, state):
+        counts, total, n = state
+        lines, cumulative = [], 0
+        for bound, count in zip(self.buckets, counts):
+            cumulative += count
+            labels = _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"')
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(self.labelnames, key, 'le="+Inf"')
+        lines.append(f"{self.name}_bucket{labels} {n}")
+        plain = _format_labels(self.labelnames, key)
+        lines.append(f"{self.name}_sum{plain} {_format_value(total)}")
+        lines.append(f"{self.name}_count{plain} {n}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Métrique {name} déjà déclarée avec un autre type.")
+            return metric
+
+    def counter(self, name: str, help: str, labelnames=()) -> Counter:
+        return self._get_or_create(Counter, name, help, labelnames)
+
+    def histogram(self, name: str, help: str, labelnames=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, help, labelnames, buckets=buckets)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = [self._metrics[name] for name in sorted(self._metrics)]
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# Métriques partagées par les modules instrumentés
+STAGE_SECONDS = REGISTRY.histogram(
+    "talent_hunter_stage_seconds", "Durée de chaque étape (recherche, LLM, API).", ["stage"]
+)
+REQUEST_SECONDS = REGISTRY.histogram(
+    "talent_hunter_request_seconds", "Durée totale des requêtes HTTP.", ["endpoint"]
+)
+QUERY_CACHE = REGISTRY.counter(
+    "talent_hunter_query_cache_total", "Cache des embeddings de requêtes (hit / miss).", ["result"]
+)
+LLM_CALLS = REGISTRY.counter(
+    "talent_hunter_llm_calls_total", "Appels au LLM par type de prompt et issue.", ["kind", "status"]
+)
+LLM_TOKENS = REGISTRY.counter(
+    "talent_hunter_llm_tokens_total", "Tokens consommés par le LLM (prompt / completion).", ["kind", "type"]
+)
+LLM_CACHE = REGISTRY.counter(
+    "talent_hunter_llm_cache_total", "Cache des résultats LLM (hit / miss) par type.", ["kind", "result"]
+)
+LLM_INVALID_SCORES = REGISTRY.counter(
+    "talent_hunter_llm_invalid_scores_total", "Scores LLM illisibles (remplacés par un score de repli)."
+)
+SHARD_ERRORS = REGISTRY.counter(
+    "talent_hunter_shard_errors_total", "Shards en échec ou hors délai (recherche répartie).", ["shard"]
+)
+
+# Relevé des durées de la requête en cours : {étape: [secondes, nombre]} ou None
+_request_timings = contextvars.ContextVar("request_timings", default=None)
+
+
+def render() -> str:
+    return REGISTRY.render()
+
+
+@contextmanager
+def timer(stage: str):
+    """Chronomètre le bloc : histogramme global + relevé de la requête en cours s'il existe."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.observe(elapsed, stage=stage)
+        timings = _request_timings.get()
+        if timings is not None:
+            entry = timings.setdefault(stage, [0.0, 0])
+            entry[0] += elapsed
+            entry[1] += 1
+
+
+@contextmanager
+def request_timings(enabled: bool = True, timings: dict | None = None):
+    """
+    Active le relevé par requête pour le bloc (et les tâches / threads lancés dedans).
+    Produit un dict {étape: {"total_ms", "count"}} rempli à la sortie du bloc.
+    Les étapes concurrentes (appels LLM en parallèle) sont additionnées :
+    leur total peut dépasser la durée de la requête.
+    timings : relevé brut à prolonger (requête découpée en plusieurs blocs, ex. un flux).
+    """
+    report = {}
+    if not enabled:
+        yield report
+        return
+
+    timings = {} if timings is None else timings
+    token = _request_timings.set(timings)
+    try:
+        yield report
+    finally:
+        try:
+            _request_timings.reset(token)
+        except ValueError:
+            pass  # générateur fermé depuis un autre contexte (flux abandonné) : rien à restaurer
+        report.update(timings_report(timings))
+
+
+def timings_report(timings: dict) -> dict:
+    return {
+        stage: {"total_ms": round(seconds * 1000, 3), "count": count}
+        for stage, (seconds, count) in sorted(timings.items())
+    }
+
+
+def current_timings() -> dict | None:
+    """Relevé brut de la requête en cours (pour un flux qui l'envoie avant la fin du bloc)."""
+    return _request_timings.get()
+
+
+@contextmanager
+def request_timer(endpoint: str, start: float | None = None):
+    """
+    Durée totale d'une requête HTTP (histogramme talent_hunter_request_seconds).
+    start : perf_counter du début de la requête, s'il précède le bloc (flux).
+    """
+    start = time.perf_counter() if start is None else start
+    try:
+        yield
+    finally:
+        REQUEST_SECONDS.observe(time.perf_counter() - start, endpoint=endpoint)
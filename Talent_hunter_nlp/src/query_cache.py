@@ -0,0 +1,116 @@
+# cache LRU des embeddings de requêtes
+"""
+query_cache.py
+Cache borné (LRU) texte de requête normalisé -> embedding, avec compteurs
+hits / misses et persistance optionnelle sur disque (.npz).
+"""
+
+import json
+import os
+import threading
+import unicodedata
+from collections import OrderedDict
+
+import numpy as np
+
+
+class QueryEmbeddingCache:
+    def __init__(self, max_size: int = 2048, path: str | None = None, model_name: str = ""):
+        self.max_size = max_size
+        self.path = path
+        self.model_name = model_name
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()  # les routes FastAPI synchrones tournent dans des threads
+
+        if self.path:
+            self.load()
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Clé du cache : Unicode NFC + espaces fusionnés."""
+        return " ".join(unicodedata.normalize("NFC", text).split())
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key: str) -> np.ndarray | None:
+        """key doit déjà être normalisée (normalize)."""
+        if self.max_size <= 0:
+            return None
+        with self._lock:
+            emb = self._entries.get(key)
+            if emb is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return emb
+
+    def put(self, key: str, emb: np.ndarray):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = emb
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)  # le moins récemment utilisé
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+    def save(self):
+        """Écrit le cache (du plus ancien au plus récent) de façon atomique."""
+        if not self.path:
+            return
+        with self._lock:
+            keys = list(self._entries)
+            embs = list(self._entries.values())
+        if not keys:
+            return
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp.npz"
+        np.savez(
+            tmp_path,
+            # clés en JSON UTF-8 (octets) : relisibles sans pickle, taille = somme des clés
+            keys=np.frombuffer(json.dumps(keys, ensure_ascii=False).encode("utf-8"), dtype=np.uint8),
+            embeddings=np.stack(embs),
+            model_name=np.array(self.model_name),
+        )
+        os.replace(tmp_path, self.path)
+        print(f"[OK] Cache des requêtes sauvegardé ({len(keys)} entrées) : {self.path}")
+
+    def load(self):
+        """Recharge le cache s'il a été produit par le même modèle."""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            # pas de pickle : un .npz modifié ne doit pas pouvoir exécuter de code
+            # (les anciens caches en tableau d'objets échouent ici et repartent à vide ;
+            # ceux en tableau unicode de largeur fixe restent lisibles)
+            data = np.load(self.path, allow_pickle=False)
+            if str(data["model_name"]) != self.model_name:
+                print("[INFO] Cache des requêtes ignoré (modèle différent).")
+                return
+            keys, embs = data["keys"], data["embeddings"]
+            if keys.dtype == np.uint8:
+                keys = json.loads(keys.tobytes().decode("utf-8"))
+            if len(keys) != len(embs):
+                raise ValueError(f"{len(keys)} clés pour {len(embs)} embeddings")
+        except Exception as e:
+            print(f"[ATTENTION] Cache des requêtes illisible ({e}), on repart à vide.")
+            return
+
+        with self._lock:
+            for key, emb in zip(keys[-self.max_size:], embs[-self.max_size:]):
+                self._entries[str(key)] = emb
+        print(f"[INFO] Cache des requêtes rechargé : {len(self._entries)} entrées.")
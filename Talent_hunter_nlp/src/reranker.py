@@ -0,0 +1,90 @@
+# reranking des candidats par un cross-encoder (CPU)
+"""
+reranker.py
+Étape optionnelle entre la recherche (TalentSearcher) et l'enrichissement LLM :
+
+- un petit cross-encoder (ms-marco-MiniLM-L-6-v2 par défaut) lit chaque paire
+  (description de poste, texte du profil) et donne un score de pertinence
+- tous les candidats sont rescorés en un seul passage batché sur CPU
+- seuls les meilleurs (top_k, et au-dessus de min_score si demandé) partent au LLM
+
+Le score (0-1, sigmoïde du modèle) sert aussi de repli à agent_score quand le LLM échoue.
+"""
+
+import numpy as np
+
+from .config import (
+    ENCODER_THREADS,
+    RERANK_BATCH_SIZE,
+    RERANKER_MAX_LENGTH,
+    RERANKER_MODEL_NAME,
+)
+
+
+class CrossEncoderReranker:
+    def __init__(
+        self,
+        model_name: str = RERANKER_MODEL_NAME,
+        max_length: int = RERANKER_MAX_LENGTH,
+        threads: int = ENCODER_THREADS,
+    ):
+        # Import local : le modèle n'est chargé que si le reranking est utilisé
+        import torch
+        from sentence_transformers import CrossEncoder
+
+        if threads:
+            torch.set_num_threads(threads)
+
+        self.model_name = model_name
+        # Activation identité : predict renvoie les logits bruts, la sigmoïde est appliquée
+        # dans score() quelle que soit la config livrée avec le modèle
+        self.model = CrossEncoder(
+            model_name,
+            max_length=max_length,
+            device="cpu",
+            default_activation_function=torch.nn.Identity(),
+        )
+
+    def score(self, job_description: str, texts: list[str], batch_size: int = RERANK_BATCH_SIZE) -> np.ndarray:
+        """Scores de pertinence entre 0 et 1 (sigmoïde des logits), en un seul appel batché."""
+        if not texts:
+            return np.empty(0, dtype=np.float32)
+        pairs = [(job_description, text) for text in texts]
+        logits = self.model.predict(pairs, batch_size=batch_size, show_progress_bar=False)
+        logits = np.asarray(logits, dtype=np.float32).reshape(len(texts))
+        # même échelle que les scores LLM (0-1) : RERANK_MIN_SCORE et le repli restent comparables
+        return 1.0 / (1.0 + np.exp(-logits))
+
+    def rerank(
+        self,
+        job_description: str,
+        records: list[dict],
+        texts: list[str],
+        top_k: int,
+        min_score: float | None = None,
+    ) -> list[dict]:
+        """
+        Ajoute rerank_score à chaque candidat, trie par score décroissant et ne garde
+        que les top_k premiers (et ceux d'au moins min_score si donné).
+        """
+        scores = self.score(job_description, texts)
+        order = np.argsort(-scores, kind="stable")[:top_k]
+
+        kept = []
+        for i in order:
+            if min_score is not None and scores[i] < min_score:
+                break
+            kept.append({**records[i], "rerank_score": float(scores[i])})
+        return kept
+
+
+_reranker = None
+
+
+def get_reranker() -> CrossEncoderReranker:
+    """Reranker partagé, chargé à la première utilisation."""
+    global _reranker
+    if _reranker is None:
+        print(f"[INFO] Chargement du reranker : {RERANKER_MODEL_NAME}")
+        _reranker = CrossEncoderReranker()
+    return _reranker
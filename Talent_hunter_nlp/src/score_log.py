@@ -0,0 +1,71 @@
+# journal des scores de l'agent (append-only, écrit en arrière-plan)
+"""
+score_log.py
+Journal append-only des agent_score produits par /agent_search.
+
+Les requêtes ne font qu'ajouter des lignes dans un tampon en mémoire ; un thread
+les écrit en fin de fichier CSV à intervalle régulier (write-behind). Plus de
+réécriture complète de profiles_enriched.csv, ni de course entre requêtes.
+Le dernier score de chaque login fait foi (voir eval_metrics.py).
+"""
+
+import os
+import threading
+import time
+
+import pandas as pd
+
+SCORE_LOG_COLUMNS = ["timestamp", "login", "agent_score", "job_hash"]
+
+
+class ScoreLog:
+    def __init__(self, path: str, flush_interval: float = 2.0):
+        self.path = path
+        self.flush_interval = flush_interval
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="score-log", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def record(self, rows: list[dict], job_hash: str = ""):
+        """rows : dicts avec au moins 'login' et 'agent_score'. Non bloquant."""
+        now = time.time()
+        entries = [
+            (now, r["login"], float(r["agent_score"]), job_hash)
+            for r in rows
+            if "agent_score" in r
+        ]
+        with self._lock:
+            self._buffer.extend(entries)
+
+    def flush(self):
+        with self._lock:
+            entries, self._buffer = self._buffer, []
+        if not entries:
+            return
+
+        with self._write_lock:
+            new_file = not os.path.exists(self.path)
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            pd.DataFrame(entries, columns=SCORE_LOG_COLUMNS).to_csv(
+                self.path, mode="a", header=new_file, index=False, encoding="utf-8"
+            )
+
+    def close(self):
+        """Arrête le thread et écrit ce qui reste dans le tampon."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
@@ -0,0 +1,133 @@
+# shards de sortie + checkpoint du scraping GitHub (reprise après crash)
+"""
+scrape_checkpoint.py
+Sortie incrémentale du scraping des repos :
+
+- les repos sont ajoutés au fil de l'eau dans des shards CSV
+  (shard-00000.csv, shard-00001.csv, ...) qui tournent tous les rows_per_shard repos
+- checkpoint.csv (append-only) : login, scraped_at, shard, n_repos, écrit
+  juste après les repos de l'utilisateur. Au redémarrage, on saute les logins
+  déjà faits (ou seulement ceux plus récents que max_age).
+- consolidate() reconstruit github_repos.csv shard par shard : pour chaque login,
+  seules les lignes du shard noté dans le checkpoint (le plus récent) sont gardées.
+
+Chaque exécution ouvre un nouveau shard, donc un utilisateur interrompu avant
+son checkpoint puis re-scrapé n'a jamais de doublons dans le shard retenu.
+La mémoire reste bornée (un shard à la fois), quel que soit le nombre d'utilisateurs.
+"""
+
+import csv
+import glob
+import os
+import time
+
+REPO_COLUMNS = ["owner_login", "repo_name", "description", "language", "stargazers_count", "html_url"]
+CHECKPOINT_COLUMNS = ["login", "scraped_at", "shard", "n_repos"]
+
+
+class ScrapeCheckpoint:
+    def __init__(self, shards_dir: str, rows_per_shard: int = 50_000):
+        self.shards_dir = shards_dir
+        self.rows_per_shard = rows_per_shard
+        self.checkpoint_path = os.path.join(shards_dir, "checkpoint.csv")
+        os.makedirs(shards_dir, exist_ok=True)
+
+        # login -> (scraped_at, shard) : la dernière entrée du checkpoint fait foi
+        self.done = {}
+        if os.path.exists(self.checkpoint_path):
+            with open(self.checkpoint_path, newline="", encoding="utf-8") as f:
+                for row in csv.DictReader(f):
+                    self.done[row["login"]] = (float(row["scraped_at"]), int(row["shard"]))
+
+        existing = self.shard_paths()
+        self._next_shard = self._shard_number(existing[-1]) + 1 if existing else 0
+        self._shard = None
+        self._shard_file = None
+        self._shard_writer = None
+        self._shard_rows = 0
+
+        new_checkpoint = not os.path.exists(self.checkpoint_path)
+        self._checkpoint_file = open(self.checkpoint_path, "a", newline="", encoding="utf-8")
+        self._checkpoint_writer = csv.writer(self._checkpoint_file)
+        if new_checkpoint:
+            self._checkpoint_writer.writerow(CHECKPOINT_COLUMNS)
+            self._checkpoint_file.flush()
+
+    @staticmethod
+    def _shard_number(path: str) -> int:
+        return int(os.path.basename(path)[len("shard-"):-len(".csv")])
+
+    def shard_path(self, shard: int) -> str:
+        return os.path.join(self.shards_dir, f"shard-{shard:05d}.csv")
+
+    def shard_paths(self) -> list[str]:
+        return sorted(glob.glob(os.path.join(self.shards_dir, "shard-*.csv")))
+
+    def pending(self, logins, max_age_seconds: float | None = None):
+        """
+        Logins à (re)scraper : jamais faits, ou faits il y a plus de max_age_seconds.
+        max_age_seconds = None : tout login déjà fait est sauté.
+        """
+        now = time.time()
+        for login in logins:
+            entry = self.done.get(login)
+            if entry is None:
+                yield login
+            elif max_age_seconds is not None and now - entry[0] > max_age_seconds:
+                yield login
+
+    def _open_shard(self):
+        self.close_shard()
+        self._shard = self._next_shard
+        self._next_shard += 1
+        self._shard_file = open(self.shard_path(self._shard), "w", newline="", encoding="utf-8")
+        self._shard_writer = csv.DictWriter(self._shard_file, fieldnames=REPO_COLUMNS)
+        self._shard_writer.writeheader()
+        self._shard_rows = 0
+
+    def record(self, login: str, repos: list[dict]):
+        """Ajoute les repos d'un utilisateur au shard courant, puis le marque comme fait."""
+        if self._shard is None or self._shard_rows >= self.rows_per_shard:
+            self._open_shard()
+
+        self._shard_writer.writerows(repos)
+        self._shard_file.flush()
+        self._shard_rows += len(repos)
+
+        scraped_at = time.time()
+        self._checkpoint_writer.writerow([login, scraped_at, self._shard, len(repos)])
+        self._checkpoint_file.flush()
+        self.done[login] = (scraped_at, self._shard)
+
+    def close_shard(self):
+        if self._shard_file is not None:
+            self._shard_file.close()
+            self._shard_file = None
+            self._shard_writer = None
+
+    def close(self):
+        self.close_shard()
+        self._checkpoint_file.close()
+
+    def consolidate(self, output_path: str) -> int:
+        """
+        Écrit output_path à partir des shards (écriture atomique), en ne gardant
+        pour chaque login que les lignes de son shard le plus récent.
+        Retourne le nombre de repos écrits.
+        """
+        self.close_shard()
+        n_rows = 0
+        tmp_path = output_path + ".tmp"
+        with open(tmp_path, "w", newline="", encoding="utf-8") as out:
+            writer = csv.DictWriter(out, fieldnames=REPO_COLUMNS)
+            writer.writeheader()
+            for path in self.shard_paths():
+                shard = self._shard_number(path)
+                with open(path, newline="", encoding="utf-8") as f:
+                    for row in csv.DictReader(f):
+                        entry = self.done.get(row["owner_login"])
+                        if entry is not None and entry[1] == shard:
+                            writer.writerow(row)
+                            n_rows += 1
+        os.replace(tmp_path, output_path)
+        return n_rows
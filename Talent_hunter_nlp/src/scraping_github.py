@@ -3,6 +3,16 @@ import time
 import requests
 import pandas as pd
 
+# Lancé comme script (python src/scraping_github.py) : imports relatifs résolus via le paquet src
+if __package__ in (None, ""):
+    import sys
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    __package__ = "src"
+
+from .config import GITHUB_MAX_AGE_DAYS, GITHUB_ROWS_PER_SHARD, GITHUB_SHARDS_DIR
+from .scrape_checkpoint import ScrapeCheckpoint
+
 
 # 👉 MET TON TOKEN ICI
 # Exemple : GITHUB_TOKEN = "ghp_xxxxxxxx..."
@@ -48,6 +58,8 @@ def fetch_repos_for_user(login):
     """
     Récupère les repos publics d'un utilisateur via l'API GitHub.
     On limite à 5 repos par user (les plus récents).
+    Retourne None en cas d'erreur temporaire (réseau, rate limit...) : l'utilisateur
+    n'est alors pas marqué comme fait et sera repris au prochain lancement.
     """
     url = f"https://api.github.com/users/{login}/repos"
     params = {
@@ -66,23 +78,23 @@ def fetch_repos_for_user(login):
         r = requests.get(url, headers=headers, params=params, timeout=20)
     except requests.exceptions.RequestException as e:
         print(f"[ERREUR] Problème réseau pour l'utilisateur {login}: {e}")
-        return []
+        return None
 
     if r.status_code == 403:
         print(f"[ERREUR] 403 (rate limit ou accès refusé) pour {login}.")
-        return []
+        return None
     elif r.status_code == 404:
         print(f"[INFO] Utilisateur {login} introuvable (404).")
         return []
     elif r.status_code != 200:
         print(f"[ERREUR] Code HTTP {r.status_code} pour {login}.")
-        return []
+        return None
 
     try:
         repos = r.json()
     except ValueError:
         print(f"[ERREUR] Réponse JSON invalide pour {login}.")
-        return []
+        return None
 
     # On extrait seulement les infos qui nous intéressent
     repos_data = []
@@ -99,37 +111,47 @@ def fetch_repos_for_user(login):
     return repos_data
 
 
-def main():
+def max_age_seconds(max_age_days):
+    return None if max_age_days is None else max_age_days * 86400
+
+
+def main(max_users=30, max_age_days=GITHUB_MAX_AGE_DAYS):
     base_dir = get_base_dir()
     raw_dir = os.path.join(base_dir, "data", "raw")
     os.makedirs(raw_dir, exist_ok=True)
     repos_output_path = os.path.join(raw_dir, "github_repos.csv")
 
     # 1) Charger les utilisateurs Kaggle (par ex. 500 pour commencer)
-    users_df = load_users(max_users=30)
+    users_df = load_users(max_users=max_users)
 
-    all_repos = []
-    total_users = len(users_df)
+    # 2) Reprise : on saute les utilisateurs déjà présents dans le checkpoint
+    checkpoint = ScrapeCheckpoint(GITHUB_SHARDS_DIR, rows_per_shard=GITHUB_ROWS_PER_SHARD)
+    logins = list(checkpoint.pending(users_df["login"].astype(str), max_age_seconds(max_age_days)))
+    total_users = len(logins)
+    print(f"[INFO] {len(users_df) - total_users} utilisateurs déjà faits, {total_users} à traiter.")
 
-    for i, (_, row) in enumerate(users_df.iterrows(), start=1):
-        login = row["login"]
-        print(f"[{i}/{total_users}] Récupération des repos pour : {login}")
+    try:
+        for i, login in enumerate(logins, start=1):
+            print(f"[{i}/{total_users}] Récupération des repos pour : {login}")
 
+            repos = fetch_repos_for_user(login)
+            if repos is not None:
+                checkpoint.record(login, repos)
 
-        repos = fetch_repos_for_user(login)
-        all_repos.extend(repos)
+            # Petit sleep pour être gentils avec l'API (surtout si pas de token)
+            time.sleep(0.5)
+    finally:
+        checkpoint.close_shard()
 
-        # Petit sleep pour être gentils avec l'API (surtout si pas de token)
-        time.sleep(0.5)
+    # 3) Consolidation des shards dans github_repos.csv
+    n_repos = checkpoint.consolidate(repos_output_path)
+    checkpoint.close()
 
-    if not all_repos:
+    if n_repos == 0:
         print("[ATTENTION] Aucune donnée de repo récupérée.")
         return
 
-    repos_df = pd.DataFrame(all_repos)
-    print(f"[INFO] Nombre total de repos récupérés : {len(repos_df)}")
-
-    repos_df.to_csv(repos_output_path, index=False, encoding="utf-8")
+    print(f"[INFO] Nombre total de repos récupérés : {n_repos}")
     print(f"[OK] Données repos sauvegardées dans : {repos_output_path}")
 
 
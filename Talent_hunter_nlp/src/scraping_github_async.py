@@ -0,0 +1,362 @@
+# récupération asynchrone des repos GitHub
+"""
+scraping_github_async.py
+Version asynchrone de scraping_github.py, pour traiter beaucoup d'utilisateurs :
+
+- un seul client HTTP (httpx.AsyncClient) avec pool de connexions keep-alive
+- rythme adaptatif d'après X-RateLimit-Remaining / X-RateLimit-Reset et Retry-After
+- pagination (en-tête Link) jusqu'à max_repos_per_user repos par utilisateur
+- requêtes conditionnelles (ETag / If-None-Match) : un utilisateur inchangé
+  répond 304 et ne consomme pas de quota
+
+base_url (GITHUB_API_URL) et transport sont configurables : on peut pointer le scraper
+sur un faux serveur GitHub, local ou en mémoire (voir github_mock.py).
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+import time
+
+import httpx
+
+# Lancé comme script (python src/scraping_github_async.py) : imports relatifs résolus via le paquet src
+if __package__ in (None, ""):
+    import sys
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    __package__ = "src"
+
+from .config import (
+    DATA_RAW_DIR,
+    GITHUB_API_URL,
+    GITHUB_CONCURRENCY,
+    GITHUB_ETAG_CACHE_PATH,
+    GITHUB_MAX_AGE_DAYS,
+    GITHUB_MAX_REPOS_PER_USER,
+    GITHUB_ROWS_PER_SHARD,
+    GITHUB_SHARDS_DIR,
+)
+from .scrape_checkpoint import ScrapeCheckpoint
+from .scraping_github import GITHUB_TOKEN, load_users, max_age_seconds
+
+
+class RateLimiter:
+    """
+    Suit le quota restant annoncé par GitHub et espace les requêtes en conséquence.
+    Partagé par toutes les tâches (un seul quota par token).
+    """
+
+    def __init__(self, reserve: int = 5, pace_below: int = 200):
+        self.reserve = reserve          # requêtes gardées de côté avant la remise à zéro
+        self.pace_below = pace_below    # en dessous, on étale les requêtes jusqu'au reset
+        self.remaining = None
+        self.reset_at = None
+        self.pause_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def update(self, response: httpx.Response):
+        headers = response.headers
+        if "X-RateLimit-Remaining" in headers:
+            self.remaining = int(headers["X-RateLimit-Remaining"])
+        if "X-RateLimit-Reset" in headers:
+            self.reset_at = float(headers["X-RateLimit-Reset"])
+
+        retry_after = headers.get("Retry-After")
+        if retry_after is not None:
+            self.pause_until = max(self.pause_until, time.time() + float(retry_after))
+        elif response.status_code in (403, 429) and self.remaining == 0 and self.reset_at:
+            self.pause_until = max(self.pause_until, self.reset_at + 1)
+
+    def _delay(self, now: float) -> float:
+        if self.pause_until > now:
+            return self.pause_until - now
+        if self.remaining is None or self.reset_at is None or self.reset_at <= now:
+            return 0.0
+        if self.remaining <= self.reserve:
+            return self.reset_at - now + 1
+        if self.remaining < self.pace_below:
+            # Quota bas : on répartit les requêtes restantes sur la fenêtre
+            return (self.reset_at - now) / (self.remaining - self.reserve)
+        return 0.0
+
+    async def wait(self):
+        # Le verrou sérialise les attentes : une seule tâche dort, les autres suivent
+        async with self._lock:
+            delay = self._delay(time.time())
+            if delay > 0:
+                if delay > 5:
+                    print(f"[INFO] Rate limit : pause de {delay:.0f}s")
+                await asyncio.sleep(delay)
+            if self.remaining is not None:
+                self.remaining -= 1
+
+
+class ETagCache:
+    """
+    url -> (etag, lignes projetées, url suivante) persistant (SQLite), pour les
+    requêtes conditionnelles. Seules les lignes projetées (_repo_rows) sont gardées,
+    pas les réponses brutes de l'API. Chaque page est lue et écrite à part (pas de
+    chargement complet) : la mémoire ne dépend pas du nombre d'utilisateurs.
+    Les écritures sont validées toutes les flush_every entrées (et par save()) :
+    un arrêt brutal en perd au plus autant.
+    """
+
+    def __init__(self, path: str | None, flush_every: int = 500):
+        self.path = path
+        self.flush_every = flush_every
+        self._pending = 0
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # Sans chemin : cache limité au run en cours
+        self._conn = sqlite3.connect(path or ":memory:")
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS etags (
+                url TEXT PRIMARY KEY,
+                etag TEXT NOT NULL,
+                rows TEXT NOT NULL,
+                next_url TEXT
+            )
+            """
+        )
+        self._conn.commit()
+
+    def get(self, url: str) -> dict | None:
+        row = self._conn.execute("SELECT etag, rows, next_url FROM etags WHERE url = ?", (url,)).fetchone()
+        if row is None:
+            return None
+        return {"etag": row[0], "rows": json.loads(row[1]), "next": row[2]}
+
+    def set(self, url: str, etag: str, rows: list[dict], next_url: str | None):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO etags (url, etag, rows, next_url) VALUES (?, ?, ?, ?)",
+            (url, etag, json.dumps(rows), next_url),
+        )
+        self._pending += 1
+        if self._pending >= self.flush_every:
+            self.save()
+
+    def __len__(self):
+        return self._conn.execute("SELECT COUNT(*) FROM etags").fetchone()[0]
+
+    def save(self):
+        """Valide les écritures en attente."""
+        self._conn.commit()
+        self._pending = 0
+
+    def close(self):
+        self.save()
+        self._conn.close()
+
+
+def _repo_rows(login: str, repos: list) -> list[dict]:
+    """Mêmes colonnes que scraping_github.fetch_repos_for_user."""
+    return [
+        {
+            "owner_login": login,
+            "repo_name": repo.get("name", ""),
+            "description": repo.get("description") or "",
+            "language": repo.get("language") or "",
+            "stargazers_count": repo.get("stargazers_count", 0),
+            "html_url": repo.get("html_url", ""),
+        }
+        for repo in repos
+    ]
+
+
+async def _get(client, limiter, url, params=None, etag=None, max_retries=3):
+    """GET avec rythme adaptatif et nouvelles tentatives (rate limit, 5xx, réseau)."""
+    headers = {"If-None-Match": etag} if etag else {}
+    for attempt in range(max_retries + 1):
+        await limiter.wait()
+        try:
+            r = await client.get(url, params=params, headers=headers)
+        except httpx.HTTPError as e:
+            if attempt == max_retries:
+                raise
+            print(f"[INFO] Erreur réseau ({e}), nouvelle tentative...")
+            await asyncio.sleep(2 ** attempt)
+            continue
+
+        limiter.update(r)
+        rate_limited = r.status_code == 429 or (
+            r.status_code == 403 and (limiter.remaining == 0 or "Retry-After" in r.headers)
+        )
+        if (rate_limited or r.status_code >= 500) and attempt < max_retries:
+            if r.status_code >= 500:
+                await asyncio.sleep(2 ** attempt)
+            continue
+        return r
+    return r
+
+
+async def fetch_repos_for_user_async(
+    client: httpx.AsyncClient,
+    limiter: RateLimiter,
+    etags: ETagCache,
+    login: str,
+    max_repos: int = 5,
+) -> list[dict]:
+    """
+    Repos publics d'un utilisateur (les plus récemment mis à jour), pagination comprise.
+    None en cas d'erreur temporaire (comme scraping_github.fetch_repos_for_user).
+    """
+    url = f"/users/{login}/repos"
+    params = {"per_page": min(100, max_repos), "sort": "updated", "direction": "desc"}
+
+    rows = []
+    while url and len(rows) < max_repos:
+        cache_key = str(client.build_request("GET", url, params=params).url)
+        cached = etags.get(cache_key)
+
+        try:
+            r = await _get(client, limiter, url, params=params, etag=cached and cached["etag"])
+        except httpx.HTTPError as e:
+            print(f"[ERREUR] Problème réseau pour l'utilisateur {login}: {e}")
+            return None
+
+        if r.status_code == 304 and cached:
+            page_rows, next_url = cached["rows"], cached["next"]
+        elif r.status_code == 200:
+            try:
+                page_rows = _repo_rows(login, r.json())
+            except ValueError:
+                print(f"[ERREUR] Réponse JSON invalide pour {login}.")
+                return None
+            next_url = r.links.get("next", {}).get("url")
+            if r.headers.get("ETag"):
+                etags.set(cache_key, r.headers["ETag"], page_rows, next_url)
+        elif r.status_code == 404:
+            print(f"[INFO] Utilisateur {login} introuvable (404).")
+            return []
+        else:
+            print(f"[ERREUR] Code HTTP {r.status_code} pour {login}.")
+            return None
+
+        rows.extend(page_rows)
+        # Les URLs "next" contiennent déjà tous les paramètres
+        url, params = next_url, None
+
+    return rows[:max_repos]
+
+
+def make_client(
+    base_url: str = GITHUB_API_URL,
+    token: str | None = GITHUB_TOKEN,
+    concurrency: int = GITHUB_CONCURRENCY,
+    transport: httpx.AsyncBaseTransport | None = None,
+):
+    """transport : transport httpx à utiliser (ex. httpx.MockTransport pour les tests)."""
+    headers = {"Accept": "application/vnd.github+json"}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    return httpx.AsyncClient(
+        base_url=base_url,
+        headers=headers,
+        timeout=20,
+        limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency),
+        transport=transport,
+    )
+
+
+async def scrape_users_async(
+    logins: list[str],
+    max_repos_per_user: int = GITHUB_MAX_REPOS_PER_USER,
+    concurrency: int = GITHUB_CONCURRENCY,
+    base_url: str = GITHUB_API_URL,
+    token: str | None = GITHUB_TOKEN,
+    etag_cache_path: str | None = None,
+    checkpoint: ScrapeCheckpoint | None = None,
+    transport: httpx.AsyncBaseTransport | None = None,
+) -> list[dict]:
+    """
+    Repos de tous les logins, dans l'ordre des logins.
+    Avec un checkpoint, les repos partent dans ses shards au fil de l'eau
+    (mémoire constante) et la liste retournée est vide.
+    transport : voir make_client.
+    """
+    limiter = RateLimiter()
+    etags = ETagCache(etag_cache_path)
+    results = [[] for _ in logins] if checkpoint is None else None
+    queue = asyncio.Queue()
+    for i, login in enumerate(logins):
+        queue.put_nowait((i, login))
+
+    try:
+        async with make_client(base_url, token, concurrency, transport=transport) as client:
+
+            async def worker():
+                while True:
+                    try:
+                        i, login = queue.get_nowait()
+                    except asyncio.QueueEmpty:
+                        return
+                    repos = await fetch_repos_for_user_async(
+                        client, limiter, etags, login, max_repos=max_repos_per_user
+                    )
+                    if repos is None:
+                        continue  # erreur temporaire : repris au prochain lancement
+                    if checkpoint is not None:
+                        checkpoint.record(login, repos)
+                    else:
+                        results[i] = repos
+                    print(f"[{i + 1}/{len(logins)}] {login} : {len(repos)} repos")
+
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+    finally:
+        # Aussi en cas d'interruption : les ETags déjà obtenus restent utilisables
+        etags.close()
+
+    if results is None:
+        return []
+    return [row for rows in results for row in rows]
+
+
+def main(
+    max_users: int = 30,
+    max_repos_per_user: int = GITHUB_MAX_REPOS_PER_USER,
+    concurrency: int = GITHUB_CONCURRENCY,
+    base_url: str = GITHUB_API_URL,
+    etag_cache_path: str | None = GITHUB_ETAG_CACHE_PATH,
+    max_age_days: float | None = GITHUB_MAX_AGE_DAYS,
+):
+    os.makedirs(DATA_RAW_DIR, exist_ok=True)
+    repos_output_path = os.path.join(DATA_RAW_DIR, "github_repos.csv")
+
+    users_df = load_users(max_users=max_users)
+
+    # Reprise : on saute les utilisateurs déjà présents dans le checkpoint
+    checkpoint = ScrapeCheckpoint(GITHUB_SHARDS_DIR, rows_per_shard=GITHUB_ROWS_PER_SHARD)
+    logins = list(checkpoint.pending(users_df["login"].astype(str), max_age_seconds(max_age_days)))
+    print(f"[INFO] {len(users_df) - len(logins)} utilisateurs déjà faits, {len(logins)} à traiter.")
+
+    try:
+        asyncio.run(
+            scrape_users_async(
+                logins,
+                max_repos_per_user=max_repos_per_user,
+                concurrency=concurrency,
+                base_url=base_url,
+                etag_cache_path=etag_cache_path,
+                checkpoint=checkpoint,
+            )
+        )
+    finally:
+        checkpoint.close_shard()
+
+    n_repos = checkpoint.consolidate(repos_output_path)
+    checkpoint.close()
+
+    if n_repos == 0:
+        print("[ATTENTION] Aucune donnée de repo récupérée.")
+        return
+
+    print(f"[INFO] Nombre total de repos récupérés : {n_repos}")
+    print(f"[OK] Données repos sauvegardées dans : {repos_output_path}")
+
+
+if __name__ == "__main__":
+    main()
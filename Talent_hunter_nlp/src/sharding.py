@@ -0,0 +1,654 @@
+# recherche répartie sur plusieurs processus (scatter-gather)
+"""
+sharding.py
+Recherche dense répartie sur les partitions (shards) écrites par embedding.py
+(n_shards > 1) dans data/processed/snapshots/<version>/shards/<i>/ :
+
+- ShardSearcher : une partition de la version courante ; cherche à partir des
+  embeddings des requêtes (pas de modèle) et bascule seul sur les nouvelles versions
+- LocalShardClient : un shard dans son propre processus local (multiprocessing)
+- create_shard_app / HttpShardClient : un shard servi en HTTP (FastAPI, POST /search),
+  un processus uvicorn par shard, éventuellement sur d'autres machines :
+      TALENT_HUNTER_SHARD=0 uvicorn src.sharding:shard_app_from_env --factory --port 8100
+- ShardedSearcher : coordinateur, même interface que TalentSearcher (search, search_many,
+  version, reload, start_watch...) ; encode les requêtes une fois, envoie les embeddings
+  à tous les shards en parallèle et fusionne leurs top_k. L'API l'utilise à la place de
+  TalentSearcher quand N_SHARDS > 1 (ShardedSearcher.from_config)
+
+Chaque shard renvoie ses propres top_k : avec la recherche exacte, le top_k fusionné est
+celui d'un seul processus (avec un index ANN, chaque shard est approximatif).
+Seul le mode dense est réparti (les statistiques BM25 dépendent de tout le corpus) :
+"lexical" et "hybrid" sont refusés (ValueError).
+"""
+
+import base64
+import json
+import multiprocessing as mp
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# Lancé comme script (python src/sharding.py) : imports relatifs résolus via le paquet src
+if __package__ in (None, ""):
+    import sys
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    __package__ = "src"
+
+from .artifacts import PROFILE_INDEX_COLUMNS
+from .config import (
+    EMBEDDING_MODEL_NAME,
+    EMBEDDINGS_DTYPE,
+    EMBEDDINGS_MMAP,
+    ENCODER_BACKEND,
+    N_SHARDS,
+    QUERY_CACHE_PATH,
+    QUERY_CACHE_SIZE,
+    SEARCH_MODE,
+    SHARD_BASE_PORT,
+    SHARD_SERVING,
+    SHARD_TIMEOUT_SECONDS,
+    SHARD_URLS,
+    SNAPSHOT_WATCH_SECONDS,
+)
+from .matching import SEARCH_MODES, QueryEncoder, SnapshotHolder, get_base_dir
+from .metrics import SHARD_ERRORS, timer
+from .snapshots import current_snapshot_dir, read_metadata
+
+
+class ShardSearcher(SnapshotHolder):
+    """Une partition de la version courante de l'index, rechargée à chaque nouvelle version."""
+
+    def __init__(
+        self,
+        shard: int,
+        base_dir: str | None = None,
+        use_ann: bool = True,
+        embeddings_dtype: str = EMBEDDINGS_DTYPE,
+        mmap: bool = EMBEDDINGS_MMAP,
+        index_columns: list[str] = PROFILE_INDEX_COLUMNS,
+    ):
+        self.shard = shard
+        base_dir = base_dir or get_base_dir()
+        super().__init__(
+            os.path.join(base_dir, "data", "processed"),
+            use_ann=use_ann,
+            embeddings_dtype=embeddings_dtype,
+            mmap=mmap,
+            index_columns=list(index_columns),
+            shard=shard,
+        )
+
+    def info(self) -> dict:
+        return {
+            "shard": self.shard,
+            "version": self.version,
+            "encoder": self.snapshot.metadata.get("encoder"),
+            "n_profiles": len(self.index_df),
+        }
+
+    def search(self, query_embs: np.ndarray, top_k: int, filters: dict | None = None):
+        """Top k de la partition pour chaque requête : (version, [DataFrame par requête])."""
+        snap = self.snapshot
+        bitmap, mask = snap.resolve_filters(filters or {})
+        scores, ids = snap.dense_search(query_embs, top_k, bitmap, mask)
+        return snap.version, [snap.build_results(s, i) for s, i in zip(scores, ids)]
+
+
+# --- Shard dans un processus local ---
+
+def _shard_process(conn, shard: int, base_dir: str | None, watch_seconds: float | None):
+    """
+    Boucle d'un processus de shard : (id, commande, arguments) -> (id, statut, valeur).
+    Commandes : "search" (embeddings, top_k, filtres), "reload" (force) et "info".
+    """
+    try:
+        searcher = ShardSearcher(shard, base_dir=base_dir)
+    except Exception as e:
+        conn.send((None, "error", f"{type(e).__name__}: {e}"))
+        return
+    if watch_seconds:
+        searcher.start_watch(watch_seconds)
+    conn.send((None, "ready", searcher.info()))
+
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            break
+        if message is None:
+            break
+        request_id, command, args = message
+        try:
+            if command == "search":
+                value = searcher.search(*args)
+            elif command == "reload":
+                value = {"reloaded": searcher.reload(*args), **searcher.info()}
+            else:
+                value = searcher.info()
+            conn.send((request_id, "ok", value))
+        except ValueError as e:
+            # Requête invalide (filtres, version sans ce shard...) : erreur du client, pas du shard
+            conn.send((request_id, "invalid", str(e)))
+        except Exception as e:
+            conn.send((request_id, "error", f"{type(e).__name__}: {e}"))
+    searcher.stop_watch()
+
+
+class LocalShardClient:
+    """
+    Un shard servi par un processus local (spawn), interrogé par un Pipe.
+    Le processus charge sa partition au démarrage : lancer tous les clients,
+    puis attendre wait_ready() sur chacun, pour charger les shards en parallèle.
+    """
+
+    def __init__(
+        self,
+        shard: int,
+        base_dir: str | None = None,
+        watch_seconds: float | None = SNAPSHOT_WATCH_SECONDS,
+        timeout: float = SHARD_TIMEOUT_SECONDS,
+    ):
+        self.name = f"local-{shard}"
+        self.timeout = timeout
+        ctx = mp.get_context("spawn")
+        self._conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(
+            target=_shard_process,
+            args=(child_conn, shard, base_dir, watch_seconds),
+            name=f"shard-{shard}",
+            daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+        # Un Pipe n'accepte qu'un échange à la fois : les requêtes concurrentes attendent leur tour
+        self._lock = threading.Lock()
+        self._next_id = 0
+        self._info = None
+
+    def wait_ready(self) -> dict:
+        if self._info is None:
+            _, status, payload = self._conn.recv()
+            if status != "ready":
+                raise RuntimeError(f"Shard {self.name} : {payload}")
+            self._info = payload
+        return self._info
+
+    def info(self) -> dict:
+        """Version en service du shard (interrogé à chaque appel : il bascule seul)."""
+        self.wait_ready()
+        return self._send("info")()
+
+    def reload(self, force: bool = False) -> dict:
+        """Demande au shard de charger la version courante : info + "reloaded"."""
+        self.wait_ready()
+        return self._send("reload", force)()
+
+    def submit(self, query_embs: np.ndarray, top_k: int, filters: dict):
+        """Envoie la requête tout de suite ; la fonction retournée attend (version, résultats)."""
+        return self._send("search", query_embs, top_k, filters)
+
+    def _send(self, command: str, *args):
+        """Envoie la commande tout de suite ; la fonction retournée attend la réponse."""
+        self._lock.acquire()
+        try:
+            self._next_id += 1
+            request_id = self._next_id
+            self._conn.send((request_id, command, args))
+        except BaseException:
+            self._lock.release()
+            raise
+
+        def result():
+            try:
+                deadline = time.monotonic() + self.timeout
+                while True:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0 or not self._conn.poll(remaining):
+                        raise TimeoutError(f"Shard {self.name} : pas de réponse en {self.timeout}s")
+                    response_id, status, *payload = self._conn.recv()
+                    # Réponse tardive d'une requête abandonnée (délai dépassé) : ignorée
+                    if response_id == request_id:
+                        break
+            finally:
+                self._lock.release()
+            if status == "invalid":
+                raise ValueError(payload[0])
+            if status != "ok":
+                raise RuntimeError(f"Shard {self.name} : {payload[0]}")
+            return payload[0]
+
+        return result
+
+    def close(self):
+        if self.process.is_alive():
+            try:
+                self._conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+            self.process.join(timeout=5)
+            if self.process.is_alive():
+                self.process.terminate()
+        self._conn.close()
+
+
+# --- Shard servi en HTTP ---
+
+def _encode_embeddings(query_embs: np.ndarray) -> dict:
+    """Embeddings des requêtes en float32 binaire (base64) : exact et compact, contrairement au JSON."""
+    query_embs = np.ascontiguousarray(query_embs, dtype=np.float32)
+    return {"embeddings": base64.b64encode(query_embs.tobytes()).decode("ascii"), "dim": query_embs.shape[1]}
+
+
+def _decode_embeddings(data: str, dim: int) -> np.ndarray:
+    return np.frombuffer(base64.b64decode(data), dtype=np.float32).reshape(-1, dim)
+
+
+def create_shard_app(
+    shard: int,
+    base_dir: str | None = None,
+    watch_seconds: float | None = SNAPSHOT_WATCH_SECONDS,
+):
+    """
+    Application FastAPI d'un shard : GET /healthz, POST /search (embeddings -> top_k),
+    POST /reload (bascule sur la version courante).
+    """
+    from contextlib import asynccontextmanager
+
+    from fastapi import FastAPI, HTTPException
+    from fastapi.responses import Response
+    from pydantic import BaseModel
+
+    state = {}
+
+    @asynccontextmanager
+    async def lifespan(app):
+        # La partition est chargée avant d'accepter des requêtes (un shard n'a rien d'autre à servir)
+        searcher = ShardSearcher(shard, base_dir=base_dir)
+        if watch_seconds:
+            searcher.start_watch(watch_seconds)
+        state["searcher"] = searcher
+        yield
+        searcher.stop_watch()
+
+    app = FastAPI(lifespan=lifespan)
+
+    class ShardSearchRequest(BaseModel):
+        embeddings: str  # float32 (Q x dim) encodés en base64
+        dim: int
+        top_k: int = 5
+        filters: dict = {}
+
+    @app.get("/healthz")
+    def healthz():
+        return state["searcher"].info()
+
+    @app.post("/reload")
+    def reload(force: bool = False):
+        searcher = state["searcher"]
+        try:
+            reloaded = searcher.reload(force)
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        return {"reloaded": reloaded, **searcher.info()}
+
+    @app.post("/search")
+    def search(payload: ShardSearchRequest):
+        searcher = state["searcher"]
+        try:
+            query_embs = _decode_embeddings(payload.embeddings, payload.dim)
+            with timer("shard.search"):
+                version, results = searcher.search(query_embs, payload.top_k, payload.filters)
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        # to_json gère NaN et types numpy ; les résultats sont assemblés sans re-parser
+        body = ",".join(df.to_json(orient="records", force_ascii=False) for df in results)
+        content = f'{{"shard": {shard}, "version": {json.dumps(version)}, "results": [{body}]}}'
+        return Response(content=content, media_type="application/json")
+
+    return app
+
+
+def shard_app_from_env():
+    """Fabrique pour uvicorn --factory : shard lu dans TALENT_HUNTER_SHARD."""
+    return create_shard_app(int(os.environ["TALENT_HUNTER_SHARD"]))
+
+
+class HttpShardClient:
+    """Un shard distant (create_shard_app), interrogé avec httpx."""
+
+    def __init__(self, url: str, timeout: float = SHARD_TIMEOUT_SECONDS, transport=None):
+        import httpx
+
+        self.name = url
+        # Client partagé (keep-alive) ; les appels partent depuis un petit pool de threads
+        self._client = httpx.Client(base_url=url, timeout=timeout, transport=transport)
+        self._executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="shard-http")
+
+    def info(self) -> dict:
+        response = self._client.get("/healthz")
+        response.raise_for_status()
+        return response.json()
+
+    def reload(self, force: bool = False) -> dict:
+        response = self._client.post("/reload", params={"force": force})
+        if response.status_code == 422:
+            raise ValueError(response.json().get("detail"))
+        response.raise_for_status()
+        return response.json()
+
+    def _search(self, query_embs: np.ndarray, top_k: int, filters: dict):
+        response = self._client.post(
+            "/search", json={**_encode_embeddings(query_embs), "top_k": top_k, "filters": filters}
+        )
+        if response.status_code == 422:
+            raise ValueError(response.json().get("detail"))
+        response.raise_for_status()
+        data = response.json()
+        return data["version"], [pd.DataFrame.from_records(records) for records in data["results"]]
+
+    def submit(self, query_embs: np.ndarray, top_k: int, filters: dict):
+        return self._executor.submit(self._search, query_embs, top_k, filters).result
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+        self._client.close()
+
+
+# --- Coordinateur ---
+
+def _submit(client, query_embs, top_k, filters):
+    """client.submit, dont l'échec immédiat (processus mort...) est rendu à la lecture du résultat."""
+    try:
+        return client.submit(query_embs, top_k, filters)
+    except Exception as e:
+        error = e
+
+        def failed():
+            raise error
+
+        return failed
+
+
+def count_shards(base_dir: str | None = None) -> int:
+    """Nombre de shards de la version courante (0 si elle n'est pas découpée)."""
+    processed_dir = os.path.join(base_dir or get_base_dir(), "data", "processed")
+    return len(read_metadata(current_snapshot_dir(processed_dir)).get("shards", []))
+
+
+def shard_urls(n_shards: int = N_SHARDS) -> list[str]:
+    """URL des shards HTTP : SHARD_URLS, sinon un port par shard à partir de SHARD_BASE_PORT."""
+    if SHARD_URLS:
+        return list(SHARD_URLS)
+    return [f"http://localhost:{SHARD_BASE_PORT + shard}" for shard in range(n_shards)]
+
+
+class ShardedSearcher:
+    def __init__(
+        self,
+        clients: list,
+        model_name: str = EMBEDDING_MODEL_NAME,
+        encoder_backend: str = ENCODER_BACKEND,
+        query_cache_size: int = QUERY_CACHE_SIZE,
+        query_cache_path: str | None = QUERY_CACHE_PATH,
+        allow_partial: bool = False,
+    ):
+        """
+        clients : un client par shard (LocalShardClient ou HttpShardClient).
+        allow_partial : un shard en échec ou hors délai est ignoré (résultats partiels,
+        compteur talent_hunter_shard_errors_total) au lieu de faire échouer la requête.
+        """
+        if not clients:
+            raise ValueError("Aucun shard.")
+        self.clients = list(clients)
+        self.allow_partial = allow_partial
+        self.query_encoder = QueryEncoder(model_name, encoder_backend, query_cache_size, query_cache_path)
+        self.model = self.query_encoder.model
+        self.query_cache = self.query_encoder.cache
+        # Appelées (avec None : pas de version locale) quand tous les shards ont basculé
+        self.reload_callbacks = []
+        self._version_lock = threading.Lock()
+        self._watch_stop = threading.Event()
+        self._watch_thread = None
+
+        infos = [client.info() for client in self.clients]
+        self.n_profiles = sum(info["n_profiles"] for info in infos)
+        print(f"[INFO] {len(infos)} shards, {self.n_profiles} profils au total")
+        versions = {info["version"] for info in infos}
+        if len(versions) > 1:
+            print(f"[ATTENTION] Shards sur des versions différentes : {sorted(versions)}")
+        self.version = max(versions)
+        for info in infos:
+            encoder = info.get("encoder")
+            if encoder is not None and encoder != self.model.fingerprint:
+                print(
+                    f"[ATTENTION] Shard {info['shard']} encodé avec {encoder}, "
+                    f"requêtes encodées avec {self.model.fingerprint}"
+                )
+
+    @classmethod
+    def local(cls, n_shards: int | None = None, base_dir: str | None = None, **kwargs):
+        """Un processus local par shard, chargés en parallèle (n_shards : ceux de la version courante)."""
+        if n_shards is None:
+            n_shards = count_shards(base_dir)
+        if n_shards < 1:
+            raise ValueError("La version courante n'a pas de shards : relancer embedding.py avec n_shards > 1.")
+        clients = [LocalShardClient(shard, base_dir=base_dir) for shard in range(n_shards)]
+        try:
+            for client in clients:
+                client.wait_ready()
+        except Exception:
+            for client in clients:
+                client.close()
+            raise
+        return cls(clients, **kwargs)
+
+    @classmethod
+    def remote(cls, urls: list[str], **kwargs):
+        """Shards servis en HTTP (create_shard_app), un par URL."""
+        return cls([HttpShardClient(url) for url in urls], **kwargs)
+
+    @classmethod
+    def from_config(cls, **kwargs):
+        """Shards décrits par config.py : SHARD_SERVING "http" (shard_urls) ou "local"."""
+        if SHARD_SERVING == "http":
+            return cls.remote(shard_urls(), **kwargs)
+        if SHARD_SERVING != "local":
+            raise ValueError(f"SHARD_SERVING inconnu : {SHARD_SERVING} (attendu : \"local\" ou \"http\")")
+        return cls.local(**kwargs)
+
+    def search(
+        self,
+        job_description: str,
+        top_k: int = 5,
+        min_stars: int | None = None,
+        language_filter: str | list[str] | None = None,
+        language_mode: str = "any",
+        search_mode: str | None = None,
+    ) -> pd.DataFrame:
+        """Même interface que TalentSearcher.search."""
+        if not job_description or not job_description.strip():
+            raise ValueError("La description de poste est vide.")
+
+        filters = {
+            "min_stars": min_stars,
+            "language_filter": language_filter,
+            "language_mode": language_mode,
+        }
+        return self.search_many(
+            [job_description], top_k=top_k, filters=filters, search_mode=search_mode
+        )[0]
+
+    def search_many(
+        self,
+        job_descriptions: list[str],
+        top_k: int = 5,
+        filters: dict | None = None,
+        search_mode: str | None = None,
+    ) -> list[pd.DataFrame]:
+        """
+        Scatter-gather : un encodage des requêtes, un aller-retour par shard (tous en
+        parallèle), puis fusion des top_k de chaque shard par similarité décroissante.
+        """
+        empty = [i for i, jd in enumerate(job_descriptions) if not jd or not jd.strip()]
+        if empty:
+            raise ValueError(f"Description(s) de poste vide(s) aux positions : {empty}")
+        search_mode = search_mode or SEARCH_MODE
+        if search_mode not in SEARCH_MODES:
+            raise ValueError(f"search_mode doit être parmi {SEARCH_MODES}")
+        if search_mode != "dense":
+            raise ValueError(f"Recherche {search_mode!r} indisponible en recherche répartie (seul \"dense\" l'est).")
+        if not job_descriptions:
+            return []
+
+        with timer("search.encode"):
+            query_embs = self.query_encoder.encode(job_descriptions)
+
+        with timer("search.scatter"):
+            pending = [(client, _submit(client, query_embs, top_k, filters or {})) for client in self.clients]
+            # Toutes les réponses sont attendues avant de lever une erreur (chaque shard reste disponible)
+            responses, errors = [], []
+            for client, result in pending:
+                try:
+                    responses.append(result())
+                except Exception as e:
+                    errors.append((client, e))
+
+        invalid = [e for _, e in errors if isinstance(e, ValueError)]
+        if invalid:
+            raise invalid[0]
+        for client, e in errors:
+            SHARD_ERRORS.inc(shard=client.name)
+            if not self.allow_partial:
+                raise RuntimeError(f"Recherche répartie impossible : {e}") from e
+            print(f"[ATTENTION] Shard ignoré : {e}")
+
+        versions = {version for version, _ in responses}
+        if len(versions) > 1:
+            print(f"[ATTENTION] Réponses de versions différentes (bascule en cours) : {sorted(versions)}")
+        self._observe_versions(versions)
+
+        with timer("search.merge"):
+            return [
+                self._merge([frames[q] for _, frames in responses], top_k)
+                for q in range(len(job_descriptions))
+            ]
+
+    @staticmethod
+    def _merge(frames: list[pd.DataFrame], top_k: int) -> pd.DataFrame:
+        frames = [df for df in frames if len(df)]
+        if not frames:
+            return pd.DataFrame()
+        merged = pd.concat(frames, ignore_index=True)
+        return merged.sort_values("similarity", ascending=False, kind="stable").head(top_k).reset_index(drop=True)
+
+    def _observe_versions(self, versions: set):
+        """Adopte la version des shards une fois qu'ils l'ont tous (puis reload_callbacks)."""
+        if len(versions) != 1:
+            return
+        version = next(iter(versions))
+        with self._version_lock:
+            if version == self.version:
+                return
+            previous, self.version = self.version, version
+        print(f"[OK] Shards basculés de la version {previous} à {version}")
+        for callback in self.reload_callbacks:
+            callback(None)
+
+    def reload(self, force: bool = False) -> bool:
+        """
+        Demande à chaque shard de charger la version courante (CURRENT).
+        Retourne True si au moins un shard a basculé ; un shard qui refuse (ValueError)
+        garde sa version en service.
+        """
+        infos = [client.reload(force) for client in self.clients]
+        self._observe_versions({info["version"] for info in infos})
+        return any(info["reloaded"] for info in infos)
+
+    def start_watch(self, interval: float):
+        """
+        Relève la version des shards toutes les interval secondes (thread). Chaque shard
+        surveille CURRENT lui-même ; le coordinateur suit leur bascule (reload_callbacks).
+        """
+        if self._watch_thread is not None:
+            return
+        self._watch_stop.clear()
+
+        def watch():
+            while not self._watch_stop.wait(interval):
+                try:
+                    self._observe_versions({client.info()["version"] for client in self.clients})
+                except Exception as e:
+                    print(f"[ERREUR] Version des shards : {e}")
+
+        self._watch_thread = threading.Thread(target=watch, name="shards-watch", daemon=True)
+        self._watch_thread.start()
+
+    def stop_watch(self):
+        self._watch_stop.set()
+        if self._watch_thread is not None:
+            self._watch_thread.join()
+            self._watch_thread = None
+
+    def encode_queries(self, job_descriptions: list[str]) -> np.ndarray:
+        return self.query_encoder.encode(job_descriptions)
+
+    def save_query_cache(self):
+        self.query_encoder.save()
+
+    def close(self):
+        self.stop_watch()
+        for client in self.clients:
+            client.close()
+
+
+def main(
+    n_shards: int | None = None,
+    urls: list[str] | None = None,
+    queries: tuple[str, ...] = (
+        "python backend developer with django and postgresql",
+        "machine learning engineer pytorch computer vision",
+        "frontend developer react typescript",
+    ),
+    top_k: int = 10,
+    encoder_backend: str = ENCODER_BACKEND,
+    base_dir: str | None = None,
+):
+    """
+    Lance un processus local par shard de la version courante (ou utilise les serveurs
+    de urls, par exemple http://localhost:8100 et suivants, voir SHARD_BASE_PORT),
+    puis compare le top_k réparti à celui de TalentSearcher en recherche exacte
+    dans un seul processus.
+    """
+    from .matching import TalentSearcher
+
+    start = time.perf_counter()
+    if urls:
+        sharded = ShardedSearcher.remote(urls, encoder_backend=encoder_backend, query_cache_path=None)
+    else:
+        sharded = ShardedSearcher.local(
+            n_shards, base_dir=base_dir, encoder_backend=encoder_backend, query_cache_path=None
+        )
+    print(f"[INFO] Shards prêts en {time.perf_counter() - start:.1f}s")
+
+    try:
+        reference = TalentSearcher(
+            use_ann=False, encoder_backend=encoder_backend, base_dir=base_dir, query_cache_path=None
+        )
+        for query in queries:
+            start = time.perf_counter()
+            results = sharded.search(query, top_k=top_k, search_mode="dense")
+            elapsed = (time.perf_counter() - start) * 1000
+            expected = reference.search(query, top_k=top_k, search_mode="dense")
+            same = results["login"].tolist() == expected["login"].tolist()
+            print(f"[{'OK' if same else 'ATTENTION'}] {query[:50]!r} : {elapsed:.1f} ms, identique au mono-processus : {same}")
+    finally:
+        sharded.close()
+
+
+if __name__ == "__main__":
+    main()
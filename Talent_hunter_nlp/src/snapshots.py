@@ -0,0 +1,137 @@
+# versions (snapshots) de l'index de recherche publiées par embedding.py
+"""
+snapshots.py
+Chaque run de embedding.py publie une version complète et immuable de l'index :
+
+    data/processed/snapshots/<version>/   embeddings, index des profils, FAISS, BM25,
+                                          manifeste, snapshot.json (métadonnées)
+    data/processed/snapshots/<version>/shards/<i>/   partition i de l'index (si N_SHARDS > 1)
+    data/processed/CURRENT                nom de la version en service
+
+La version est écrite entièrement dans un dossier temporaire, renommée, puis CURRENT
+est remplacé atomiquement : un lecteur voit soit l'ancienne version, soit la nouvelle,
+jamais un mélange. TalentSearcher recharge la nouvelle version sans redémarrage
+(reload / surveillance de CURRENT) ; les anciennes versions sont supprimées au-delà de keep.
+
+Sans fichier CURRENT (runs plus anciens), les fichiers directement dans data/processed
+sont utilisés (version "legacy").
+"""
+
+import json
+import os
+import shutil
+import time
+import uuid
+
+CURRENT_NAME = "CURRENT"
+SNAPSHOTS_DIRNAME = "snapshots"
+SHARDS_DIRNAME = "shards"
+METADATA_NAME = "snapshot.json"
+LEGACY_VERSION = "legacy"
+# Un dossier de préparation plus vieux que ça (sans écriture) vient d'un run interrompu
+STAGING_MAX_AGE = 24 * 3600
+
+
+def snapshots_dir(processed_dir: str) -> str:
+    return os.path.join(processed_dir, SNAPSHOTS_DIRNAME)
+
+
+def new_version() -> str:
+    """Nom de version triable par date (suffixe aléatoire : deux runs la même seconde)."""
+    return time.strftime("%Y%m%dT%H%M%S") + "-" + uuid.uuid4().hex[:6]
+
+
+def current_version(processed_dir: str) -> str:
+    path = os.path.join(processed_dir, CURRENT_NAME)
+    if not os.path.exists(path):
+        return LEGACY_VERSION
+    with open(path, encoding="utf-8") as f:
+        return f.read().strip() or LEGACY_VERSION
+
+
+def snapshot_dir(processed_dir: str, version: str) -> str:
+    if version == LEGACY_VERSION:
+        return processed_dir
+    return os.path.join(snapshots_dir(processed_dir), version)
+
+
+def current_snapshot_dir(processed_dir: str) -> str:
+    return snapshot_dir(processed_dir, current_version(processed_dir))
+
+
+def shard_dir(directory: str, shard: int) -> str:
+    """Partition shard d'une version (recherche répartie, voir sharding.py)."""
+    return os.path.join(directory, SHARDS_DIRNAME, f"{shard:03d}")
+
+
+def staging_dir(processed_dir: str, version: str) -> str:
+    """Dossier de préparation d'une version (ignoré par les lecteurs et par prune)."""
+    return os.path.join(snapshots_dir(processed_dir), f".staging-{version}")
+
+
+def read_metadata(directory: str) -> dict:
+    path = os.path.join(directory, METADATA_NAME)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def publish(processed_dir: str, staged_dir: str, version: str, metadata: dict) -> str:
+    """
+    Publie la version préparée dans staged_dir : métadonnées, renommage du dossier,
+    puis remplacement atomique de CURRENT (le point de bascule). Retourne le dossier publié.
+    """
+    with open(os.path.join(staged_dir, METADATA_NAME), "w", encoding="utf-8") as f:
+        json.dump({"version": version, "created_at": time.time(), **metadata}, f, indent=2)
+
+    final_dir = snapshot_dir(processed_dir, version)
+    os.replace(staged_dir, final_dir)
+
+    current_path = os.path.join(processed_dir, CURRENT_NAME)
+    tmp_path = current_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(version + "\n")
+    os.replace(tmp_path, current_path)
+    return final_dir
+
+
+def list_versions(processed_dir: str) -> list[str]:
+    """Versions publiées, de la plus ancienne à la plus récente (date de publication)."""
+    root = snapshots_dir(processed_dir)
+    if not os.path.isdir(root):
+        return []
+    names = [
+        name for name in os.listdir(root)
+        if not name.startswith(".") and os.path.isdir(os.path.join(root, name))
+    ]
+    return sorted(names, key=lambda name: (read_metadata(os.path.join(root, name)).get("created_at", 0), name))
+
+
+def prune(processed_dir: str, keep: int = 3, staging_max_age: float = STAGING_MAX_AGE) -> list[str]:
+    """
+    Supprime les versions les plus anciennes au-delà de keep (jamais la version courante),
+    ainsi que les dossiers de préparation abandonnés (non modifiés depuis staging_max_age
+    secondes : ceux d'un autre run encore en cours sont conservés). Un processus qui lit
+    encore une version supprimée garde ses fichiers ouverts / memory-mappés jusqu'à sa
+    propre bascule.
+    """
+    current = current_version(processed_dir)
+    removed = [v for v in list_versions(processed_dir)[:-keep] if v != current] if keep > 0 else []
+    for version in removed:
+        shutil.rmtree(snapshot_dir(processed_dir, version), ignore_errors=True)
+
+    root = snapshots_dir(processed_dir)
+    if os.path.isdir(root):
+        now = time.time()
+        for name in os.listdir(root):
+            if not name.startswith(".staging-"):
+                continue
+            path = os.path.join(root, name)
+            try:
+                age = now - os.path.getmtime(path)
+            except OSError:
+                continue  # déjà publié (renommé) ou supprimé entre-temps
+            if age > staging_max_age:
+                shutil.rmtree(path, ignore_errors=True)
+    return removed
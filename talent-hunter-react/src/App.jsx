@@ -62,7 +62,8 @@ function App() {
         language_filter: languageFilter || null,
       };
 
-    const response = await fetch(`${API_URL}/agent_search`, {
+    // Flux NDJSON : classement par similarité d'abord, puis chaque analyse IA dès qu'elle arrive
+    const response = await fetch(`${API_URL}/agent_search/stream`, {
       method: "POST",
       headers: { 
         "Content-Type": "application/json",
@@ -73,11 +74,34 @@ function App() {
 
       if (!response.ok) throw new Error(`HTTP error ${response.status}`);
 
-      const data = await response.json();
-      setResults(data.results || []);
-      if ((data.results || []).length > 0) {
-        setSelectedLogin(data.results[0].login || "");
+      const handleEvent = (event) => {
+        if (event.event === "results") {
+          setResults(event.results || []);
+          if ((event.results || []).length > 0) {
+            setSelectedLogin(event.results[0].login || "");
+          }
+        } else if (event.event === "candidate") {
+          const { event: _kind, ...analysis } = event;
+          setResults((prev) =>
+            prev.map((r) => (r.login === analysis.login ? { ...r, ...analysis } : r))
+          );
+        } else if (event.event === "final") {
+          setResults(event.results || []);
+        }
+      };
+
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = "";
+      for (;;) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        const lines = buffer.split("\n");
+        buffer = lines.pop();
+        lines.filter((line) => line.trim()).forEach((line) => handleEvent(JSON.parse(line)));
       }
+      if (buffer.trim()) handleEvent(JSON.parse(buffer));
     } catch (err) {
       console.error(err);
       setError("Erreur lors de la recherche Agentic. Vérifiez que FastAPI et Ollama tournent bien.");
@@ -172,7 +196,9 @@ Best regards,
                       className={selectedLogin === r.login ? "selected-row" : ""}
                       onClick={() => setSelectedLogin(r.login)}
                     >
-                      <td className="score-cell">{(r.agent_score * 100).toFixed(0)}%</td>
+                      <td className="score-cell">
+                        {r.agent_score == null ? "…" : `${(r.agent_score * 100).toFixed(0)}%`}
+                      </td>
                       <td><strong>{r.login}</strong></td>
                       <td>
                         <div className="skills-container">